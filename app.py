@@ -1,29 +1,79 @@
-from flask import Flask, render_template, request, jsonify, session, redirect, send_from_directory
-import sqlite3, os, re
+from flask import Flask, render_template, request, jsonify, session, redirect, send_from_directory, send_file, g
+import os, re, json, time, zipfile, tempfile, hmac
+import click
 from werkzeug.utils import secure_filename
-from werkzeug.security import generate_password_hash, check_password_hash
+from markupsafe import escape
+from werkzeug.security import check_password_hash
 from functools import wraps
-from datetime import datetime
+from datetime import datetime, timedelta
+
+from db import connect, get_db, init_app as init_db_app
+from pdf_helpers import to_iso_date
 
 # PDF Export
-from reportlab.lib.pagesizes import A4
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.lib.units import inch
+import reports
+import export_cache
+
+# PDF ingest (background jobs)
+import jobs
+import bulk_import
+
+# Uploaded documents
+import documents
+
+# Clients
+import clients
+
+# Hearing history + daily cause lists
+import hearings
+import cause_lists
+
+# Schema
+import migrations
 
-# PDF Text Extraction
-import PyPDF2
+# Instrumentation
+import metrics
 
 
 app = Flask(__name__)
 app.secret_key = "secretkey123"
+init_db_app(app)
 
 # ---------------- UPLOAD CONFIG ----------------
 UPLOAD_FOLDER = "uploads"
 app.config["UPLOAD_FOLDER"] = UPLOAD_FOLDER
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
+# ---------------- REPORT ASSETS ----------------
+# decoded once here, before gunicorn --preload forks the workers
+LOGO_PATH = os.path.join("static", "logo.png")
+reports.preload(LOGO_PATH)
+
+
+# ---------------- REQUEST METRICS ----------------
+# per route-rule latency histograms, served by /metrics
+metrics.prune()
+
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+def record_request_metrics(response):
+    started = g.pop("request_started", None)
+    if started is not None:
+        metrics.observe(
+            "http_request_duration_seconds",
+            time.perf_counter() - started,
+            route=request.url_rule.rule if request.url_rule else "unmatched",
+            method=request.method,
+            status=response.status_code
+        )
+        metrics.flush()
+    return response
+
 
 # ---------------- LOGIN REQUIRED ----------------
 def login_required(f):
@@ -35,83 +85,58 @@ def login_required(f):
     return wrapper
 
 
-# ---------------- DATABASE INIT ----------------
-def init_db():
-    conn = sqlite3.connect("cases.db")
-    cursor = conn.cursor()
+# ---------------- DATABASE MIGRATIONS ----------------
+# Applied once: by "flask --app app migrate" or here at import, which
+# under gunicorn --preload is the master only. Set AUTO_MIGRATE=0 to
+# leave it to the CLI; a current schema costs one SELECT either way.
+# The CLI imports the app too, so what the import applied is kept for
+# the migrate command to report.
+_auto_migrated = []
+if os.environ.get("AUTO_MIGRATE", "1") == "1":
+    _conn = connect()
+    migrations.migrate(_conn, log=_auto_migrated.append)
+    _conn.close()
 
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS cases (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            client_name TEXT,
-            case_title TEXT,
-            case_number TEXT,
-            case_year TEXT,
-            case_type TEXT,
-            court TEXT,
-            hearing_date TEXT,
-            status TEXT,
-            document TEXT
-        )
-    """)
-
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS lawyer (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE,
-            password TEXT
-        )
-    """)
 
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS notes (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            case_id INTEGER,
-            note TEXT,
-            created_at TEXT
-        )
-    """)
-
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS clients (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT UNIQUE,
-            phone TEXT,
-            email TEXT,
-            address TEXT,
-            created_at TEXT
-        )
-    """)
-
-    hashed = generate_password_hash("1234")
-    cursor.execute("""
-        INSERT OR IGNORE INTO lawyer (username, password)
-        VALUES (?, ?)
-    """, ("lawyer", hashed))
+@app.cli.command("migrate")
+def migrate_command():
+    """
+    Apply pending schema migrations:  flask --app app migrate
+    """
+    for line in _auto_migrated:
+        click.echo(line)
 
-    conn.commit()
+    conn = connect()
+    applied = migrations.migrate(conn, log=click.echo)
+    click.echo(f"schema version {migrations.current_version(conn)}"
+               + ("" if applied or _auto_migrated else " (up to date)"))
     conn.close()
 
 
-def migrate_db():
+# ---------------- FULL TEXT SEARCH QUERIES ----------------
+def build_search_query(query):
     """
-    Safe migration for old databases.
+    'W.P.(C) 1786' -> '"w"* "p"* "c"* "1786"*'
+    Every word must match, each as a prefix (autocomplete).
     """
-    conn = sqlite3.connect("cases.db")
-    cursor = conn.cursor()
-
-    cursor.execute("PRAGMA table_info(cases)")
-    cols = [c[1] for c in cursor.fetchall()]
+    words = re.findall(r"\w+", query.lower())
+    return " ".join('"' + w + '"*' for w in words)
 
-    if "case_type" not in cols:
-        cursor.execute("ALTER TABLE cases ADD COLUMN case_type TEXT DEFAULT ''")
 
-    conn.commit()
-    conn.close()
+# snippet() marks matches with control characters, which escaping
+# leaves alone, instead of HTML
+SNIPPET_OPEN, SNIPPET_CLOSE = "\x02", "\x03"
 
 
-init_db()
-migrate_db()
+def snippet_html(snippet):
+    """
+    Notes and PDF text are user content: the snippet is escaped first,
+    then the match markers become <mark> tags.
+    """
+    if not snippet:
+        return snippet
+    html = str(escape(snippet))
+    return html.replace(SNIPPET_OPEN, "<mark>").replace(SNIPPET_CLOSE, "</mark>")
 
 
 # ---------------- AUTH ----------------
@@ -125,11 +150,10 @@ def authenticate():
     username = request.form.get("username")
     password = request.form.get("password")
 
-    conn = sqlite3.connect("cases.db")
+    conn = get_db()
     cursor = conn.cursor()
     cursor.execute("SELECT * FROM lawyer WHERE username=?", (username,))
     user = cursor.fetchone()
-    conn.close()
 
     if user and check_password_hash(user[2], password):
         session["logged_in"] = True
@@ -178,374 +202,72 @@ def clients_page():
 @app.route("/edit/<int:id>")
 @login_required
 def edit_page(id):
-    conn = sqlite3.connect("cases.db")
+    conn = get_db()
     cursor = conn.cursor()
     cursor.execute("SELECT * FROM cases WHERE id=?", (id,))
     case = cursor.fetchone()
-    conn.close()
     return render_template("edit_case.html", case=case)
 
 
 @app.route("/case/<int:id>")
 @login_required
 def case_detail_page(id):
-    conn = sqlite3.connect("cases.db")
+    conn = get_db()
     cursor = conn.cursor()
 
     cursor.execute("SELECT * FROM cases WHERE id=?", (id,))
     case = cursor.fetchone()
 
     if not case:
-        conn.close()
         return "Case not found", 404
 
-    cursor.execute("""
-        SELECT note, created_at
-        FROM notes
-        WHERE case_id=?
-        ORDER BY id DESC
-    """, (id,))
-    notes = cursor.fetchall()
+    # only the latest page, the rest loads on demand from /get_notes
+    notes, next_cursor = notes_page(cursor, id, NOTES_PAGE_SIZE)
 
-    conn.close()
-    return render_template("case_detail.html", case=case, notes=notes)
+    return render_template(
+        "case_detail.html",
+        case=case,
+        notes=notes,
+        next_cursor=next_cursor,
+        documents=documents.for_case(cursor, id)
+    )
 
 
 # =========================================================
-#                    PDF HELPERS (PHASE 6)
+#             PHASE 3: PDF UPLOAD (AUTO CREATE)
 # =========================================================
+@app.route("/add_case_pdf", methods=["POST"])
+@login_required
+def add_case_pdf():
+    file = request.files.get("file")
 
-def extract_text_from_pdf(pdf_path):
-    text = ""
-    try:
-        with open(pdf_path, "rb") as f:
-            reader = PyPDF2.PdfReader(f)
-            for page in reader.pages:
-                t = page.extract_text()
-                if t:
-                    text += "\n" + t
-    except Exception:
-        pass
-    return text
-
-
-def normalize_date_to_html(date_str):
-    """
-    Converts:
-    20.01.2026  -> 2026-01-20
-    20/01/2026  -> 2026-01-20
-    20-01-2026  -> 2026-01-20
-    """
-    if not date_str:
-        return ""
-
-    date_str = date_str.strip()
-    date_str = date_str.replace("/", ".").replace("-", ".")
-
-    try:
-        dt = datetime.strptime(date_str, "%d.%m.%Y")
-        return dt.strftime("%Y-%m-%d")
-    except Exception:
-        return ""
-
-
-def detect_next_hearing_date(text):
-    """
-    Strong logic for Delhi High Court style:
-    'List on 20.01.2026'
-    """
-    if not text:
-        return ""
-
-    m = re.findall(r"List\s+on\s+(\d{1,2}[\/\-.]\d{1,2}[\/\-.]\d{4})", text, flags=re.IGNORECASE)
-    if m:
-        return normalize_date_to_html(m[-1])
-
-    m2 = re.findall(
-        r"(Next\s+date\s+of\s+hearing|Fixed\s+for)\s*[:\-]?\s*(\d{1,2}[\/\-.]\d{1,2}[\/\-.]\d{4})",
-        text,
-        flags=re.IGNORECASE
-    )
-    if m2:
-        return normalize_date_to_html(m2[-1][1])
-
-    all_dates = re.findall(r"(\d{1,2}[\/\-.]\d{1,2}[\/\-.]\d{4})", text)
-    if all_dates:
-        return normalize_date_to_html(all_dates[-1])
-
-    return ""
-
-
-def detect_case_number_and_year(text):
-    """
-    Example:
-    W.P.(C) 17864/2025
-    """
-    if not text:
-        return ("", "", "")
-
-    m = re.search(
-        r"(W\.P\.\(C\)|CRL\.M\.C\.|CRL\.REV\.P\.|BAIL\s+APPLN\.|FAO|CM\(M\)|RFA|CS\(OS\)|CS\(COMM\)|LPA|MAT\.APP\.)\s*([0-9]+)\s*\/\s*([0-9]{4})",
-        text,
-        flags=re.IGNORECASE
-    )
-    if m:
-        case_full = f"{m.group(1).upper()} {m.group(2)}/{m.group(3)}"
-        return (case_full, m.group(2), m.group(3))
-
-    m2 = re.search(r"([0-9]+)\s*\/\s*([0-9]{4})", text)
-    if m2:
-        return (m2.group(0), m2.group(1), m2.group(2))
-
-    return ("", "", "")
-
-
-def detect_case_title(text):
-    """
-    Petitioner vs Respondent detection
-    """
-    if not text:
-        return ""
-
-    pet = re.search(r"\n([A-Z0-9 &.,\-()\/]+)\s+\.{2,}Petitioner", text)
-    res = re.search(r"\n([A-Z0-9 &.,\-()\/]+)\s+\.{2,}Respondent", text)
-
-    petitioner = pet.group(1).strip() if pet else ""
-    respondent = res.group(1).strip() if res else ""
-
-    if petitioner and respondent:
-        return f"{petitioner} vs {respondent}"
-
-    return ""
-
-
-def detect_court(text):
-    if not text:
-        return ""
-
-    t = text.upper()
-
-    if "HIGH COURT OF DELHI" in t:
-        return "Delhi High Court"
+    if not file:
+        return jsonify({"error": "No PDF selected"}), 400
 
-    if "DISTRICT COURT" in t or "DWARKA COURT" in t:
-        return "Dwarka District Court"
+    filename = secure_filename(file.filename)
 
-    return ""
+    if not filename.lower().endswith(".pdf"):
+        return jsonify({"error": "Only PDF files allowed"}), 400
 
+    sha256, size = documents.save(file.stream)
 
-def detect_case_type_from_pdf(text, court):
-    """
-    PHASE 6:
-    Detects case type EXACTLY like dropdown values.
+    # extraction + detection run in the background (see jobs.py)
+    job_id = jobs.enqueue(get_db(), "create", filename, sha256=sha256)
+    jobs.start_worker(app.config["UPLOAD_FOLDER"])
 
-    For High Court: W.P.(C), CRL.M.C., BAIL APPLN., etc.
-    For Dwarka: Bail Matters, CS DJ ADJ, etc. (limited)
-    """
-    if not text:
-        return ""
-
-    t = text.upper()
-
-    # ---------------- HIGH COURT DETECTION ----------------
-    if court == "Delhi High Court":
-        # Find case type from patterns like:
-        # W.P.(C) 1234/2025
-        # CRL.M.C. 222/2024
-        # BAIL APPLN. 10/2026
-
-        hc_types = [
-            "ADMIN.REPORT",
-            "ARB.A.",
-            "ARB. A. (COMM.)",
-            "ARB.P.",
-            "BAIL APPLN.",
-            "CA",
-            "CA (COMM.IPD-CR)",
-            "C.A.(COMM.IPD-GI)",
-            "C.A.(COMM.IPD-PAT)",
-            "C.A.(COMM.IPD-PV)",
-            "C.A.(COMM.IPD-TM)",
-            "CAVEAT(CO.)",
-            "CC(ARB.)",
-            "CCP(CO.)",
-            "CCP(REF)",
-            "CEAC",
-            "CEAR",
-            "CHAT.A.C.",
-            "CHAT.A.REF",
-            "CMI",
-            "CM(M)",
-            "CM(M)-IPD",
-            "C.O.",
-            "CO.APP.",
-            "CO.APPL.(C)",
-            "CO.APPL.(M)",
-            "CO.A(SB)",
-            "C.O.(COMM.IPD-CR)",
-            "C.O.(COMM.IPD-GI)",
-            "C.O.(COMM.IPD-PAT)",
-            "C.O.(COMM.IPD-TM)",
-            "CO.EX.",
-            "CONT.APP.(C)",
-            "CONT.CAS(C)",
-            "CONT.CAS.(CRL)",
-            "CO.PET.",
-            "C.REF.",
-            "CRL.A.",
-            "CRL.LIP.",
-            "CRL.M.C.",
-            "CRL.M.(CO)",
-            "CRL.M.I.",
-            "CRL.O.",
-            "CRL.O.(CO.)",
-            "CRL.REF.",
-            "CRL.REV.P.",
-            "CRL.REV.P.(MAT.)",
-            "CRL.REV.P.(NDPS)",
-            "CRL.REV.P.(NI)",
-            "C.R.P.",
-            "CRP-IPD",
-            "C.RULE",
-            "CS(COMM)",
-            "CS(COMM) INFRA",
-            "CS(OS)",
-            "GP",
-            "CUSAA",
-            "CUS.A.C.",
-            "CUS.A.R.",
-            "CUSTOMA.",
-            "DEATH SENTENCE REF.",
-            "DEMO",
-            "EDC",
-            "EDR",
-            "EFA(COMM)",
-            "EFA(OS)",
-            "EFA(OS) (COMM)",
-            "EFA(OS)(IPD)",
-            "EL.PET.",
-            "ETR",
-            "EX.F.A.",
-            "EX.P.",
-            "EX.S.A.",
-            "FAO",
-            "FAO (COMM)",
-            "FAO-IPD",
-            "FAO(OS)",
-            "FAO(OS) (COMM)",
-            "FAO(OS)(IPD)",
-            "GCAC",
-            "GCAR",
-            "GTA",
-            "GTC",
-            "GTR",
-            "I.A.",
-            "I.P.A.",
-            "ITA",
-            "ITC",
-            "ITR",
-            "ITSA",
-            "LA.APP.",
-            "LPA",
-            "MAC.APP.",
-            "MAT.",
-            "MAT.APP.",
-            "MAT. APP.(FC.)",
-            "MAT.CASE",
-            "MAT.REF.",
-            "MISC. APPEAL (FEMA)",
-            "MISC. APPEAL(PMLA)",
-            "OA",
-            "OCJA",
-            "O.M.P.",
-            "O.M.P.(COMM)",
-            "OMP (CONT.)",
-            "O.MP. (E)",
-            "O.M.P (E) (COMM.)",
-            "O.M.P.(EFA)(COMM.)",
-            "O.M.P. (ENF.)",
-            "OMP (ENF.) (COMM.)",
-            "O.M.P.(I)",
-            "O.M.P.(I) (COMM.)",
-            "O.M.P.(J) (COMM.)",
-            "O.M.P.(MISC.)",
-            "O.M.P.(MISC.)(COMM.)",
-            "O.M.P.(T)",
-            "O.M.P. (T) (COMM.)",
-            "O.REF.",
-            "RC.REV.",
-            "RC.S.A.",
-            "RERA APPEAL",
-            "REVIEW PET.",
-            "RFA",
-            "RFA(COMM)",
-            "RFA-IPD",
-            "RFA(OS)",
-            "RFA(OS)(COMM)",
-            "RFA(OS)(IPD)",
-            "RSA",
-            "SCA",
-            "SDR",
-            "SERTA",
-            "ST.APPL.",
-            "STC",
-            "ST.REF.",
-            "SUR.T.REF.",
-            "TEST.CAS.",
-            "TR.P.(C)",
-            "TR.P.(C.)",
-            "TR.P.(CRL.)",
-            "VAT APPEAL",
-            "W.P.(C)",
-            "W.P.(C)-IPD",
-            "W.P.(CRL)",
-            "WTA",
-            "WTC",
-            "WTR"
-        ]
-
-        # check in PDF for: "W.P.(C) 123/2025"
-        for ct in hc_types:
-            # make a safe regex
-            ct_regex = re.escape(ct.upper())
-            if re.search(ct_regex + r"\s*[0-9]+\s*\/\s*[0-9]{4}", t):
-                return ct
-
-        # fallback: if it contains just the case type without number
-        for ct in hc_types:
-            if ct.upper() in t:
-                return ct
-
-        return ""
-
-    # ---------------- DWARKA DISTRICT COURT DETECTION ----------------
-    if court == "Dwarka District Court":
-        # District PDFs usually don't show same way,
-        # so just detect a few common words.
-
-        if "BAIL" in t:
-            return "Bail Matters"
-
-        if "MACT" in t:
-            return "MACT"
-
-        if "HMA" in t:
-            return "HMA"
-
-        if "CS" in t and "DJ" in t:
-            return "CS DJ ADJ"
-
-        return ""
-
-    return ""
+    return jsonify({
+        "message": "PDF uploaded, extracting details...",
+        "job_id": job_id,
+        "status_url": f"/pdf_jobs/{job_id}"
+    }), 202
 
 
 # =========================================================
-#             PHASE 3: PDF UPLOAD (AUTO CREATE)
+#      PHASE 4: PDF UPLOAD (AUTO UPDATE EXISTING CASE)
 # =========================================================
-@app.route("/add_case_pdf", methods=["POST"])
+@app.route("/update_case_pdf/<int:case_id>", methods=["POST"])
 @login_required
-def add_case_pdf():
+def update_case_pdf(case_id):
     file = request.files.get("file")
 
     if not file:
@@ -556,118 +278,123 @@ def add_case_pdf():
     if not filename.lower().endswith(".pdf"):
         return jsonify({"error": "Only PDF files allowed"}), 400
 
-    filepath = os.path.join(app.config["UPLOAD_FOLDER"], filename)
-    file.save(filepath)
+    sha256, size = documents.save(file.stream)
 
-    pdf_text = extract_text_from_pdf(filepath)
+    job_id = jobs.enqueue(get_db(), "update", filename, case_id, sha256)
+    jobs.start_worker(app.config["UPLOAD_FOLDER"])
 
-    next_date = detect_next_hearing_date(pdf_text)
-    case_full, case_no, case_year = detect_case_number_and_year(pdf_text)
-    case_title = detect_case_title(pdf_text)
-    court = detect_court(pdf_text)
+    return jsonify({
+        "message": "PDF uploaded, detecting next hearing date...",
+        "job_id": job_id,
+        "status_url": f"/pdf_jobs/{job_id}"
+    }), 202
 
-    # PHASE 6: Detect case type (dropdown style)
-    case_type = detect_case_type_from_pdf(pdf_text, court)
 
-    status = "Pending"
+# =========================================================
+#          BULK PDF IMPORT (MANY FILES OR A ZIP)
+# =========================================================
+@app.route("/bulk_import", methods=["POST"])
+@login_required
+def bulk_import_pdfs():
+    files = request.files.getlist("file")
 
-    # client guess
-    client_name = ""
-    pet = re.search(r"\n([A-Z0-9 &.,\-()\/]+)\s+\.{2,}Petitioner", pdf_text)
-    if pet:
-        client_name = pet.group(1).strip()
-    else:
-        client_name = "PDF Client"
+    if not files:
+        return jsonify({"error": "No files selected"}), 400
 
-    if case_title == "":
-        case_title = "Case From PDF"
+    stored = []
+    skipped = []
 
-    conn = sqlite3.connect("cases.db")
-    cursor = conn.cursor()
+    for file in files:
+        filename = secure_filename(file.filename)
 
-    cursor.execute("""
-        INSERT INTO cases (
-            client_name, case_title, case_number, case_year,
-            case_type, court, hearing_date, status, document
-        )
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-    """, (
-        client_name,
-        case_title,
-        case_no,
-        case_year,
-        case_type,
-        court,
-        next_date,
-        status,
-        filename
-    ))
+        if filename.lower().endswith(".zip"):
+            try:
+                stored.extend(bulk_import.save_zip_pdfs(file.stream))
+            except zipfile.BadZipFile:
+                skipped.append(filename)
+        elif filename.lower().endswith(".pdf"):
+            stored.append((filename, *documents.save(file.stream)))
+        else:
+            skipped.append(filename)
 
-    case_id = cursor.lastrowid
-    conn.commit()
-    conn.close()
+    # analysed by the job dispatcher, not inside this request
+    batch_id = bulk_import.enqueue_batch(get_db(), stored, skipped)
+    jobs.start_worker(app.config["UPLOAD_FOLDER"])
 
     return jsonify({
-        "message": "PDF uploaded and case created successfully!",
-        "case_id": case_id,
-        "next_date_detected": next_date,
-        "case_number_detected": case_full,
-        "court_detected": court,
-        "case_type_detected": case_type
-    })
+        "message": f"{len(stored)} PDFs queued for import",
+        "batch_id": batch_id,
+        "files": len(stored),
+        "skipped": skipped,
+        "status_url": f"/bulk_import/{batch_id}"
+    }), 202
 
 
-# =========================================================
-#      PHASE 4: PDF UPLOAD (AUTO UPDATE EXISTING CASE)
-# =========================================================
-@app.route("/update_case_pdf/<int:case_id>", methods=["POST"])
+@app.route("/bulk_import/<int:batch_id>")
 @login_required
-def update_case_pdf(case_id):
-    file = request.files.get("file")
+def bulk_import_status(batch_id):
+    jobs.start_worker(app.config["UPLOAD_FOLDER"])
 
-    if not file:
-        return jsonify({"error": "No PDF selected"}), 400
+    status = bulk_import.batch_status(get_db(), batch_id)
+    if not status:
+        return jsonify({"error": "Batch not found"}), 404
 
-    filename = secure_filename(file.filename)
+    return jsonify(status)
 
-    if not filename.lower().endswith(".pdf"):
-        return jsonify({"error": "Only PDF files allowed"}), 400
 
-    filepath = os.path.join(app.config["UPLOAD_FOLDER"], filename)
-    file.save(filepath)
+@app.cli.command("bulk-import")
+@click.argument("paths", nargs=-1, required=True)
+@click.option("--workers", type=int, default=None, help="Extraction processes")
+def bulk_import_command(paths, workers):
+    """
+    Import PDFs, zips or folders of PDFs:  flask --app app bulk-import orders.zip
+    """
+    stored = []
+
+    for path in paths:
+        if os.path.isdir(path):
+            names = sorted(n for n in os.listdir(path) if n.lower().endswith(".pdf"))
+            paths_in_dir = [os.path.join(path, n) for n in names]
+        elif path.lower().endswith(".zip"):
+            stored.extend(bulk_import.save_zip_pdfs(path))
+            continue
+        else:
+            paths_in_dir = [path]
+
+        for p in paths_in_dir:
+            name = secure_filename(os.path.basename(p))
+            stored.append((name, *documents.save_file(p)))
+
+    started = time.perf_counter()
+    conn = connect()
+    report = bulk_import.import_pdfs(conn, stored, workers)
+    conn.close()
 
-    pdf_text = extract_text_from_pdf(filepath)
-    next_date = detect_next_hearing_date(pdf_text)
+    summary = bulk_import.summarize(report)
+    summary["seconds"] = round(time.perf_counter() - started, 2)
 
-    if next_date == "":
-        return jsonify({"error": "Next hearing date not found in PDF!"}), 400
+    for entry in report:
+        click.echo(json.dumps(entry))
+    click.echo(json.dumps(summary))
 
-    # Detect court + case type also (optional update)
-    court = detect_court(pdf_text)
-    case_type = detect_case_type_from_pdf(pdf_text, court)
 
-    conn = sqlite3.connect("cases.db")
-    cursor = conn.cursor()
+# ---------------- PDF JOB STATUS ----------------
+@app.route("/pdf_jobs/<int:job_id>")
+@login_required
+def pdf_job_status(job_id):
+    jobs.start_worker(app.config["UPLOAD_FOLDER"])
 
-    # update hearing_date + document + optional court + case_type
-    cursor.execute("""
-        UPDATE cases
-        SET hearing_date=?,
-            document=?,
-            court=COALESCE(NULLIF(?,''), court),
-            case_type=COALESCE(NULLIF(?,''), case_type)
-        WHERE id=?
-    """, (next_date, filename, court, case_type, case_id))
+    job = jobs.get_job(get_db(), job_id)
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
 
-    conn.commit()
-    conn.close()
+    return jsonify(job)
 
-    return jsonify({
-        "message": "PDF uploaded! Hearing date updated successfully.",
-        "next_date_detected": next_date,
-        "court_detected": court,
-        "case_type_detected": case_type
-    })
+
+@app.route("/pdf_jobs/stats")
+@login_required
+def pdf_job_stats():
+    return jsonify(jobs.backlog_stats(get_db()))
 
 
 # ---------------- CASE CRUD ----------------
@@ -676,15 +403,15 @@ def update_case_pdf(case_id):
 def add_case():
     data = request.json
 
-    conn = sqlite3.connect("cases.db")
+    conn = get_db()
     cursor = conn.cursor()
 
     cursor.execute("""
         INSERT INTO cases (
             client_name, case_title, case_number, case_year,
-            case_type, court, hearing_date, status, document
+            case_type, court, hearing_date, status, document, client_id
         )
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
     """, (
         data.get("client_name", ""),
         data.get("case_title", ""),
@@ -692,89 +419,226 @@ def add_case():
         data.get("case_year", ""),
         data.get("case_type", ""),
         data.get("court", ""),
-        data.get("hearing_date", ""),
+        to_iso_date(data.get("hearing_date")),
         data.get("status", "Pending"),
-        ""
+        "",
+        clients.ensure(cursor, data.get("client_name"))
     ))
+    hearings.record(cursor, cursor.lastrowid, to_iso_date(data.get("hearing_date")))
 
     conn.commit()
-    conn.close()
 
     return jsonify({"message": "Case added successfully"})
 
 
+CASE_FIELDS = (
+    "id", "client_name", "case_title", "case_number", "case_year",
+    "case_type", "court", "hearing_date", "status", "document"
+)
+
+# filter param -> SQL condition
+CASE_FILTERS = {
+    "status": "status = ?",
+    "court": "court = ?",
+    "case_type": "case_type = ?",
+    "case_year": "case_year = ?",
+    "hearing_from": "hearing_date >= ?",
+    "hearing_to": "hearing_date <= ?",
+}
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def row_to_case(row, fields=CASE_FIELDS):
+    return dict(zip(fields, row))
+
+
 @app.route("/get_cases")
 @login_required
 def get_cases():
-    conn = sqlite3.connect("cases.db")
+    """
+    Paginated case list (keyset / cursor based).
+
+    ?limit=50                      page size (max 500)
+    ?cursor=...                    next_cursor from the previous page
+    ?sort=id|hearing_date          id = newest first, hearing_date = soonest first
+    ?fields=id,client_name,...     only return these columns
+    ?status= &court= &case_type= &case_year= &hearing_from= &hearing_to=
+    """
+    try:
+        limit = int(request.args.get("limit", DEFAULT_PAGE_SIZE))
+    except ValueError:
+        return jsonify({"error": "Invalid limit"}), 400
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    sort = request.args.get("sort", "id")
+    if sort not in ("id", "hearing_date"):
+        return jsonify({"error": "Invalid sort"}), 400
+
+    fields = CASE_FIELDS
+    if request.args.get("fields"):
+        wanted = [f.strip() for f in request.args["fields"].split(",")]
+        if any(f not in CASE_FIELDS for f in wanted):
+            return jsonify({"error": "Invalid fields"}), 400
+        fields = tuple(f for f in CASE_FIELDS if f in wanted)
+
+    where = []
+    params = []
+    for name, condition in CASE_FILTERS.items():
+        value = request.args.get(name)
+        if value:
+            where.append(condition)
+            params.append(value)
+
+    cursor_value = request.args.get("cursor")
+
+    if sort == "id":
+        order = "id DESC"
+        if cursor_value:
+            try:
+                params.append(int(cursor_value))
+            except ValueError:
+                return jsonify({"error": "Invalid cursor"}), 400
+            where.append("id < ?")
+    else:
+        # unscheduled cases have no place in a date ordered list
+        order = "hearing_date ASC, id ASC"
+        where.append("hearing_date IS NOT NULL AND hearing_date != ''")
+        if cursor_value:
+            date, _, last_id = cursor_value.rpartition("|")
+            try:
+                params.extend([date, int(last_id)])
+            except ValueError:
+                return jsonify({"error": "Invalid cursor"}), 400
+            where.append("(hearing_date, id) > (?, ?)")
+
+    # id and hearing_date are always read, the cursor is built from them
+    columns = ", ".join(("id", "hearing_date") + fields)
+    sql = "SELECT " + columns + " FROM cases"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY " + order + " LIMIT ?"
+    params.append(limit + 1)
+
+    conn = get_db()
     cursor = conn.cursor()
+    cursor.execute(sql, params)
+    rows = cursor.fetchall()
 
-    cursor.execute("""
-        SELECT id, client_name, case_title, case_number, case_year,
-               case_type, court, hearing_date, status, document
-        FROM cases
-        ORDER BY id DESC
-    """)
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = str(last[0]) if sort == "id" else f"{last[1]}|{last[0]}"
 
-    rows = cursor.fetchall()
-    conn.close()
+    cases = [row_to_case(row[2:], fields) for row in rows]
 
-    cases = []
-    for row in rows:
-        cases.append({
-            "id": row[0],
-            "client_name": row[1],
-            "case_title": row[2],
-            "case_number": row[3],
-            "case_year": row[4],
-            "case_type": row[5],
-            "court": row[6],
-            "hearing_date": row[7],
-            "status": row[8],
-            "document": row[9]
-        })
+    return jsonify({"cases": cases, "next_cursor": next_cursor})
 
-    return jsonify(cases)
+
+UPCOMING_LIMIT = 15
+
+
+@app.route("/dashboard_stats")
+@login_required
+def dashboard_stats():
+    """
+    Everything dashboard.html shows, without loading the case list.
+    ?today=YYYY-MM-DD lets the browser use its own date.
+    """
+    try:
+        day = datetime.strptime(request.args.get("today") or datetime.now().strftime("%Y-%m-%d"), "%Y-%m-%d")
+    except ValueError:
+        return jsonify({"error": "Invalid date"}), 400
+
+    # hearing dates compare as text: always the zero padded form (2026-1-5 -> 2026-01-05)
+    today = day.strftime("%Y-%m-%d")
+    week_end = (day + timedelta(days=7)).strftime("%Y-%m-%d")
+
+    conn = get_db()
+    cursor = conn.cursor()
+
+    cursor.execute("SELECT status, total FROM case_status_counts")
+    by_status = {r[0]: r[1] for r in cursor.fetchall() if r[1]}
+
+    # both below walk idx_cases_hearing_date over a 7 day window only
+    cursor.execute(
+        "SELECT COUNT(*) FROM cases WHERE hearing_date BETWEEN ? AND ?",
+        (today, week_end)
+    )
+    upcoming_count = cursor.fetchone()[0]
+
+    fields = ("id", "client_name", "case_title", "court", "hearing_date", "status")
+
+    # today's list comes from the cause list snapshot
+    snapshot = json.loads(cause_lists.get(conn, today))
+    today_list = [
+        {f: e[f] for f in fields}
+        for group in snapshot["courts"]
+        for e in group["cases"]
+    ][:MAX_PAGE_SIZE]
+
+    cursor.execute("""
+        SELECT id, client_name, case_title, court, hearing_date, status
+        FROM cases
+        WHERE hearing_date BETWEEN ? AND ?
+        ORDER BY hearing_date, id
+        LIMIT ?
+    """, (today, week_end, UPCOMING_LIMIT))
+    upcoming = [row_to_case(r, fields) for r in cursor.fetchall()]
+
+    return jsonify({
+        "total": sum(by_status.values()),
+        "active": by_status.get("Active", 0),
+        "pending": by_status.get("Pending", 0),
+        "by_status": by_status,
+        "upcoming_count": upcoming_count,
+        "today": today_list,
+        "upcoming": upcoming
+    })
 
 
 @app.route("/search_any/<query>")
 @login_required
 def search_any(query):
-    q = "%" + query + "%"
+    """
+    Ranked full text search over case fields, notes and PDF text.
+    ?limit=50 caps the number of results.
+    """
+    match = build_search_query(query)
+    if not match:
+        return jsonify([])
+
+    try:
+        limit = int(request.args.get("limit", DEFAULT_PAGE_SIZE))
+    except ValueError:
+        return jsonify({"error": "Invalid limit"}), 400
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
 
-    conn = sqlite3.connect("cases.db")
+    conn = get_db()
     cursor = conn.cursor()
 
+    # bm25 weights follow the column order of case_search:
+    # names and numbers count most, notes and PDF text least
     cursor.execute("""
-        SELECT id, client_name, case_title, case_number, case_year,
-               case_type, court, hearing_date, status, document
-        FROM cases
-        WHERE client_name LIKE ?
-           OR case_title LIKE ?
-           OR case_number LIKE ?
-           OR case_year LIKE ?
-           OR case_type LIKE ?
-           OR court LIKE ?
-        ORDER BY id DESC
-    """, (q, q, q, q, q, q))
+        SELECT c.id, c.client_name, c.case_title, c.case_number, c.case_year,
+               c.case_type, c.court, c.hearing_date, c.status, c.document,
+               snippet(case_search, -1, char(2), char(3), '…', 12)
+        FROM case_search
+        JOIN cases c ON c.id = case_search.rowid
+        WHERE case_search MATCH ?
+        ORDER BY bm25(case_search, 10.0, 8.0, 10.0, 3.0, 3.0, 2.0, 1.0, 1.0)
+        LIMIT ?
+    """, (match, limit))
 
     rows = cursor.fetchall()
-    conn.close()
 
     cases = []
     for row in rows:
-        cases.append({
-            "id": row[0],
-            "client_name": row[1],
-            "case_title": row[2],
-            "case_number": row[3],
-            "case_year": row[4],
-            "case_type": row[5],
-            "court": row[6],
-            "hearing_date": row[7],
-            "status": row[8],
-            "document": row[9]
-        })
+        case = row_to_case(row[:-1])
+        case["snippet"] = snippet_html(row[-1])
+        cases.append(case)
 
     return jsonify(cases)
 
@@ -782,11 +646,13 @@ def search_any(query):
 @app.route("/delete/<int:id>", methods=["DELETE"])
 @login_required
 def delete_case(id):
-    conn = sqlite3.connect("cases.db")
+    conn = get_db()
     cursor = conn.cursor()
+    hashes = documents.case_hashes(cursor, id)
     cursor.execute("DELETE FROM cases WHERE id=?", (id,))
     conn.commit()
-    conn.close()
+    export_cache.invalidate(id)
+    documents.remove_unreferenced(cursor, hashes)
     return jsonify({"message": "Case deleted"})
 
 
@@ -795,7 +661,7 @@ def delete_case(id):
 def update_case():
     data = request.json
 
-    conn = sqlite3.connect("cases.db")
+    conn = get_db()
     cursor = conn.cursor()
 
     cursor.execute("""
@@ -807,7 +673,8 @@ def update_case():
             case_type=?,
             court=?,
             hearing_date=?,
-            status=?
+            status=?,
+            client_id=?
         WHERE id=?
     """, (
         data.get("client_name", ""),
@@ -816,13 +683,16 @@ def update_case():
         data.get("case_year", ""),
         data.get("case_type", ""),
         data.get("court", ""),
-        data.get("hearing_date", ""),
+        to_iso_date(data.get("hearing_date")),
         data.get("status", "Pending"),
+        clients.ensure(cursor, data.get("client_name")),
         data.get("id")
     ))
+    if cursor.rowcount:
+        hearings.record(cursor, data.get("id"), to_iso_date(data.get("hearing_date")))
 
     conn.commit()
-    conn.close()
+    export_cache.invalidate(data.get("id"))
     return jsonify({"message": "Case updated"})
 
 
@@ -834,23 +704,106 @@ def upload_file(case_id):
     if not file:
         return jsonify({"error": "No file selected"})
 
+    conn = get_db()
+    cursor = conn.cursor()
+
+    # no blob is stored for a case that does not exist
+    cursor.execute("SELECT 1 FROM cases WHERE id=?", (case_id,))
+    if not cursor.fetchone():
+        return jsonify({"error": "Case not found"}), 404
+
     filename = secure_filename(file.filename)
-    filepath = os.path.join(app.config["UPLOAD_FOLDER"], filename)
-    file.save(filepath)
+    sha256, size = documents.save(file.stream)
 
-    conn = sqlite3.connect("cases.db")
-    cursor = conn.cursor()
-    cursor.execute("UPDATE cases SET document=? WHERE id=?", (filename, case_id))
+    document_id = documents.attach(cursor, case_id, sha256, filename, size)
+    if document_id is None:
+        # deleted since the check above
+        conn.rollback()
+        return jsonify({"error": "Case not found"}), 404
     conn.commit()
-    conn.close()
 
-    return jsonify({"message": "Uploaded", "file": filename})
+    return jsonify({"message": "Uploaded", "file": filename, "document_id": document_id})
+
+
+# A document id always names the same bytes, so browsers may keep it for
+# good; the other download URLs can point at a newer file and revalidate.
+IMMUTABLE_CACHE = "private, max-age=31536000, immutable"
+REVALIDATE_CACHE = "private, no-cache"
+
+
+def send_document(doc, cache_control=REVALIDATE_CACHE):
+    """
+    Serves a stored document with its sha256 as a strong ETag, so
+    If-None-Match and If-Range work and PDF viewers can fetch byte
+    ranges. ?inline=1 shows it in the browser instead of downloading.
+    """
+    response = send_file(
+        documents.blob_path(doc["sha256"]),
+        as_attachment=request.args.get("inline") != "1",
+        download_name=doc["filename"],
+        etag=doc["sha256"],
+        conditional=True
+    )
+    response.headers["Cache-Control"] = cache_control
+    return response
+
+
+@app.route("/documents/<int:document_id>")
+@login_required
+def download_document(document_id):
+    doc = documents.get(get_db().cursor(), document_id)
+    if not doc:
+        return jsonify({"error": "Document not found"}), 404
+    return send_document(doc, IMMUTABLE_CACHE)
+
+
+@app.route("/case_documents/<int:case_id>")
+@login_required
+def case_documents(case_id):
+    docs = documents.for_case(get_db().cursor(), case_id)
+    for doc in docs:
+        doc["url"] = f"/documents/{doc['id']}"
+    return jsonify(docs)
+
+
+@app.route("/case_document/<int:case_id>")
+@login_required
+def case_document(case_id):
+    """
+    The case's current document; cases.document for files uploaded before
+    the document store that the migration could not find.
+    """
+    cursor = get_db().cursor()
+    doc = documents.latest(cursor, case_id)
+    if doc:
+        return send_document(doc)
+
+    cursor.execute("SELECT document FROM cases WHERE id=?", (case_id,))
+    row = cursor.fetchone()
+    if not row or not row[0]:
+        return jsonify({"error": "No document"}), 404
+    return download_file(row[0])
 
 
 @app.route("/download/<filename>")
 @login_required
 def download_file(filename):
-    return send_from_directory(app.config["UPLOAD_FOLDER"], filename, as_attachment=True)
+    """
+    The latest stored document called filename, else the file of that
+    name left in uploads/ from before the document store.
+    """
+    doc = documents.latest_named(get_db().cursor(), filename)
+    if doc:
+        return send_document(doc)
+
+    response = send_from_directory(
+        app.config["UPLOAD_FOLDER"],
+        filename,
+        as_attachment=request.args.get("inline") != "1",
+        conditional=True
+    )
+    response.headers["Cache-Control"] = REVALIDATE_CACHE
+    return response
 
 
 # ---------------- NOTES ----------------
@@ -863,39 +816,177 @@ def add_note(case_id):
     if not note or note.strip() == "":
         return jsonify({"error": "Empty note"}), 400
 
-    conn = sqlite3.connect("cases.db")
+    conn = get_db()
     cursor = conn.cursor()
     cursor.execute(
         "INSERT INTO notes (case_id, note, created_at) VALUES (?, ?, datetime('now'))",
         (case_id, note)
     )
     conn.commit()
-    conn.close()
+    export_cache.invalidate(case_id)
 
     return jsonify({"message": "Note added"})
 
 
+NOTES_PAGE_SIZE = 20
+
+
+def notes_page(cursor, case_id, limit, before=None):
+    """
+    Up to limit notes of the case, newest first, older than note id
+    before. Walks idx_notes_case (case_id, id) for just the page.
+    Returns (notes, next_cursor).
+    """
+    sql = "SELECT id, note, created_at FROM notes WHERE case_id=?"
+    params = [case_id]
+    if before is not None:
+        sql += " AND id < ?"
+        params.append(before)
+    sql += " ORDER BY id DESC LIMIT ?"
+    params.append(limit + 1)
+
+    cursor.execute(sql, params)
+    rows = cursor.fetchall()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = str(rows[-1][0])
+
+    notes = [{"id": r[0], "note": r[1], "time": r[2]} for r in rows]
+    return notes, next_cursor
+
+
 @app.route("/get_notes/<int:case_id>")
 @login_required
 def get_notes(case_id):
-    conn = sqlite3.connect("cases.db")
+    """
+    ?limit=20 page size (max 500), ?cursor= next_cursor of the previous page.
+    """
+    try:
+        limit = int(request.args.get("limit", NOTES_PAGE_SIZE))
+        before = request.args.get("cursor")
+        before = int(before) if before else None
+    except ValueError:
+        return jsonify({"error": "Invalid limit or cursor"}), 400
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    cursor = get_db().cursor()
+    notes, next_cursor = notes_page(cursor, case_id, limit, before)
+
+    return jsonify({"notes": notes, "next_cursor": next_cursor})
+
+
+# ---------------- CLIENTS ----------------
+@app.route("/get_clients")
+@login_required
+def get_clients():
+    today = to_iso_date(request.args.get("today")) or datetime.now().strftime("%Y-%m-%d")
+    cursor = get_db().cursor()
+    return jsonify(clients.list_clients(cursor, today))
+
+
+@app.route("/add_client", methods=["POST"])
+@login_required
+def add_client():
+    data = request.json or {}
+    name = (data.get("name") or "").strip()
+
+    if not name:
+        return jsonify({"error": "Client name is required"}), 400
+
+    conn = get_db()
     cursor = conn.cursor()
-    cursor.execute(
-        "SELECT note, created_at FROM notes WHERE case_id=? ORDER BY id DESC",
-        (case_id,)
+
+    if clients.find(cursor, name):
+        return jsonify({"error": "Client already exists"}), 409
+
+    client_id = clients.create(
+        cursor, name,
+        (data.get("phone") or "").strip(),
+        (data.get("email") or "").strip(),
+        (data.get("address") or "").strip()
     )
-    rows = cursor.fetchall()
-    conn.close()
+    conn.commit()
+
+    return jsonify({"message": "Client added", "id": client_id})
+
+
+@app.route("/delete_client/<int:client_id>", methods=["DELETE"])
+@login_required
+def delete_client(client_id):
+    conn = get_db()
+    cursor = conn.cursor()
+
+    # served by idx_cases_client
+    cursor.execute("SELECT COUNT(*) FROM cases WHERE client_id=?", (client_id,))
+    case_count = cursor.fetchone()[0]
+    if case_count:
+        return jsonify({
+            "error": f"Client has {case_count} case(s), delete or reassign them first"
+        }), 409
+
+    cursor.execute("DELETE FROM clients WHERE id=?", (client_id,))
+    conn.commit()
+
+    if not cursor.rowcount:
+        return jsonify({"error": "Client not found"}), 404
+    return jsonify({"message": "Client deleted"})
+
+
+# ---------------- HEARING HISTORY ----------------
+@app.route("/hearings")
+@login_required
+def hearings_between():
+    start = to_iso_date(request.args.get("from"))
+    end = to_iso_date(request.args.get("to"))
+
+    if not start or not end:
+        return jsonify({"error": "from and to must be dates (YYYY-MM-DD)"}), 400
+
+    try:
+        limit = max(1, min(int(request.args.get("limit", MAX_PAGE_SIZE)), MAX_PAGE_SIZE))
+    except ValueError:
+        return jsonify({"error": "limit must be a number"}), 400
+
+    cursor = get_db().cursor()
+    return jsonify(hearings.between(cursor, start, end, limit))
+
+
+@app.route("/case_hearings/<int:case_id>")
+@login_required
+def case_hearings(case_id):
+    cursor = get_db().cursor()
+    history = hearings.history(cursor, case_id)
+
+    return jsonify({
+        "case_id": case_id,
+        "hearings": history,
+        "adjournments": sum(1 for h in history if h["outcome"] == hearings.ADJOURNED)
+    })
 
-    notes = [{"note": r[0], "time": r[1]} for r in rows]
-    return jsonify(notes)
+
+@app.route("/adjournments")
+@login_required
+def adjournments():
+    try:
+        limit = max(1, min(int(request.args.get("limit", 50)), MAX_PAGE_SIZE))
+    except ValueError:
+        return jsonify({"error": "limit must be a number"}), 400
+
+    cursor = get_db().cursor()
+    return jsonify(hearings.adjournment_counts(cursor, limit))
 
 
 # ---------------- PDF EXPORT (ALL CASES) ----------------
+# rendered into a per-request buffer that spills to disk when large
+EXPORT_BUFFER_BYTES = 8 * 1024 * 1024
+
+
 @app.route("/export_pdf")
 @login_required
 def export_pdf():
-    conn = sqlite3.connect("cases.db")
+    conn = get_db()
     cursor = conn.cursor()
 
     cursor.execute("""
@@ -905,125 +996,220 @@ def export_pdf():
         ORDER BY id DESC
     """)
 
-    rows = cursor.fetchall()
-    conn.close()
+    return send_report("case_list", "cases_report.pdf", cursor)
 
-    pdf_path = "cases_report.pdf"
-    doc = SimpleDocTemplate(pdf_path, pagesize=A4)
-    styles = getSampleStyleSheet()
-    elements = []
 
-    logo_path = os.path.join("static", "logo.png")
-    if os.path.exists(logo_path):
-        elements.append(Image(logo_path, width=1.2*inch, height=1.2*inch))
+def send_report(name, download_name, *args):
+    buffer = tempfile.SpooledTemporaryFile(max_size=EXPORT_BUFFER_BYTES)
+    reports.render(name, buffer, *args)
+    buffer.seek(0)
 
-    elements.append(Paragraph("<b>VIPUL KUMAR - Lawyer Case Report</b>", styles["Title"]))
-    elements.append(Paragraph("Generated: " + datetime.now().strftime("%d-%m-%Y %I:%M %p"), styles["Normal"]))
-    elements.append(Spacer(1, 12))
-
-    data = [["ID", "Client", "Case Title", "Case No", "Year", "Case Type", "Court", "Hearing", "Status"]]
-    for r in rows:
-        data.append([
-            str(r[0]),
-            r[1],
-            r[2],
-            r[3] or "",
-            r[4] or "",
-            r[5] or "",
-            r[6] or "",
-            r[7] or "",
-            r[8] or ""
-        ])
-
-    table = Table(data, repeatRows=1)
-    table.setStyle(TableStyle([
-        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#0b3a78")),
-        ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
-        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-        ("FONTSIZE", (0, 0), (-1, 0), 9),
-        ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
-        ("FONTSIZE", (0, 1), (-1, -1), 8),
-        ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
-        ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.whitesmoke, colors.lightgrey]),
-    ]))
-
-    elements.append(table)
-    doc.build(elements)
-
-    return send_from_directory(".", pdf_path, as_attachment=True)
+    return send_file(
+        buffer,
+        mimetype="application/pdf",
+        as_attachment=True,
+        download_name=download_name
+    )
 
 
 # ---------------- PDF EXPORT (SINGLE CASE) ----------------
 @app.route("/export_case_pdf/<int:case_id>")
 @login_required
 def export_case_pdf(case_id):
-    conn = sqlite3.connect("cases.db")
+    conn = get_db()
     cursor = conn.cursor()
     cursor.execute("SELECT * FROM cases WHERE id=?", (case_id,))
     row = cursor.fetchone()
-    conn.close()
 
     if not row:
         return "Case not found", 404
 
-    pdf_path = f"case_{case_id}.pdf"
-    doc = SimpleDocTemplate(pdf_path, pagesize=A4)
-    styles = getSampleStyleSheet()
-    elements = []
-
-    logo_path = os.path.join("static", "logo.png")
-    if os.path.exists(logo_path):
-        elements.append(Image(logo_path, width=1.2*inch, height=1.2*inch))
-
-    elements.append(Paragraph("<b>VIPUL KUMAR - Case Details</b>", styles["Title"]))
-    elements.append(Paragraph("Generated: " + datetime.now().strftime("%d-%m-%Y %I:%M %p"), styles["Normal"]))
-    elements.append(Spacer(1, 14))
-
-    data = [
-        ["Field", "Details"],
-        ["Case ID", str(row[0])],
-        ["Client Name", row[1]],
-        ["Case Title", row[2]],
-        ["Case Number", row[3] or ""],
-        ["Case Year", row[4] or ""],
-        ["Case Type", row[5] or ""],
-        ["Court", row[6] or ""],
-        ["Hearing Date", row[7] or ""],
-        ["Status", row[8] or ""],
-        ["Document", row[9] or "Not Uploaded"]
-    ]
-
-    table = Table(data, colWidths=[150, 350])
-    table.setStyle(TableStyle([
-        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#0b3a78")),
-        ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
-        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-        ("FONTSIZE", (0, 0), (-1, 0), 12),
-        ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
-        ("FONTSIZE", (0, 1), (-1, -1), 10),
-        ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
-        ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.whitesmoke, colors.lightgrey]),
-    ]))
-
-    elements.append(table)
-    doc.build(elements)
-
-    return send_from_directory(".", pdf_path, as_attachment=True)
+    # rendered once per version of the case, then served from the cache
+    version = export_cache.case_version(cursor, row)
+    pdf_path = export_cache.get_or_render(
+        case_id, version, lambda out: reports.render("case", out, row)
+    )
+
+    response = send_file(
+        pdf_path,
+        mimetype="application/pdf",
+        as_attachment=True,
+        download_name=f"case_{case_id}.pdf",
+        etag=version,
+        conditional=True
+    )
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
+
+
+# ---------------- CAUSE LIST (SNAPSHOTS) ----------------
+def cause_list_day(value):
+    """
+    ?date= as YYYY-MM-DD, today when missing, None when invalid.
+    """
+    value = value or datetime.now().strftime("%Y-%m-%d")
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").strftime("%Y-%m-%d")
+    except ValueError:
+        return None
+
+
+@app.route("/cause_list")
+@login_required
+def cause_list():
+    day = cause_list_day(request.args.get("date"))
+    if not day:
+        return jsonify({"error": "date must be YYYY-MM-DD"}), 400
+
+    # the snapshot is stored as JSON already, sent as is
+    return app.response_class(cause_lists.get(get_db(), day), mimetype="application/json")
+
+
+@app.route("/export_cause_list")
+@login_required
+def export_cause_list():
+    day = cause_list_day(request.args.get("date"))
+    if not day:
+        return jsonify({"error": "date must be YYYY-MM-DD"}), 400
+
+    conn = get_db()
+
+    # a day that is not stored is rendered for this request only
+    if not cause_lists.kept(conn, day):
+        buffer = tempfile.SpooledTemporaryFile(max_size=EXPORT_BUFFER_BYTES)
+        cause_lists.render_pdf(json.loads(cause_lists.get(conn, day)), buffer)
+        buffer.seek(0)
+        return send_file(
+            buffer,
+            mimetype="application/pdf",
+            as_attachment=True,
+            download_name=f"cause_list_{day}.pdf"
+        )
+
+    pdf_path, built_at = cause_lists.get_pdf(conn, day)
+
+    response = send_file(
+        pdf_path,
+        mimetype="application/pdf",
+        as_attachment=True,
+        download_name=f"cause_list_{day}.pdf",
+        etag=f"{day}-{built_at}",
+        conditional=True
+    )
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
+
+
+@app.cli.command("build-cause-lists")
+@click.option("--date", "start", default=None, help="First day (YYYY-MM-DD), default today")
+@click.option("--days", type=int, default=cause_lists.WEEK_DAYS, help="Days to build")
+@click.option("--no-pdf", is_flag=True, help="Skip pre-rendering the PDFs")
+def build_cause_lists_command(start, days, no_pdf):
+    """
+    Materialize the cause lists for the coming week, e.g. from cron:
+    30 5 * * *  flask --app app build-cause-lists
+    """
+    day = cause_list_day(start)
+    if not day:
+        raise click.BadParameter("must be YYYY-MM-DD", param_hint="--date")
+
+    started = time.perf_counter()
+    conn = connect()
+    built = cause_lists.materialize(conn, datetime.strptime(day, "%Y-%m-%d"), days, pdf=not no_pdf)
+    pruned = cause_lists.prune(conn, day)
+    conn.close()
+
+    click.echo(json.dumps({
+        "built": built,
+        "pruned": pruned,
+        "seconds": round(time.perf_counter() - started, 2)
+    }))
+
+
+# ---------------- PDF EXPORT (CLIENT STATEMENT) ----------------
+@app.route("/export_client_statement")
+@login_required
+def export_client_statement():
+    client_name = (request.args.get("client") or "").strip()
+    if not client_name:
+        return jsonify({"error": "client is required"}), 400
+
+    conn = get_db()
+    cursor = conn.cursor()
+
+    # by name_key, so "Ram  Kumar" and "ram kumar" are the same client
+    client_id = clients.find(cursor, client_name)
+    if not client_id:
+        return jsonify({"error": "Client not found"}), 404
+    cursor.execute("SELECT name FROM clients WHERE id=?", (client_id,))
+    client_name = cursor.fetchone()[0]
+
+    # served by idx_cases_client
+    cursor.execute("""
+        SELECT id, case_title, case_number, case_year, court,
+               hearing_date, status
+        FROM cases
+        WHERE client_id=?
+        ORDER BY id DESC
+    """, (client_id,))
+
+    download_name = "statement_" + (secure_filename(client_name) or "client") + ".pdf"
+    return send_report("client_statement", download_name, cursor, client_name)
+
+
+# ---------------- REPORT TIMINGS ----------------
+@app.route("/report_stats")
+@login_required
+def report_stats():
+    return jsonify(reports.render_stats())
+
+
+# ---------------- PROMETHEUS METRICS ----------------
+# Scrapers send "Authorization: Bearer $METRICS_TOKEN"; without a token
+# configured, only a logged in session can read it.
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+
+
+@app.route("/metrics")
+def metrics_endpoint():
+    if METRICS_TOKEN:
+        if not hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {METRICS_TOKEN}"):
+            return "Unauthorized", 401
+    elif not session.get("logged_in"):
+        return redirect("/login")
+
+    return app.response_class(metrics.render(), mimetype="text/plain; version=0.0.4")
 
 
 # ---------------- CALENDAR EVENTS ----------------
+# FullCalendar asks for the visible window only (?start=...&end=..., ISO
+# timestamps, end exclusive); the date part is enough to bound the index.
+
 @app.route("/calendar_events")
 @login_required
 def calendar_events():
-    conn = sqlite3.connect("cases.db")
+    conditions = ["hearing_date IS NOT NULL", "hearing_date != ''"]
+    params = []
+
+    for name, op in (("start", ">="), ("end", "<")):
+        value = request.args.get(name)
+        if not value:
+            continue
+        day = to_iso_date(value[:10])
+        if not day:
+            return jsonify({"error": f"{name} must be an ISO date"}), 400
+        conditions.append(f"hearing_date {op} ?")
+        params.append(day)
+
+    conn = get_db()
     cursor = conn.cursor()
-    cursor.execute("""
+    cursor.execute(f"""
         SELECT id, client_name, case_title, hearing_date
         FROM cases
-        WHERE hearing_date IS NOT NULL AND hearing_date != ''
-    """)
+        WHERE {" AND ".join(conditions)}
+        ORDER BY hearing_date, id
+    """, params)
     rows = cursor.fetchall()
-    conn.close()
 
     events = []
     for r in rows:
@@ -1033,7 +1219,11 @@ def calendar_events():
             "start": r[3]
         })
 
-    return jsonify(events)
+    # month navigation back to a view the browser already has is a 304
+    response = jsonify(events)
+    response.add_etag()
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response.make_conditional(request)
 
 
 # ---------------- RUN ----------------
@@ -0,0 +1,7 @@
+"""
+Benchmarks. The bench_*.py scripts each compare one change against the
+code it replaced; dataset.py and suite.py build a large synthetic firm
+and time the main routes over it (run from the repository root):
+
+    python -m benchmarks.suite --out results.json --baseline last.json
+"""
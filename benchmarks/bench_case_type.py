@@ -0,0 +1,72 @@
+"""
+Compares the old per-type loop in detect_case_type_from_pdf (up to 300
+regex / substring scans per PDF) with the compiled single-pass matcher,
+over the text of the sample PDFs in uploads/.
+
+    python benchmarks/bench_case_type.py --rounds 200
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from courts import HC_CASE_TYPES
+from pdf_helpers import detect_case_type_from_pdf, extract_text_from_pdf
+
+
+def legacy_case_type(text):
+    t = text.upper()
+    for ct in HC_CASE_TYPES:
+        if re.search(re.escape(ct.upper()) + r"\s*[0-9]+\s*\/\s*[0-9]{4}", t):
+            return ct
+    for ct in HC_CASE_TYPES:
+        if ct.upper() in t:
+            return ct
+    return ""
+
+
+def compiled_case_type(text):
+    return detect_case_type_from_pdf(text, "Delhi High Court")
+
+
+def timeit(fn, texts, rounds):
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        for text in texts:
+            fn(text)
+    return (time.perf_counter() - t0) / (rounds * len(texts))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--folder", default=os.path.join(ROOT, "uploads"))
+    args = parser.parse_args()
+
+    texts = []
+    for name in sorted(os.listdir(args.folder)):
+        if name.lower().endswith(".pdf"):
+            text = extract_text_from_pdf(os.path.join(args.folder, name))
+            texts.append(text)
+            print("%-40s legacy=%-10r compiled=%r" % (
+                name[:40], legacy_case_type(text), compiled_case_type(text)
+            ))
+
+    if not texts:
+        print("no PDFs found in", args.folder)
+        return
+
+    old = timeit(legacy_case_type, texts, args.rounds)
+    new = timeit(compiled_case_type, texts, args.rounds)
+
+    print("legacy    %8.1f us / document" % (old * 1e6))
+    print("compiled  %8.1f us / document" % (new * 1e6))
+    print("speedup   %8.1fx" % (old / new if new else 0))
+
+
+if __name__ == "__main__":
+    main()
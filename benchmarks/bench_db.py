@@ -0,0 +1,119 @@
+"""
+Hammers /get_cases and /add_case from several threads and prints
+p50/p99 latency for the old connect-per-request mode and the pooled
+WAL connection layer.
+
+    python benchmarks/bench_db.py --threads 8 --requests 200
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db
+import migrations
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    k = min(len(values) - 1, int(round(pct / 100.0 * (len(values) - 1))))
+    return values[k]
+
+
+def make_client(app):
+    client = app.test_client()
+    with client.session_transaction() as s:
+        s["logged_in"] = True
+    return client
+
+
+def run(app, threads, requests_per_thread, seed_rows):
+    client = make_client(app)
+    for i in range(seed_rows):
+        client.post("/add_case", json={
+            "client_name": f"Client {i}",
+            "case_title": f"Client {i} vs State",
+            "case_number": str(1000 + i),
+            "case_year": "2025",
+            "court": "Delhi High Court",
+            "hearing_date": "2026-01-20",
+            "status": "Pending"
+        })
+
+    timings = {"/get_cases": [], "/add_case": []}
+    lock = threading.Lock()
+
+    def worker(n):
+        c = make_client(app)
+        local = {"/get_cases": [], "/add_case": []}
+        for i in range(requests_per_thread):
+            # mostly reads, one write in four
+            if i % 4 == 0:
+                t0 = time.perf_counter()
+                c.post("/add_case", json={"client_name": f"T{n}-{i}", "case_title": "Bench"})
+                local["/add_case"].append(time.perf_counter() - t0)
+            else:
+                t0 = time.perf_counter()
+                c.get("/get_cases")
+                local["/get_cases"].append(time.perf_counter() - t0)
+        with lock:
+            for k, v in local.items():
+                timings[k].extend(v)
+
+    pool = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    t0 = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    wall = time.perf_counter() - t0
+
+    return timings, wall
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--rows", type=int, default=500)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    db.DB_PATH = os.path.join(tmp, "warmup.db")
+
+    import app as app_module
+    app = app_module.app
+
+    for label, pooled in (("before (connect per request)", False), ("after (pooled + WAL)", True)):
+        db.POOL_CONNECTIONS = pooled
+        db.DB_PATH = os.path.join(tmp, f"bench_{int(pooled)}.db")
+        if pooled:
+            migrations.migrate(db.connect())
+        else:
+            # old behaviour: rollback journal, default pragmas
+            saved = db.PRAGMAS
+            db.PRAGMAS = ()
+            migrations.migrate(db.connect())
+            db.PRAGMAS = saved
+
+        timings, wall = run(app, args.threads, args.requests, args.rows)
+
+        print(label)
+        for route, values in timings.items():
+            print("  %-12s n=%-5d p50=%7.2fms  p99=%7.2fms" % (
+                route, len(values),
+                percentile(values, 50) * 1000,
+                percentile(values, 99) * 1000
+            ))
+        total = sum(len(v) for v in timings.values())
+        print("  throughput  %.0f req/s" % (total / wall))
+
+
+if __name__ == "__main__":
+    main()
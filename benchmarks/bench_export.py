@@ -0,0 +1,96 @@
+"""
+Times /export_pdf for large portfolios and records peak Python memory
+(tracemalloc) for the streaming export and, with --legacy, for the old
+single-table build.
+
+    python benchmarks/bench_export.py --sizes 10000 50000
+"""
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db
+import migrations
+
+
+def seed(conn, n):
+    conn.executemany("""
+        INSERT INTO cases (client_name, case_title, case_number, case_year,
+                           case_type, court, hearing_date, status, document)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, '')
+    """, (
+        (f"Client {i}", f"Client {i} vs Union of India", str(i), "2025",
+         "W.P.(C)", "Delhi High Court", "2026-01-20", "Pending")
+        for i in range(n)
+    ))
+    conn.commit()
+
+
+def legacy_export(conn):
+    from reportlab.lib.pagesizes import A4
+    from reportlab.platypus import SimpleDocTemplate, Table
+    from reports import CASE_LIST_HEADER, CASE_LIST_STYLE
+
+    rows = conn.execute("""
+        SELECT id, client_name, case_title, case_number, case_year,
+               case_type, court, hearing_date, status
+        FROM cases ORDER BY id DESC
+    """).fetchall()
+    data = [CASE_LIST_HEADER] + [[str(r[0])] + [v or "" for v in r[1:]] for r in rows]
+    table = Table(data, repeatRows=1)
+    table.setStyle(CASE_LIST_STYLE)
+    SimpleDocTemplate(io.BytesIO(), pagesize=A4).build([table])
+
+
+def measure(fn):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    fn()
+    seconds = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak / (1024 * 1024)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 50000])
+    parser.add_argument("--legacy", action="store_true", help="also run the old single-table export")
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    db.DB_PATH = os.path.join(tmp, "warmup.db")
+    import app as app_module
+
+    client = app_module.app.test_client()
+    with client.session_transaction() as s:
+        s["logged_in"] = True
+
+    for n in args.sizes:
+        db.DB_PATH = os.path.join(tmp, f"export_{n}.db")
+        migrations.migrate(db.connect())
+        conn = db.connect()
+        seed(conn, n)
+
+        def streaming():
+            r = client.get("/export_pdf")
+            r.get_data()
+
+        seconds, peak = measure(streaming)
+        print("%6d cases  streaming  %6.1fs  peak %7.1f MB" % (n, seconds, peak))
+
+        if args.legacy:
+            seconds, peak = measure(lambda: legacy_export(conn))
+            print("%6d cases  legacy     %6.1fs  peak %7.1f MB" % (n, seconds, peak))
+
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
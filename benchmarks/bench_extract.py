@@ -0,0 +1,239 @@
+"""
+Field extraction: checks the compiled field engine (pdf_helpers.FieldScan)
+against the golden corpus in golden_fields.json, then compares its
+throughput in documents/second with the old detect_* chain (copied
+below) over the corpus texts and the text of synthetic order PDFs.
+Last, it registers made-up court profiles (see courts.py) up to each
+of --courts and measures again: detection cost must stay flat as
+courts are added.
+
+    python benchmarks/bench_extract.py --rounds 200
+    python benchmarks/bench_extract.py --courts 50,200,1000
+    python benchmarks/bench_extract.py --update     # rewrite expected fields
+
+Exits 1 when a golden document no longer extracts as expected, or when
+the rate with more courts falls below --min-ratio of the 2-court rate.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks import dataset
+import courts
+from courts import HC_CASE_TYPES, CourtProfile, normalize
+from pdf_helpers import analyse_pdf, extract_fields, extract_text_from_pdf, normalize_date_to_html
+
+GOLDEN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "golden_fields.json")
+
+# compared against the corpus; timings, text and page counts vary
+CHECKED = (
+    "court", "case_full", "case_number", "case_year", "case_type",
+    "case_title", "client_name", "petitioner", "respondent", "next_date", "confidence"
+)
+
+
+# ---------------- OLD DETECT CHAIN ----------------
+# flat alternation, longest first, as it was
+LEGACY_ALTERNATION = "|".join(
+    re.escape(p).replace(r"\ ", r"\s+") for p in sorted({t.upper() for t in HC_CASE_TYPES}, key=len, reverse=True)
+)
+LEGACY_REFERENCE_RE = re.compile(
+    r"(?<![A-Z0-9])(?P<type>" + LEGACY_ALTERNATION + r")\s*(?P<number>[0-9]+)\s*\/\s*(?P<year>[0-9]{4})"
+)
+LEGACY_TYPE_RE = re.compile(r"(?<![A-Z0-9])(?P<type>" + LEGACY_ALTERNATION + r")(?![A-Z0-9])")
+LEGACY_TYPE_BY_TEXT = {}
+for _ct in HC_CASE_TYPES:
+    LEGACY_TYPE_BY_TEXT.setdefault(_ct.upper(), _ct)
+
+
+def _dropdown_type(matched):
+    return LEGACY_TYPE_BY_TEXT.get(normalize(matched), matched)
+
+
+def legacy_fields(text):
+    m = re.findall(r"List\s+on\s+(\d{1,2}[\/\-.]\d{1,2}[\/\-.]\d{4})", text, flags=re.IGNORECASE)
+    if m:
+        next_date = normalize_date_to_html(m[-1])
+    else:
+        m2 = re.findall(
+            r"(Next\s+date\s+of\s+hearing|Fixed\s+for)\s*[:\-]?\s*(\d{1,2}[\/\-.]\d{1,2}[\/\-.]\d{4})",
+            text, flags=re.IGNORECASE
+        )
+        if m2:
+            next_date = normalize_date_to_html(m2[-1][1])
+        else:
+            all_dates = re.findall(r"(\d{1,2}[\/\-.]\d{1,2}[\/\-.]\d{4})", text)
+            next_date = normalize_date_to_html(all_dates[-1]) if all_dates else ""
+
+    ref = LEGACY_REFERENCE_RE.search(text.upper())
+    if ref:
+        case_full = f"{_dropdown_type(ref.group('type'))} {ref.group('number')}/{ref.group('year')}"
+    else:
+        m3 = re.search(r"([0-9]+)\s*\/\s*([0-9]{4})", text)
+        case_full = m3.group(0) if m3 else ""
+
+    pet = re.search(r"\n([A-Z0-9 &.,\-()\/]+)\s+\.{2,}Petitioner", text)
+    res = re.search(r"\n([A-Z0-9 &.,\-()\/]+)\s+\.{2,}Respondent", text)
+    title = f"{pet.group(1).strip()} vs {res.group(1).strip()}" if pet and res else ""
+
+    t = text.upper()
+    court = "Delhi High Court" if "HIGH COURT OF DELHI" in t else (
+        "Dwarka District Court" if "DISTRICT COURT" in t or "DWARKA COURT" in t else ""
+    )
+
+    t = text.upper()
+    case_type = ""
+    if court == "Delhi High Court":
+        ref = LEGACY_REFERENCE_RE.search(t)
+        if ref:
+            case_type = _dropdown_type(ref.group("type"))
+        else:
+            bare = LEGACY_TYPE_RE.search(t)
+            case_type = _dropdown_type(bare.group("type")) if bare else ""
+
+    client = re.search(r"\n([A-Z0-9 &.,\-()\/]+)\s+\.{2,}Petitioner", text)
+
+    return {
+        "court": court, "case_full": case_full, "case_type": case_type,
+        "case_title": title, "client_name": client.group(1).strip() if client else "",
+        "next_date": next_date
+    }
+
+
+# ---------------- GOLDEN CORPUS ----------------
+def extract(doc):
+    if "pdf" in doc:
+        found = analyse_pdf(os.path.join(ROOT, doc["pdf"]))
+    else:
+        found = extract_fields(doc["text"])
+    return {k: found[k] for k in CHECKED}
+
+
+def check_golden(corpus, update):
+    failures = 0
+    for doc in corpus:
+        got = extract(doc)
+        if update:
+            doc["expected"] = got
+            continue
+        diff = {k: (doc["expected"].get(k), got[k]) for k in CHECKED if doc["expected"].get(k) != got[k]}
+        if diff:
+            failures += 1
+            print("MISMATCH %s: %s" % (doc["name"], json.dumps(diff)))
+    return failures
+
+
+# ---------------- MORE COURTS ----------------
+def synthetic_court(i):
+    """
+    A made-up court with its own markers, 30 case types and a keyword,
+    to see that detection cost does not grow with the number of courts.
+    """
+    return CourtProfile(
+        f"Synthetic Court {i}",
+        markers=(f"HIGH COURT OF SYNTHETIC STATE {i}", f"SYNTHETIC DISTRICT {i} COURT"),
+        case_types=[f"{t} (S{i})" for t in HC_CASE_TYPES[:30]],
+        type_keywords=(((f"SYNKW{i}",), "Synthetic"),),
+        date_phrases={"fixed_for": ("NEXT DATE OF HEARING", "RENOTIFY ON")},
+    )
+
+
+# ---------------- THROUGHPUT ----------------
+def docs_per_second(fn, texts, rounds, repeat=3):
+    """
+    Best of repeat runs, so one noisy run does not decide a ratio.
+    """
+    best = 0.0
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(rounds):
+            for text in texts:
+                fn(text)
+        best = max(best, rounds * len(texts) / (time.perf_counter() - t0))
+    return best
+
+
+def compare_rules(base_rules, more_rules, texts, rounds, repeat=5):
+    """
+    Best rate with each set of rules, runs interleaved so that drift in
+    machine speed hits both alike.
+    """
+    best = {}
+    for _ in range(repeat):
+        for rules in (base_rules, more_rules):
+            courts.RULES = rules
+            best[id(rules)] = max(best.get(id(rules), 0.0), docs_per_second(extract_fields, texts, rounds, 1))
+    courts.RULES = more_rules
+    return best[id(base_rules)], best[id(more_rules)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--orders", type=int, default=20, help="Synthetic order PDFs to add to the texts")
+    parser.add_argument("--update", action="store_true", help="Rewrite the expected fields")
+    parser.add_argument("--courts", default="50,200,1000",
+                        help="Synthetic court counts for the scaling run, comma separated ('' to skip)")
+    parser.add_argument("--min-ratio", type=float, default=0.8,
+                        help="Fail when a scaling run is slower than this fraction of the 2-court rate")
+    args = parser.parse_args()
+
+    with open(GOLDEN) as f:
+        corpus = json.load(f)
+
+    failures = check_golden(corpus, args.update)
+    if args.update:
+        with open(GOLDEN, "w") as f:
+            json.dump(corpus, f, indent=2)
+            f.write("\n")
+        print("updated %d golden documents" % len(corpus))
+    else:
+        print("golden corpus: %d documents, %d mismatches" % (len(corpus), failures))
+
+    texts = [doc["text"] for doc in corpus if "text" in doc]
+    texts += [extract_text_from_pdf(os.path.join(ROOT, doc["pdf"])) for doc in corpus if "pdf" in doc]
+    folder = tempfile.mkdtemp()
+    texts += [extract_text_from_pdf(p) for p in dataset.order_pdfs(folder, args.orders)]
+    texts = [t for t in texts if t]
+
+    chars = sum(len(t) for t in texts) / len(texts)
+    legacy = docs_per_second(legacy_fields, texts, args.rounds)
+    engine = docs_per_second(extract_fields, texts, args.rounds)
+
+    print("%d texts, %.0f chars on average, %d rounds" % (len(texts), chars, args.rounds))
+    print("detect_* chain    %8.0f docs/s" % legacy)
+    print("field engine      %8.0f docs/s   (%.1fx)" % (engine, engine / legacy))
+
+    base_courts = len(courts.PROFILES)
+    base_rules = courts.RULES
+    added = 0
+    for count in sorted(int(c) for c in args.courts.split(",") if c.strip()):
+        t0 = time.perf_counter()
+        courts.register_all(synthetic_court(i) for i in range(added, count))
+        compile_s = time.perf_counter() - t0
+        added = count
+
+        base, more = compare_rules(base_rules, courts.RULES, texts, args.rounds)
+        ratio = more / base
+        print("  +%-4d courts      %8.0f docs/s   (%.2fx of %d courts, compiled in %.2fs)" % (
+            count, more, ratio, base_courts, compile_s
+        ))
+        if ratio < args.min_ratio:
+            print("SLOWDOWN: +%d courts runs at %.2fx, below --min-ratio %.2f" % (count, ratio, args.min_ratio))
+            failures += 1
+        if not args.update:
+            failures += check_golden(corpus, False)
+
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Notes lookups on a synthetic 1M-note database: the old unindexed
+"every note of the case" query against the paginated one on
+idx_notes_case (case_id, id), for a quiet case and a busy one.
+
+    python benchmarks/bench_notes.py --notes 1000000 --cases 20000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db
+
+BUSY_CASE = 1
+BUSY_NOTES = 5000
+PAGE = 20
+
+
+def seed(conn, notes, cases):
+    conn.execute("""
+        CREATE TABLE notes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            case_id INTEGER,
+            note TEXT,
+            created_at TEXT
+        )
+    """)
+
+    rnd = random.Random(7)
+
+    def rows():
+        for i in range(notes):
+            case_id = BUSY_CASE if i < BUSY_NOTES else rnd.randint(2, cases)
+            yield (case_id, f"Adjourned, next date to be fixed. Note {i}", "2026-01-20 10:00:00")
+
+    conn.executemany("INSERT INTO notes (case_id, note, created_at) VALUES (?, ?, ?)", rows())
+    conn.commit()
+
+
+def timed(conn, sql, params, runs):
+    times = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        rows = conn.execute(sql, params).fetchall()
+        times.append((time.perf_counter() - t0) * 1000)
+    times.sort()
+    return times[len(times) // 2], len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--notes", type=int, default=1000000)
+    parser.add_argument("--cases", type=int, default=20000)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "notes.db")
+    conn = db.connect(path)
+
+    t0 = time.perf_counter()
+    seed(conn, args.notes, args.cases)
+    print("seeded %d notes over %d cases in %.1fs" % (args.notes, args.cases, time.perf_counter() - t0))
+
+    quiet_case = args.cases // 2
+    all_notes = "SELECT note, created_at FROM notes WHERE case_id=? ORDER BY id DESC"
+    page = "SELECT id, note, created_at FROM notes WHERE case_id=? ORDER BY id DESC LIMIT ?"
+
+    for label, case_id in (("quiet case", quiet_case), ("busy case", BUSY_CASE)):
+        ms, n = timed(conn, all_notes, (case_id,), max(3, args.runs // 5))
+        print("no index, all notes    %-10s p50 %8.2f ms  rows %d" % (label, ms, n))
+
+    t0 = time.perf_counter()
+    conn.execute("CREATE INDEX idx_notes_case ON notes (case_id, id)")
+    print("built idx_notes_case in %.1fs" % (time.perf_counter() - t0))
+
+    for label, case_id in (("quiet case", quiet_case), ("busy case", BUSY_CASE)):
+        ms, n = timed(conn, all_notes, (case_id,), args.runs)
+        print("index, all notes       %-10s p50 %8.2f ms  rows %d" % (label, ms, n))
+        ms, n = timed(conn, page, (case_id, PAGE + 1), args.runs)
+        print("index, latest page     %-10s p50 %8.2f ms  rows %d" % (label, ms, n))
+
+    plan = conn.execute("EXPLAIN QUERY PLAN " + page, (BUSY_CASE, PAGE + 1)).fetchall()
+    print("plan:", "; ".join(r[-1] for r in plan))
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Render time and size of every report template, with the shared assets
+preloaded (as in the app) and, with --cold, rebuilding the stylesheet and
+logo before each render the way the per-request exports used to.
+
+    python benchmarks/bench_reports.py --runs 20 --cases 300
+"""
+import argparse
+import io
+import os
+import sqlite3
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import reports
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib.utils import ImageReader
+
+LOGO = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "static", "logo.png")
+
+
+def seed(n):
+    conn = sqlite3.connect(":memory:")
+    conn.execute("""
+        CREATE TABLE cases (id INTEGER PRIMARY KEY, client_name TEXT, case_title TEXT,
+                            case_number TEXT, case_year TEXT, case_type TEXT, court TEXT,
+                            hearing_date TEXT, status TEXT, document TEXT)
+    """)
+    conn.executemany(
+        "INSERT INTO cases VALUES (NULL, ?, ?, ?, ?, 'W.P.(C)', ?, '2026-01-20', 'Pending', '')",
+        ((f"Client {i % 20}", f"Client {i % 20} vs Union of India", str(i), "2025",
+          ("Delhi High Court", "Saket Court", "Dwarka District Court")[i % 3]) for i in range(n))
+    )
+    return conn
+
+
+def jobs(conn):
+    row = conn.execute("SELECT * FROM cases LIMIT 1").fetchone()
+    day = datetime(2026, 1, 20)
+
+    return {
+        "case": lambda: (row,),
+        "case_list": lambda: (conn.execute("""
+            SELECT id, client_name, case_title, case_number, case_year,
+                   case_type, court, hearing_date, status
+            FROM cases ORDER BY id DESC
+        """),),
+        "cause_list": lambda: (conn.execute("""
+            SELECT court, case_number, case_year, case_type, case_title, client_name, status
+            FROM cases WHERE hearing_date='2026-01-20' ORDER BY court, id
+        """), day),
+        "client_statement": lambda: (conn.execute("""
+            SELECT id, case_title, case_number, case_year, court, hearing_date, status
+            FROM cases WHERE client_name='Client 1' ORDER BY id DESC
+        """), "Client 1"),
+    }
+
+
+def cold_assets():
+    # what every export paid before the assets were shared
+    getSampleStyleSheet()
+    reader = ImageReader(LOGO)
+    reader.getRGBData()
+    reports._logo["reader"] = reader
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--cases", type=int, default=300)
+    parser.add_argument("--cold", action="store_true", help="also rebuild assets per render")
+    args = parser.parse_args()
+
+    conn = seed(args.cases)
+    modes = ["preloaded"] + (["cold"] if args.cold else [])
+
+    for mode in modes:
+        reports.preload(LOGO)
+        for name, make_args in jobs(conn).items():
+            times = []
+            for _ in range(args.runs):
+                out = io.BytesIO()
+                t0 = time.perf_counter()
+                if mode == "cold":
+                    cold_assets()
+                reports.render(name, out, *make_args())
+                times.append((time.perf_counter() - t0) * 1000)
+
+            times.sort()
+            print("%-10s %-17s p50 %7.1f ms  max %7.1f ms  %8.1f KB" % (
+                mode, name, times[len(times) // 2], times[-1], len(out.getvalue()) / 1024
+            ))
+
+
+if __name__ == "__main__":
+    main()
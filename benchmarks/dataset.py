@@ -0,0 +1,221 @@
+"""
+Synthetic large-firm dataset: a cases.db with clients, cases over the
+Delhi High Court case types, hearing dates and notes, plus Delhi High
+Court style order PDFs the detectors can read.
+
+The base tables are filled with executemany and the rest of the schema
+is built by the real migrations (hearings, full text index, counters,
+client links), so the result looks like an upgraded production file.
+
+    python -m benchmarks.dataset --cases 100000 --notes 1000000 --out big.db
+"""
+import argparse
+import logging
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+
+import db
+import migrations
+from courts import HC_CASE_TYPES
+
+SEED = 7
+COURTS = (
+    "Delhi High Court", "Delhi High Court", "Delhi High Court",
+    "Dwarka District Court", "Saket District Court", "Tis Hazari Court"
+)
+STATUSES = ("Pending", "Pending", "Active", "Closed")
+FIRST_NAMES = (
+    "Ram", "Sita", "Amit", "Priya", "Rahul", "Neha", "Vikram", "Anita", "Suresh", "Kavita",
+    "Arjun", "Pooja", "Manoj", "Sunita", "Rohit", "Deepa", "Sanjay", "Meena", "Ajay", "Rekha"
+)
+LAST_NAMES = (
+    "Kumar", "Sharma", "Verma", "Gupta", "Singh", "Yadav", "Jain", "Agarwal", "Mehta", "Malhotra",
+    "Chopra", "Kapoor", "Bansal", "Arora", "Saxena", "Khanna", "Bhatia", "Sethi", "Goel", "Mittal"
+)
+RESPONDENTS = (
+    "UNION OF INDIA", "STATE (NCT OF DELHI)", "DELHI DEVELOPMENT AUTHORITY",
+    "MUNICIPAL CORPORATION OF DELHI", "GNCTD", "DELHI JAL BOARD"
+)
+NOTE_TEXTS = (
+    "Adjourned at the request of the respondent.",
+    "Reply filed, rejoinder to be filed within two weeks.",
+    "Client informed about the next date.",
+    "Arguments heard in part.",
+    "Documents collected from the client.",
+    "Matter not reached, renotified."
+)
+FILLER = (
+    "Learned counsel for the petitioner submits that the impugned order has been passed "
+    "without affording an opportunity of hearing. Issue notice. Counter affidavit be filed "
+    "within four weeks. Rejoinder thereto, if any, be filed within two weeks thereafter."
+)
+
+# hearing dates spread over the year around "today"
+HEARING_WINDOW_DAYS = 365
+
+
+def client_names(count, rnd):
+    names = set()
+    while len(names) < count:
+        names.add(f"{rnd.choice(FIRST_NAMES)} {rnd.choice(LAST_NAMES)} {len(names) + 1}")
+    return sorted(names)
+
+
+def case_rows(cases, clients, rnd, today):
+    for i in range(cases):
+        client = rnd.choice(clients)
+        case_type = rnd.choice(HC_CASE_TYPES)
+        hearing = today + timedelta(days=rnd.randint(-HEARING_WINDOW_DAYS // 2, HEARING_WINDOW_DAYS // 2))
+        yield (
+            client,
+            f"{client.upper()} vs {rnd.choice(RESPONDENTS)}",
+            str(1000 + i),
+            str(rnd.randint(2015, today.year)),
+            case_type,
+            rnd.choice(COURTS),
+            hearing.isoformat() if rnd.random() > 0.05 else "",
+            rnd.choice(STATUSES),
+            ""
+        )
+
+
+def note_rows(notes, cases, rnd):
+    # a few busy matters, a long tail of quiet ones
+    for i in range(notes):
+        case_id = rnd.randint(1, min(cases, 50)) if rnd.random() < 0.05 else rnd.randint(1, cases)
+        yield (case_id, f"{rnd.choice(NOTE_TEXTS)} ({i})", "2026-01-20 10:00:00")
+
+
+def generate(path, cases=100000, notes=1000000, clients=20000, seed=SEED, log=print):
+    """
+    Writes a migrated cases.db at path. Returns the generation time (s).
+    """
+    rnd = random.Random(seed)
+    today = date.today()
+    t0 = time.perf_counter()
+
+    if os.path.exists(path):
+        os.remove(path)
+    conn = db.connect(path)
+    cursor = conn.cursor()
+    migrations.create_base_tables(cursor)
+
+    names = client_names(clients, rnd)
+    cursor.executemany(
+        "INSERT INTO clients (name, phone, email, address, created_at) VALUES (?, ?, ?, ?, datetime('now'))",
+        [(n, f"98{rnd.randint(10000000, 99999999)}", "", "New Delhi") for n in names]
+    )
+    cursor.executemany("""
+        INSERT INTO cases (
+            client_name, case_title, case_number, case_year,
+            case_type, court, hearing_date, status, document
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, case_rows(cases, names, rnd, today))
+    cursor.executemany(
+        "INSERT INTO notes (case_id, note, created_at) VALUES (?, ?, ?)",
+        note_rows(notes, cases, rnd)
+    )
+    conn.commit()
+    log("base rows: %d clients, %d cases, %d notes in %.1fs" % (clients, cases, notes, time.perf_counter() - t0))
+
+    # hearings, FTS, counters, client links... built from the rows above
+    migrations.migrate(conn, log=log)
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.close()
+
+    return time.perf_counter() - t0
+
+
+# ---------------- ORDER PDFS ----------------
+def order_pdf(path, case_type, number, year, petitioner, next_date, pages=2):
+    """
+    A Delhi High Court style order: court, case reference and parties on
+    page one, filler pages, "List on dd.mm.yyyy" at the end.
+    """
+    c = canvas.Canvas(path, pagesize=A4)
+    width, height = A4
+
+    def lines(rows):
+        y = height - 72
+        for row in rows:
+            c.drawString(72, y, row)
+            y -= 16
+
+    for page in range(pages):
+        rows = []
+        if page == 0:
+            rows += [
+                "IN THE HIGH COURT OF DELHI AT NEW DELHI",
+                f"{case_type} {number}/{year}",
+                f"{petitioner.upper()} .....Petitioner",
+                "versus",
+                f"{RESPONDENTS[int(number) % len(RESPONDENTS)]} .....Respondent",
+                "CORAM: HON'BLE MR. JUSTICE A. B. SINGH",
+                "ORDER",
+            ]
+        rows += [FILLER[i:i + 90] for i in range(0, len(FILLER), 90)] * 4
+        if page == pages - 1:
+            rows.append(f"List on {next_date.strftime('%d.%m.%Y')}.")
+        lines(rows)
+        c.showPage()
+
+    c.save()
+
+
+def order_pdfs(folder, count, seed=SEED, pages=2):
+    """
+    count distinct order PDFs in folder. Returns their paths.
+    """
+    rnd = random.Random(seed)
+    os.makedirs(folder, exist_ok=True)
+    today = date.today()
+
+    paths = []
+    for i in range(count):
+        path = os.path.join(folder, f"order_{i}.pdf")
+        order_pdf(
+            path,
+            rnd.choice(("W.P.(C)", "CRL.M.C.", "CS(COMM)", "FAO", "RFA")),
+            str(50000 + i),
+            str(rnd.randint(2018, today.year)),
+            f"{rnd.choice(FIRST_NAMES)} {rnd.choice(LAST_NAMES)}",
+            today + timedelta(days=rnd.randint(7, 120)),
+            pages
+        )
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cases", type=int, default=100000)
+    parser.add_argument("--notes", type=int, default=1000000)
+    parser.add_argument("--clients", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--out", default="bench_cases.db")
+    parser.add_argument("--pdfs", type=int, default=0, help="Also write this many order PDFs")
+    parser.add_argument("--pdf-dir", default="bench_pdfs")
+    args = parser.parse_args()
+
+    # bulk loading is slow by design, not worth a slow query warning each
+    logging.getLogger("db").setLevel(logging.ERROR)
+
+    seconds = generate(args.out, args.cases, args.notes, args.clients, args.seed)
+    print("wrote %s in %.1fs" % (args.out, seconds))
+
+    if args.pdfs:
+        order_pdfs(args.pdf_dir, args.pdfs, args.seed)
+        print("wrote %d order PDFs to %s" % (args.pdfs, args.pdf_dir))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+"""
+End-to-end benchmark over a synthetic large firm (see dataset.py):
+drives the Flask app through its test client and reports per-route
+throughput, p50/p95/p99 latency and peak RSS as JSON.
+
+    python -m benchmarks.suite --out results.json
+    python -m benchmarks.suite --baseline results.json   # exit 1 on regression
+
+The generated database is kept in --data-dir and reused by later runs
+with the same size and seed; every run works on a fresh copy of it.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import resource
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks import dataset
+
+SEARCH_TERMS = ("kumar", "sharma", "union", "W.P.(C)", "adjourned", "rejoinder", "delhi", "arb")
+JOB_TIMEOUT = 120  # seconds to wait for an uploaded PDF to be processed
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    k = min(len(values) - 1, int(round(pct / 100.0 * (len(values) - 1))))
+    return values[k]
+
+
+def summarize(values, errors, wall):
+    return {
+        "n": len(values),
+        "errors": errors,
+        "throughput_rps": round(len(values) / wall, 1) if wall else 0.0,
+        "p50_ms": round(percentile(values, 50) * 1000, 2),
+        "p95_ms": round(percentile(values, 95) * 1000, 2),
+        "p99_ms": round(percentile(values, 99) * 1000, 2),
+        "max_ms": round(max(values) * 1000, 2) if values else 0.0
+    }
+
+
+def peak_rss_mb():
+    # ru_maxrss is KB on Linux; children covers PDF worker processes
+    # that have already exited
+    return {
+        "self": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "children": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1)
+    }
+
+
+# ---------------- DATASET ----------------
+def prepare_dataset(args):
+    """
+    Path of a fresh working copy of the dataset, generated if needed.
+    """
+    os.makedirs(args.data_dir, exist_ok=True)
+    name = f"cases_{args.cases}_{args.notes}_{args.clients}_{args.seed}.db"
+    cached = os.path.join(args.data_dir, name)
+
+    generated_s = None
+    if not os.path.exists(cached):
+        generated_s = dataset.generate(cached, args.cases, args.notes, args.clients, args.seed, log=lambda *_: None)
+
+    work = tempfile.mkdtemp(prefix="lawery_bench_")
+    path = os.path.join(work, "cases.db")
+    shutil.copyfile(cached, path)
+
+    pdfs = dataset.order_pdfs(os.path.join(work, "orders"), args.pdfs, args.seed)
+    return work, path, pdfs, generated_s
+
+
+# ---------------- SCENARIOS ----------------
+def timed_requests(name, results, n, request):
+    """
+    Calls request(i) n times; a status >= 400 counts as an error.
+    """
+    times = []
+    errors = 0
+    t_start = time.perf_counter()
+    for i in range(n):
+        t0 = time.perf_counter()
+        response = request(i)
+        times.append(time.perf_counter() - t0)
+        if response.status_code >= 400:
+            errors += 1
+        response.close()
+    results[name] = summarize(times, errors, time.perf_counter() - t_start)
+
+
+def run_scenarios(client, args, cases, pdfs):
+    rnd = random.Random(args.seed)
+    today = date.today()
+    results = {}
+    n = args.requests
+
+    cursors = {}
+
+    def get_cases(i):
+        # walk a few pages, then start again from the top with a filter
+        params = {"limit": 50}
+        if i % 4 == 0:
+            params["status"] = "Pending"
+        if cursors.get(i % 4):
+            params["cursor"] = cursors[i % 4]
+        response = client.get("/get_cases", query_string=params)
+        cursors[i % 4] = (response.get_json() or {}).get("next_cursor") if i % 20 else None
+        return response
+
+    timed_requests("/get_cases", results, n, get_cases)
+
+    timed_requests("/search_any", results, n, lambda i: client.get(
+        "/search_any/" + rnd.choice(SEARCH_TERMS), query_string={"limit": 50}
+    ))
+
+    def calendar(i):
+        start = today + timedelta(days=rnd.randint(-60, 60))
+        return client.get("/calendar_events", query_string={
+            "start": start.isoformat(),
+            "end": (start + timedelta(days=35)).isoformat()
+        })
+
+    timed_requests("/calendar_events", results, n, calendar)
+
+    timed_requests("/export_case_pdf", results, n, lambda i: client.get(
+        f"/export_case_pdf/{rnd.randint(1, cases)}"
+    ))
+
+    timed_requests("/export_pdf", results, args.export_runs, lambda i: client.get("/export_pdf"))
+
+    # uploads return 202 at once; the job time is upload -> case written
+    jobs = []
+
+    def upload(i):
+        with open(pdfs[i], "rb") as f:
+            response = client.post("/add_case_pdf", data={"file": (f, os.path.basename(pdfs[i]))})
+        jobs.append((time.perf_counter(), response.get_json()["job_id"]))
+        return response
+
+    timed_requests("/add_case_pdf", results, len(pdfs), upload)
+    results["pdf_job_done"] = wait_for_jobs(client, jobs)
+
+    return results
+
+
+def wait_for_jobs(client, jobs):
+    times = []
+    errors = 0
+    t_start = time.perf_counter()
+    pending = dict((job_id, started) for started, job_id in jobs)
+
+    while pending and time.perf_counter() - t_start < JOB_TIMEOUT:
+        for job_id, started in list(pending.items()):
+            status = client.get(f"/pdf_jobs/{job_id}").get_json()["status"]
+            if status in ("done", "failed"):
+                times.append(time.perf_counter() - started)
+                errors += status == "failed"
+                del pending[job_id]
+        time.sleep(0.05)
+
+    errors += len(pending)
+    return summarize(times, errors, time.perf_counter() - min((s for s, _ in jobs), default=t_start))
+
+
+# ---------------- REGRESSIONS ----------------
+def regressions(results, baseline, tolerance):
+    """
+    Routes whose p95 grew by more than tolerance (a fraction) over the
+    baseline run, or which started failing.
+    """
+    found = []
+    for route, now in results["routes"].items():
+        before = baseline.get("routes", {}).get(route)
+        if not before:
+            continue
+        if now["errors"] > before["errors"]:
+            found.append(f"{route}: errors {before['errors']} -> {now['errors']}")
+        if before["p95_ms"] and now["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+            found.append(f"{route}: p95 {before['p95_ms']}ms -> {now['p95_ms']}ms")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cases", type=int, default=100000)
+    parser.add_argument("--notes", type=int, default=1000000)
+    parser.add_argument("--clients", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=dataset.SEED)
+    parser.add_argument("--requests", type=int, default=200, help="Requests per read route")
+    parser.add_argument("--export-runs", type=int, default=3, help="Full /export_pdf runs")
+    parser.add_argument("--pdfs", type=int, default=20, help="Order PDFs to upload")
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "lawery_bench_data"))
+    parser.add_argument("--out", help="Write the JSON results here as well")
+    parser.add_argument("--baseline", help="Earlier results to compare p95 and errors against")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+    out = os.path.abspath(args.out) if args.out else None
+    baseline = os.path.abspath(args.baseline) if args.baseline else None
+
+    work, db_path, pdfs, generated_s = prepare_dataset(args)
+
+    # the app keeps uploads/ and cache/ relative to the working directory
+    os.chdir(work)
+    os.symlink(os.path.join(ROOT, "static"), os.path.join(work, "static"))
+    dataset.db.DB_PATH = db_path
+    logging.getLogger("db").setLevel(logging.ERROR)
+
+    started = time.perf_counter()
+    import app as app_module
+    import_s = time.perf_counter() - started
+
+    client = app_module.app.test_client()
+    with client.session_transaction() as s:
+        s["logged_in"] = True
+
+    routes = run_scenarios(client, args, args.cases, pdfs)
+
+    results = {
+        "meta": {
+            "cases": args.cases,
+            "notes": args.notes,
+            "clients": args.clients,
+            "seed": args.seed,
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "run_at": time.strftime("%Y-%m-%dT%H:%M:%S")
+        },
+        "dataset_generate_s": round(generated_s, 1) if generated_s is not None else None,
+        "app_import_s": round(import_s, 2),
+        "routes": routes,
+        "peak_rss_mb": peak_rss_mb()
+    }
+
+    text = json.dumps(results, indent=2)
+    print(text)
+    if out:
+        with open(out, "w") as f:
+            f.write(text + "\n")
+
+    shutil.rmtree(work, ignore_errors=True)
+
+    if baseline:
+        with open(baseline) as f:
+            found = regressions(results, json.load(f), args.tolerance)
+        for line in found:
+            print("REGRESSION " + line, file=sys.stderr)
+        if found:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+import json
+import os
+import time
+import zipfile
+
+from werkzeug.utils import secure_filename
+
+import clients
+import documents
+import hearings
+import jobs
+import text_cache
+from pdf_helpers import analyse_pdf, needs_ocr
+
+
+# =========================================================
+#                  BULK PDF IMPORT
+# =========================================================
+# Many PDFs (or a zip of them) at once. Cases already on file (same case
+# number + year) are skipped.
+#
+# /bulk_import stores the files and queues them as one batch of "import"
+# jobs in pdf_jobs: the request returns at once and the dispatcher works
+# through the batch (batch_status() reports progress). The CLI imports
+# synchronously with import_pdfs(): extraction across a process pool
+# (scans then go through the OCR pool), new cases written in batched
+# transactions.
+
+BATCH_SIZE = 200
+MAX_ZIP_MEMBER_BYTES = 50 * 1024 * 1024
+
+
+def init_batch_table(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS pdf_batches (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            created_at REAL,
+            skipped TEXT
+        )
+    """)
+
+    cursor.execute("PRAGMA table_info(pdf_jobs)")
+    if "batch_id" not in [c[1] for c in cursor.fetchall()]:
+        cursor.execute("ALTER TABLE pdf_jobs ADD COLUMN batch_id INTEGER")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_pdf_jobs_batch ON pdf_jobs (batch_id, id)")
+
+
+def save_zip_pdfs(zip_file):
+    """
+    Stores every PDF inside the zip in the document store.
+    Returns (filename, sha256, size) per PDF.
+    """
+    saved = []
+    with zipfile.ZipFile(zip_file) as z:
+        for info in z.infolist():
+            name = secure_filename(os.path.basename(info.filename))
+            if info.is_dir() or not name.lower().endswith(".pdf"):
+                continue
+            if info.file_size > MAX_ZIP_MEMBER_BYTES:
+                continue
+
+            with z.open(info) as src:
+                sha256, size = documents.save(src)
+            saved.append((name, sha256, size))
+    return saved
+
+
+def _existing_cases(cursor, keys):
+    """
+    Which of the (case_number, case_year) pairs are already in cases.
+    """
+    found = set()
+    for number, year in keys:
+        cursor.execute(
+            "SELECT 1 FROM cases WHERE case_number=? AND case_year=? LIMIT 1",
+            (number, year)
+        )
+        if cursor.fetchone():
+            found.add((number, year))
+    return found
+
+
+def _write_batch(conn, batch):
+    """
+    batch: list of (report entry, analysis). Inserts the new cases with
+    executemany in one transaction and fills in case ids / duplicates.
+    """
+    cursor = conn.cursor()
+
+    # fresh extractions go into the text cache in the same transaction
+    for entry, found in batch:
+        sha256 = entry.pop("_sha256", None)
+        if sha256:
+            text_cache.store(cursor, sha256, found)
+
+    stored = {id(entry): entry.pop("_document") for entry, _ in batch}
+
+    keys = {(f["case_number"], f["case_year"]) for _, f in batch if f["case_number"] and f["case_year"]}
+    seen = _existing_cases(cursor, keys)
+
+    rows = []
+    texts = []
+    entries = []
+    founds = []
+    for entry, found in batch:
+        key = (found["case_number"], found["case_year"])
+        if found["case_number"] and found["case_year"]:
+            if key in seen:
+                entry["status"] = "duplicate"
+                continue
+            seen.add(key)
+
+        rows.append((
+            found["client_name"] or "PDF Client",
+            found["case_title"] or "Case From PDF",
+            found["case_number"],
+            found["case_year"],
+            found["case_type"],
+            found["court"],
+            found["next_date"],
+            "Pending",
+            entry["file"],
+            clients.ensure(cursor, found["client_name"])
+        ))
+        texts.append(found["text"])
+        entries.append(entry)
+        founds.append(found)
+
+    if rows:
+        cursor.executemany("""
+            INSERT INTO cases (
+                client_name, case_title, case_number, case_year,
+                case_type, court, hearing_date, status, document, client_id
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, rows)
+
+        # we hold the write lock, so AUTOINCREMENT handed out a contiguous range
+        cursor.execute("SELECT seq FROM sqlite_sequence WHERE name='cases'")
+        last_id = cursor.fetchone()[0]
+        first_id = last_id - len(rows) + 1
+
+        cursor.executemany(
+            "INSERT OR REPLACE INTO case_text (case_id, text) VALUES (?, ?)",
+            [(first_id + i, text) for i, text in enumerate(texts)]
+        )
+
+        hearings.record_many(cursor, [
+            (first_id + i, row[6], row[8]) for i, row in enumerate(rows)
+        ])
+
+        documents.attach_many(cursor, [
+            (first_id + i, *stored[id(entry)]) for i, entry in enumerate(entries)
+        ])
+
+        for i, entry in enumerate(entries):
+            entry["status"] = "created"
+            entry["case_id"] = first_id + i
+            sha256, name, _ = stored[id(entry)]
+            jobs.queue_full_text(cursor, entry["case_id"], name, sha256, founds[i])
+
+    conn.commit()
+
+
+def import_pdfs(conn, files, workers=None):
+    """
+    files: (filename, sha256, size) of PDFs already in the document
+    store. Analyses each and creates the cases, all before returning
+    (the CLI; the web route queues a batch instead).
+    Returns one report entry per file, in the order given.
+    """
+    report = []
+    batch = []
+    cursor = conn.cursor()
+
+    with jobs.make_pool(workers) as pool, jobs.make_ocr_pool() as ocr_pool:
+        # files seen before come from the text cache, the rest go to the pool
+        work = []
+        for name, sha256, size in files:
+            cached = text_cache.lookup(cursor, sha256)
+            pending = cached or pool.submit(analyse_pdf, documents.blob_path(sha256))
+            work.append((name, sha256, size, pending))
+        conn.commit()
+
+        # scans found by the text pass go on to the OCR pool
+        for i, (name, sha256, size, pending) in enumerate(work):
+            if isinstance(pending, dict) or pending.exception():
+                continue
+            if needs_ocr(pending.result()):
+                work[i] = (name, sha256, size, ocr_pool.submit(analyse_pdf, documents.blob_path(sha256), True))
+
+        for name, sha256, size, pending in work:
+            entry = {"file": name}
+            report.append(entry)
+            if isinstance(pending, dict):
+                found = pending
+            else:
+                try:
+                    found = pending.result()
+                except Exception as e:
+                    entry["status"] = "error"
+                    entry["error"] = str(e)
+                    continue
+                entry["_sha256"] = sha256
+
+            entry.update({
+                "case_number": found["case_full"],
+                "court": found["court"],
+                "case_type": found["case_type"],
+                "next_date": found["next_date"]
+            })
+            jobs.observe_analysis(found)
+            entry["_document"] = (sha256, name, size)
+            batch.append((entry, found))
+
+            if len(batch) >= BATCH_SIZE:
+                _write_batch(conn, batch)
+                batch = []
+
+    if batch:
+        _write_batch(conn, batch)
+
+    return report
+
+
+def enqueue_batch(conn, files, skipped=()):
+    """
+    files: (filename, sha256, size) of PDFs already in the document
+    store. Queues an import job for each. Returns the batch id.
+    """
+    cursor = conn.cursor()
+    cursor.execute(
+        "INSERT INTO pdf_batches (created_at, skipped) VALUES (?, ?)",
+        (time.time(), json.dumps(list(skipped)))
+    )
+    batch_id = cursor.lastrowid
+
+    jobs.enqueue_many(conn, "import", [(name, sha256) for name, sha256, _ in files], batch_id)
+    return batch_id
+
+
+def batch_status(conn, batch_id):
+    """
+    The report of a queued batch so far, in the import_pdfs() format;
+    files still queued or running are "pending". None for an unknown id.
+    """
+    cursor = conn.cursor()
+    cursor.execute("SELECT skipped FROM pdf_batches WHERE id=?", (batch_id,))
+    row = cursor.fetchone()
+    if not row:
+        return None
+    skipped = json.loads(row[0])
+
+    cursor.execute("""
+        SELECT id, filename, status, error, result
+        FROM pdf_jobs
+        WHERE batch_id=?
+        ORDER BY id
+    """, (batch_id,))
+
+    report = []
+    for job_id, filename, status, error, result in cursor.fetchall():
+        entry = {"file": filename, "job_id": job_id}
+        if status == "done":
+            result = json.loads(result)
+            entry.update({
+                "status": result["status"],
+                "case_id": result["case_id"],
+                "case_number": result["case_number_detected"],
+                "court": result["court_detected"],
+                "case_type": result["case_type_detected"],
+                "next_date": result["next_date_detected"]
+            })
+        elif status == "failed":
+            entry["status"] = "error"
+            entry["error"] = error
+        else:
+            entry["status"] = "pending"
+        report.append(entry)
+
+    summary = summarize(report)
+    summary["finished"] = summary["pending"] == 0
+
+    return {"batch_id": batch_id, "summary": summary, "files": report, "skipped": skipped}
+
+
+def summarize(report):
+    summary = {"files": len(report), "created": 0, "duplicate": 0, "error": 0, "pending": 0}
+    for entry in report:
+        summary[entry["status"]] += 1
+    return summary
@@ -0,0 +1,235 @@
+import json
+import os
+import time
+from datetime import datetime, timedelta
+
+import reports
+
+
+# =========================================================
+#              DAILY CAUSE LIST SNAPSHOTS
+# =========================================================
+# One row per day in cause_lists holding that day's list, grouped by
+# court, as ready-to-send JSON, plus a pre-rendered PDF in CACHE_DIR.
+# build-cause-lists (cron, every morning) materializes today and the
+# week ahead; reads are a primary key lookup.
+#
+# Triggers mark a day stale when its hearings or one of its cases
+# change. From today on a day only lists cases whose hearing_date is
+# still that day, so a case moved elsewhere drops off even if a stray
+# hearings row is left. A stale or missing day is rebuilt on the next read, so a
+# snapshot is never served out of date. Only days in the window (today
+# and the WEEK_DAYS ahead) or already materialized are stored; any other
+# day is built on the fly, so reads of arbitrary dates never add rows.
+
+CACHE_DIR = os.path.join("cache", "cause_lists")
+WEEK_DAYS = 7
+
+# fields of each case in a snapshot, also the dashboard's today list
+ENTRY_FIELDS = (
+    "id", "client_name", "case_title", "case_number", "case_year",
+    "case_type", "court", "hearing_date", "status"
+)
+
+# case columns the list depends on; a change to any of them stales the day
+LISTED_COLUMNS = "client_name, case_title, case_number, case_year, case_type, court, hearing_date, status"
+
+
+def init_cause_list_table(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS cause_lists (
+            day TEXT PRIMARY KEY,
+            data TEXT NOT NULL,
+            total INTEGER NOT NULL,
+            built_at REAL NOT NULL,
+            stale INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS hearings_cause_list_ai AFTER INSERT ON hearings BEGIN
+            UPDATE cause_lists SET stale = 1 WHERE day = new.date;
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS hearings_cause_list_ad AFTER DELETE ON hearings BEGIN
+            UPDATE cause_lists SET stale = 1 WHERE day = old.date;
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS cases_cause_list_au AFTER UPDATE OF {LISTED_COLUMNS} ON cases BEGIN
+            UPDATE cause_lists SET stale = 1
+            WHERE day IN (SELECT date FROM hearings WHERE case_id = new.id);
+        END
+    """)
+
+
+def check_hearing_dates(cursor):
+    """
+    Rebuilds the cases trigger with hearing_date among LISTED_COLUMNS and
+    stales the days from today on, built before compose() checked it.
+    """
+    cursor.execute("DROP TRIGGER IF EXISTS cases_cause_list_au")
+    init_cause_list_table(cursor)
+    cursor.execute("UPDATE cause_lists SET stale = 1 WHERE day >= ?", (datetime.now().strftime("%Y-%m-%d"),))
+
+
+def pdf_path(day):
+    return os.path.abspath(os.path.join(CACHE_DIR, f"cause_list_{day}.pdf"))
+
+
+def in_window(day):
+    """
+    Whether day (YYYY-MM-DD) is today or one of the WEEK_DAYS ahead.
+    """
+    today = datetime.now()
+    end = today + timedelta(days=WEEK_DAYS - 1)
+    return today.strftime("%Y-%m-%d") <= day <= end.strftime("%Y-%m-%d")
+
+
+def kept(conn, day):
+    """
+    Whether day's snapshot is (or gets) stored.
+    """
+    if in_window(day):
+        return True
+    cursor = conn.cursor()
+    cursor.execute("SELECT 1 FROM cause_lists WHERE day=?", (day,))
+    return cursor.fetchone() is not None
+
+
+def compose(cursor, day):
+    """
+    day's list from the hearings table, as JSON text (nothing stored).
+    Past days list every hearing; from today on only cases still set
+    for that day.
+    """
+    cursor.execute("""
+        SELECT c.id, c.client_name, c.case_title, c.case_number, c.case_year,
+               c.case_type, c.court, h.date, c.status
+        FROM hearings h
+        JOIN cases c ON c.id = h.case_id
+        WHERE h.date = ? AND (h.date < ? OR c.hearing_date = h.date)
+        ORDER BY c.court, c.id
+    """, (day, datetime.now().strftime("%Y-%m-%d")))
+    rows = cursor.fetchall()
+
+    courts = []
+    for r in rows:
+        court = r[6] or ""
+        if not courts or courts[-1]["court"] != court:
+            courts.append({"court": court, "cases": []})
+        courts[-1]["cases"].append(dict(zip(ENTRY_FIELDS, r)))
+
+    return json.dumps({"date": day, "total": len(rows), "built_at": time.time(), "courts": courts})
+
+
+def build(conn, day):
+    """
+    Materializes day (YYYY-MM-DD) from the hearings table and commits.
+    Returns the snapshot JSON text.
+    """
+    cursor = conn.cursor()
+    data = compose(cursor, day)
+    parsed = json.loads(data)
+
+    cursor.execute("""
+        INSERT OR REPLACE INTO cause_lists (day, data, total, built_at, stale)
+        VALUES (?, ?, ?, ?, 0)
+    """, (day, data, parsed["total"], parsed["built_at"]))
+    conn.commit()
+
+    # the old PDF no longer matches
+    try:
+        os.remove(pdf_path(day))
+    except OSError:
+        pass
+
+    return data
+
+
+def get(conn, day):
+    """
+    The day's snapshot JSON text, rebuilt first if missing or stale.
+    Days outside the window that were never materialized are built
+    without being stored.
+    """
+    cursor = conn.cursor()
+    cursor.execute("SELECT data, stale FROM cause_lists WHERE day=?", (day,))
+    row = cursor.fetchone()
+
+    if row and not row[1]:
+        return row[0]
+    if row or in_window(day):
+        return build(conn, day)
+    return compose(cursor, day)
+
+
+def get_pdf(conn, day):
+    """
+    Path of the day's rendered PDF and the build time of the snapshot
+    it shows. Only for kept() days; render_pdf() the others.
+    """
+    snapshot = json.loads(get(conn, day))
+    path = pdf_path(day)
+
+    if not os.path.exists(path):
+        render_pdf(snapshot, path)
+
+    return path, snapshot["built_at"]
+
+
+def render_pdf(snapshot, out):
+    """
+    Renders a snapshot into out, a path in CACHE_DIR or a file object.
+    """
+    rows = (
+        (e["court"], e["case_number"], e["case_year"], e["case_type"],
+         e["case_title"], e["client_name"], e["status"])
+        for group in snapshot["courts"]
+        for e in group["cases"]
+    )
+    day = datetime.strptime(snapshot["date"], "%Y-%m-%d")
+
+    if not isinstance(out, str):
+        reports.render("cause_list", out, rows, day)
+        return
+
+    # render to a temp name so a half written file is never served
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp = f"{out}.{os.getpid()}.tmp"
+    reports.render("cause_list", tmp, rows, day)
+    os.replace(tmp, out)
+
+
+def materialize(conn, start, days=WEEK_DAYS, pdf=True):
+    """
+    Rebuilds start and the following days (start is a datetime).
+    Returns {day: number of hearings}.
+    """
+    built = {}
+    for i in range(days):
+        day = (start + timedelta(days=i)).strftime("%Y-%m-%d")
+        data = build(conn, day)
+        snapshot = json.loads(data)
+        if pdf:
+            render_pdf(snapshot, pdf_path(day))
+        built[day] = snapshot["total"]
+    return built
+
+
+def prune(conn, before):
+    """
+    Drops snapshots (and PDFs) for days before before (YYYY-MM-DD).
+    """
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM cause_lists WHERE day < ? RETURNING day", (before,))
+    days = [r[0] for r in cursor.fetchall()]
+    conn.commit()
+
+    for day in days:
+        try:
+            os.remove(pdf_path(day))
+        except OSError:
+            pass
+    return len(days)
@@ -0,0 +1,130 @@
+import re
+
+
+# =========================================================
+#                 CLIENTS AND CASE LINKING
+# =========================================================
+# cases.client_id points at clients.id. Clients are matched on name_key
+# (the name lowercased with whitespace collapsed), so "Ram  Kumar" and
+# "ram kumar" are one client. Every path that writes a case links it
+# through ensure(); backfill() links rows from before client_id existed.
+
+BACKFILL_BATCH = 1000
+
+# names the PDF import uses when it could not find the real client
+PLACEHOLDER_NAMES = {"pdf client"}
+
+
+def name_key(name):
+    return re.sub(r"\s+", " ", (name or "").strip()).lower()
+
+
+def init_clients_table(cursor):
+    cursor.execute("PRAGMA table_info(clients)")
+    client_cols = [c[1] for c in cursor.fetchall()]
+
+    if "name_key" not in client_cols:
+        cursor.execute("ALTER TABLE clients ADD COLUMN name_key TEXT")
+        cursor.execute("SELECT id, name FROM clients")
+        cursor.executemany(
+            "UPDATE clients SET name_key=? WHERE id=?",
+            [(name_key(name), client_id) for client_id, name in cursor.fetchall()]
+        )
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_clients_name_key ON clients (name_key)")
+
+    cursor.execute("PRAGMA table_info(cases)")
+    case_cols = [c[1] for c in cursor.fetchall()]
+
+    if "client_id" not in case_cols:
+        cursor.execute("ALTER TABLE cases ADD COLUMN client_id INTEGER REFERENCES clients(id)")
+    # (client_id, hearing_date) also answers "next hearing per client"
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_cases_client ON cases (client_id, hearing_date)")
+
+
+def find(cursor, name):
+    cursor.execute("SELECT id FROM clients WHERE name_key=? ORDER BY id LIMIT 1", (name_key(name),))
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def create(cursor, name, phone="", email="", address=""):
+    cursor.execute("""
+        INSERT INTO clients (name, name_key, phone, email, address, created_at)
+        VALUES (?, ?, ?, ?, ?, datetime('now'))
+    """, (name.strip(), name_key(name), phone, email, address))
+    return cursor.lastrowid
+
+
+def ensure(cursor, name):
+    """
+    id of the client called name, created if new. None for blank or
+    placeholder names. The caller commits.
+    """
+    key = name_key(name)
+    if not key or key in PLACEHOLDER_NAMES:
+        return None
+    return find(cursor, name) or create(cursor, name)
+
+
+def backfill(conn, batch_size=BACKFILL_BATCH):
+    """
+    Links unlinked cases to clients (creating them) one committed batch
+    at a time, so a large table never holds the write lock for long.
+    Returns the number of cases linked.
+    """
+    cursor = conn.cursor()
+    last_id = 0
+    linked = 0
+
+    while True:
+        cursor.execute("""
+            SELECT id, client_name FROM cases
+            WHERE client_id IS NULL AND id > ?
+            ORDER BY id
+            LIMIT ?
+        """, (last_id, batch_size))
+        rows = cursor.fetchall()
+        if not rows:
+            return linked
+
+        ids = {}
+        updates = []
+        for case_id, client_name in rows:
+            key = name_key(client_name)
+            if key not in ids:
+                ids[key] = ensure(cursor, client_name)
+            if ids[key]:
+                updates.append((ids[key], case_id))
+
+        cursor.executemany("UPDATE cases SET client_id=? WHERE id=?", updates)
+        conn.commit()
+
+        linked += len(updates)
+        last_id = rows[-1][0]
+
+
+def list_clients(cursor, today):
+    """
+    Every client with its case count and next hearing on or after today,
+    in one GROUP BY over the client_id index.
+    """
+    cursor.execute("""
+        SELECT cl.id, cl.name, cl.phone, cl.email, cl.address, cl.created_at,
+               COUNT(c.id),
+               MIN(CASE WHEN c.hearing_date >= ? THEN c.hearing_date END)
+        FROM clients cl
+        LEFT JOIN cases c ON c.client_id = cl.id
+        GROUP BY cl.id
+        ORDER BY cl.name COLLATE NOCASE
+    """, (today,))
+
+    return [{
+        "id": r[0],
+        "name": r[1],
+        "phone": r[2],
+        "email": r[3],
+        "address": r[4],
+        "created_at": r[5],
+        "case_count": r[6],
+        "next_hearing": r[7]
+    } for r in cursor.fetchall()]
@@ -0,0 +1,441 @@
+import json
+import os
+import re
+
+
+# =========================================================
+#                 COURT PROFILES (REGISTRY)
+# =========================================================
+# What the PDF extraction knows about each court: the phrases that
+# identify its orders, the case types read from "TYPE NUMBER/YEAR"
+# references, keyword guesses for courts without such a vocabulary, the
+# number format after the type and how its orders announce the next
+# date. pdf_helpers never looks at a court by name; it only uses the
+# RULES compiled from PROFILES below.
+#
+# More courts come from the JSON file COURT_PROFILES (a list of
+# CourtProfile keyword arguments, type_keywords as [[words], type]),
+# read at import, so the PDF pool workers, which import this module
+# afresh, get the same courts as the web workers.
+
+PROFILES_FILE = os.environ.get("COURT_PROFILES", "courts.json")
+
+# day, month, year
+DATE = r"([0-9]{1,2})[\/\-.]([0-9]{1,2})[\/\-.]([0-9]{4})"
+
+# "17864/2025" after the case type
+NUMBER_FORMAT = r"\s*(?P<number>[0-9]+)\s*\/\s*(?P<year>[0-9]{4})"
+
+# phrases before the next date, by how sure they are, strongest first
+DATE_PHRASES = {
+    "list_on": ("LIST ON",),
+    "fixed_for": ("NEXT DATE OF HEARING", "FIXED FOR"),
+}
+
+# ...and any date at all when none of them is there
+DATE_SOURCES = tuple(DATE_PHRASES) + ("date",)
+
+
+class CourtProfile:
+    """
+    One court. name is the value stored in cases.court (the add_case
+    dropdown). markers are upper-case phrases only its orders contain.
+    case_types are dropdown values matched as "TYPE NUMBER/YEAR" or as a
+    bare type; type_keywords are ((words, ...), case type) guesses, in
+    order, used when there is no reference for this court.
+    number_format matches the "NUMBER/YEAR" after a type (groups number
+    and year); date_phrases maps a DATE_PHRASES source to phrases.
+    """
+
+    def __init__(self, name, markers, case_types=(), type_keywords=(),
+                 number_format=NUMBER_FORMAT, date_phrases=DATE_PHRASES):
+        self.name = name
+        self.markers = tuple(markers)
+        self.case_types = tuple(case_types)
+        self.type_keywords = tuple(type_keywords)
+        self.number_re = re.compile(number_format)
+        self.date_phrases = date_phrases
+
+
+# ---------------- DELHI HIGH COURT ----------------
+# Exactly like the dropdown values in add_case.html.
+HC_CASE_TYPES = [
+    "ADMIN.REPORT",
+    "ARB.A.",
+    "ARB. A. (COMM.)",
+    "ARB.P.",
+    "BAIL APPLN.",
+    "CA",
+    "CA (COMM.IPD-CR)",
+    "C.A.(COMM.IPD-GI)",
+    "C.A.(COMM.IPD-PAT)",
+    "C.A.(COMM.IPD-PV)",
+    "C.A.(COMM.IPD-TM)",
+    "CAVEAT(CO.)",
+    "CC(ARB.)",
+    "CCP(CO.)",
+    "CCP(REF)",
+    "CEAC",
+    "CEAR",
+    "CHAT.A.C.",
+    "CHAT.A.REF",
+    "CMI",
+    "CM(M)",
+    "CM(M)-IPD",
+    "C.O.",
+    "CO.APP.",
+    "CO.APPL.(C)",
+    "CO.APPL.(M)",
+    "CO.A(SB)",
+    "C.O.(COMM.IPD-CR)",
+    "C.O.(COMM.IPD-GI)",
+    "C.O.(COMM.IPD-PAT)",
+    "C.O.(COMM.IPD-TM)",
+    "CO.EX.",
+    "CONT.APP.(C)",
+    "CONT.CAS(C)",
+    "CONT.CAS.(CRL)",
+    "CO.PET.",
+    "C.REF.",
+    "CRL.A.",
+    "CRL.LIP.",
+    "CRL.M.C.",
+    "CRL.M.(CO)",
+    "CRL.M.I.",
+    "CRL.O.",
+    "CRL.O.(CO.)",
+    "CRL.REF.",
+    "CRL.REV.P.",
+    "CRL.REV.P.(MAT.)",
+    "CRL.REV.P.(NDPS)",
+    "CRL.REV.P.(NI)",
+    "C.R.P.",
+    "CRP-IPD",
+    "C.RULE",
+    "CS(COMM)",
+    "CS(COMM) INFRA",
+    "CS(OS)",
+    "GP",
+    "CUSAA",
+    "CUS.A.C.",
+    "CUS.A.R.",
+    "CUSTOMA.",
+    "DEATH SENTENCE REF.",
+    "DEMO",
+    "EDC",
+    "EDR",
+    "EFA(COMM)",
+    "EFA(OS)",
+    "EFA(OS) (COMM)",
+    "EFA(OS)(IPD)",
+    "EL.PET.",
+    "ETR",
+    "EX.F.A.",
+    "EX.P.",
+    "EX.S.A.",
+    "FAO",
+    "FAO (COMM)",
+    "FAO-IPD",
+    "FAO(OS)",
+    "FAO(OS) (COMM)",
+    "FAO(OS)(IPD)",
+    "GCAC",
+    "GCAR",
+    "GTA",
+    "GTC",
+    "GTR",
+    "I.A.",
+    "I.P.A.",
+    "ITA",
+    "ITC",
+    "ITR",
+    "ITSA",
+    "LA.APP.",
+    "LPA",
+    "MAC.APP.",
+    "MAT.",
+    "MAT.APP.",
+    "MAT. APP.(FC.)",
+    "MAT.CASE",
+    "MAT.REF.",
+    "MISC. APPEAL (FEMA)",
+    "MISC. APPEAL(PMLA)",
+    "OA",
+    "OCJA",
+    "O.M.P.",
+    "O.M.P.(COMM)",
+    "OMP (CONT.)",
+    "O.MP. (E)",
+    "O.M.P (E) (COMM.)",
+    "O.M.P.(EFA)(COMM.)",
+    "O.M.P. (ENF.)",
+    "OMP (ENF.) (COMM.)",
+    "O.M.P.(I)",
+    "O.M.P.(I) (COMM.)",
+    "O.M.P.(J) (COMM.)",
+    "O.M.P.(MISC.)",
+    "O.M.P.(MISC.)(COMM.)",
+    "O.M.P.(T)",
+    "O.M.P. (T) (COMM.)",
+    "O.REF.",
+    "RC.REV.",
+    "RC.S.A.",
+    "RERA APPEAL",
+    "REVIEW PET.",
+    "RFA",
+    "RFA(COMM)",
+    "RFA-IPD",
+    "RFA(OS)",
+    "RFA(OS)(COMM)",
+    "RFA(OS)(IPD)",
+    "RSA",
+    "SCA",
+    "SDR",
+    "SERTA",
+    "ST.APPL.",
+    "STC",
+    "ST.REF.",
+    "SUR.T.REF.",
+    "TEST.CAS.",
+    "TR.P.(C)",
+    "TR.P.(C.)",
+    "TR.P.(CRL.)",
+    "VAT APPEAL",
+    "W.P.(C)",
+    "W.P.(C)-IPD",
+    "W.P.(CRL)",
+    "WTA",
+    "WTC",
+    "WTR"
+]
+
+
+DELHI_HIGH_COURT = CourtProfile(
+    "Delhi High Court",
+    markers=("HIGH COURT OF DELHI",),
+    case_types=HC_CASE_TYPES,
+)
+
+
+# ---------------- DWARKA DISTRICT COURT ----------------
+DWARKA_DISTRICT_COURT = CourtProfile(
+    "Dwarka District Court",
+    markers=("DISTRICT COURT", "DWARKA COURT"),
+    type_keywords=(
+        (("BAIL",), "Bail Matters"),
+        (("MACT",), "MACT"),
+        (("HMA",), "HMA"),
+        (("CS", "DJ"), "CS DJ ADJ"),
+    ),
+    date_phrases={"fixed_for": ("NEXT DATE OF HEARING",)},
+)
+
+
+# =========================================================
+#           COMPILED RULES (ONE PASS PER KIND)
+# =========================================================
+# All profiles are compiled together, so each kind of thing is found by
+# one regex over the text however many courts there are: one for the
+# markers and keywords, one for the case types of every court and one
+# per date strength. Adding a court adds branches to a trie, not passes.
+
+def alternation(phrases):
+    """
+    One regex for all phrases (upper-cased), preferring the longest, so
+    that "W.P.(C)-IPD" wins over "W.P.(C)". Spaces match any whitespace.
+
+    The phrases are laid out as a trie, "W\.P\.\((?:C\)(?:\-IPD)?|CRL\))",
+    not as a flat A|B|C: re tries a flat alternation one phrase after the
+    other at every position, a trie costs the length of one phrase
+    however many there are.
+    """
+    trie = {}
+    for phrase in phrases:
+        node = trie
+        for ch in normalize(phrase.upper().strip()):
+            node = node.setdefault(ch, {})
+        node[""] = {}    # a phrase ends here
+    return _trie_regex(trie)
+
+
+def _trie_regex(node):
+    # children never share a first character, so trying the longer
+    # continuation first and backtracking is "longest phrase first"
+    branches = [
+        (r"\s+" if ch == " " else re.escape(ch)) + _trie_regex(child)
+        for ch, child in sorted(node.items()) if ch
+    ]
+    if not branches:
+        return ""
+    body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    return "(?:" + body + ")?" if "" in node else body
+
+
+def normalize(matched):
+    """
+    A match of alternation() as it was declared: single spaces.
+    """
+    return re.sub(r"\s+", " ", matched)
+
+
+class CourtRules:
+    """
+    The dispatcher compiled from a list of profiles, in precedence
+    order: when an order names two courts, the earlier profile wins.
+    """
+
+    def __init__(self, profiles):
+        self.profiles = list(profiles)
+        self.by_name = {p.name: p for p in self.profiles}
+        self.rank = {}    # name -> precedence, for first_court()
+        for i, p in enumerate(self.profiles):
+            self.rank.setdefault(p.name, i)
+
+        # markers and keywords are found by one regex: term -> court
+        # name for a marker, None for a keyword
+        self.terms = {}
+        for p in self.profiles:
+            for marker in p.markers:
+                self.terms.setdefault(normalize(marker.upper()), p.name)
+        for p in self.profiles:
+            for words, _ in p.type_keywords:
+                for w in words:
+                    self.terms.setdefault(normalize(w.upper()), None)
+        self.term_re = re.compile(alternation(self.terms)) if self.terms else None
+
+        # upper-cased type (single spaces) -> [(profile, dropdown value)]
+        self.type_owners = {}
+        for p in self.profiles:
+            seen = set()
+            for ct in p.case_types:
+                key = normalize(ct.upper())
+                if key not in seen:
+                    seen.add(key)
+                    self.type_owners.setdefault(key, []).append((p, ct))
+        self.reference_courts = {p.name for p in self.profiles if p.case_types}
+
+        # a type not followed by a letter; "bare" when no digit follows
+        # either. The number after it is each owner's number_re.
+        self.type_re = None
+        if self.type_owners:
+            self.type_re = re.compile(
+                r"(?<![A-Z0-9])(?P<type>" + alternation(self.type_owners) + r")"
+                r"(?![A-Z])(?:(?P<bare>)(?![0-9]))?"
+            )
+
+        # (source, pattern) strongest first, one pattern over every
+        # court's phrases per source
+        self.date_patterns = []
+        for source in DATE_PHRASES:
+            phrases = [ph for p in self.profiles for ph in p.date_phrases.get(source, ())]
+            if phrases:
+                self.date_patterns.append(
+                    (source, re.compile(r"(?:" + alternation(phrases) + r")\s*[:\-]?\s*" + DATE))
+                )
+        self.date_patterns.append(("date", re.compile(DATE)))
+
+    def terms_in(self, upper):
+        """
+        (names of the courts whose markers appear, keywords that appear)
+        in upper-cased text.
+        """
+        names = set()
+        keywords = set()
+        for m in (self.term_re.finditer(upper) if self.term_re else ()):
+            term = m.group(0)
+            if term not in self.terms:
+                term = normalize(term)
+            court = self.terms[term]
+            if court:
+                names.add(court)
+            else:
+                keywords.add(term)
+        return names, keywords
+
+    def first_court(self, names):
+        """
+        The name in names of the earliest profile (names are few, the
+        profiles may be many).
+        """
+        return min(names, key=self.rank.__getitem__) if names else ""
+
+    def references(self, upper, names=()):
+        """
+        ({court: (dropdown type, number, year)}, first reference of any
+        court, {court: first bare type}). Stops once the courts in names
+        (those whose markers are in the text) have their reference, or
+        at the first reference when none of them has case types.
+        """
+        wanted = self.reference_courts.intersection(names)
+        references = {}
+        first = None
+        bare_types = {}
+        if not self.type_re:
+            return references, first, bare_types
+
+        for m in self.type_re.finditer(upper):
+            owners = self.type_owners.get(m.group("type")) or self.type_owners[normalize(m.group("type"))]
+            for profile, case_type in owners:
+                if profile.name in references:
+                    continue
+                n = profile.number_re.match(upper, m.end())
+                if n:
+                    references[profile.name] = (case_type, n.group("number"), n.group("year"))
+                    first = first or references[profile.name]
+                elif m.group("bare") is not None:
+                    bare_types.setdefault(profile.name, case_type)
+            if references and wanted.issubset(references):
+                break
+
+        return references, first, bare_types
+
+    def keyword_type(self, court, keywords):
+        """
+        The first type_keywords guess of court whose words all appear.
+        """
+        profile = self.by_name.get(court)
+        for words, case_type in (profile.type_keywords if profile else ()):
+            if all(normalize(w.upper()) in keywords for w in words):
+                return case_type
+        return ""
+
+
+def load_profiles(path):
+    """
+    CourtProfiles from a JSON file (see PROFILES_FILE).
+    """
+    with open(path, encoding="utf-8") as f:
+        return [CourtProfile(**entry) for entry in json.load(f)]
+
+
+PROFILES = [DELHI_HIGH_COURT, DWARKA_DISTRICT_COURT]
+if os.path.exists(PROFILES_FILE):
+    PROFILES += load_profiles(PROFILES_FILE)
+
+RULES = CourtRules(PROFILES)
+
+# added in code after import; jobs hands them to its pool workers
+_registered = []
+
+
+def register_all(profiles):
+    """
+    Adds courts (at startup, before PDFs are read) and recompiles RULES
+    once for all of them.
+    """
+    global RULES
+    profiles = list(profiles)
+    PROFILES.extend(profiles)
+    _registered.extend(profiles)
+    RULES = CourtRules(PROFILES)
+
+
+def register(profile):
+    register_all([profile])
+
+
+def registered():
+    """
+    The profiles register_all() added in this process.
+    """
+    return list(_registered)
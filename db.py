@@ -0,0 +1,203 @@
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from flask import g
+
+import metrics
+
+
+# ---------------- DATABASE CONFIG ----------------
+DB_PATH = os.environ.get("CASES_DB", "cases.db")
+
+# Keep one open connection per thread (one per gunicorn sync worker)
+# instead of reconnecting on every request. Set to False to get the
+# old connect-per-request behaviour (used by the benchmarks).
+POOL_CONNECTIONS = True
+
+# sqlite3 keeps this many compiled statements per connection, so the
+# same SQL text is only prepared once per worker.
+STATEMENT_CACHE_SIZE = 256
+
+PRAGMAS = (
+    # readers don't block behind the PDF ingest writer
+    "PRAGMA journal_mode=WAL",
+    # safe with WAL, skips an fsync per commit
+    "PRAGMA synchronous=NORMAL",
+    # ~16 MB page cache
+    "PRAGMA cache_size=-16000",
+    # 128 MB memory mapped reads
+    "PRAGMA mmap_size=134217728",
+    "PRAGMA temp_store=MEMORY",
+)
+
+# time every statement into metrics (see InstrumentedCursor)
+INSTRUMENT_SQL = os.environ.get("SQL_METRICS", "1") == "1"
+SLOW_QUERY_MS = float(os.environ.get("SLOW_QUERY_MS", "100"))
+
+_local = threading.local()
+log = logging.getLogger(__name__)
+
+
+def connect(path=None):
+    """
+    Opens a new tuned connection. Use get_db() inside requests.
+    """
+    conn = sqlite3.connect(
+        path or DB_PATH,
+        timeout=10,
+        cached_statements=STATEMENT_CACHE_SIZE,
+        factory=InstrumentedConnection if INSTRUMENT_SQL else sqlite3.Connection
+    )
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+# ---------------- SQL INSTRUMENTATION ----------------
+# execute() on these connections and their cursors is timed by statement
+# kind. A statement slower than SLOW_QUERY_MS is logged with its query
+# plan, and counted per table when the plan scans the whole table.
+
+STATEMENT_KINDS = {"select", "insert", "update", "delete", "with", "replace"}
+FULL_SCAN = re.compile(r"^SCAN (?:TABLE )?(\S+)$")
+MAX_PLANS = 512
+
+_plans = {}
+_kinds = {}
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    def execute(self, sql, *args):
+        t0 = time.perf_counter()
+        try:
+            return sqlite3.Cursor.execute(self, sql, *args)
+        finally:
+            _record(self.connection, sql, args[0] if args else (), t0)
+
+    def executemany(self, sql, *args):
+        t0 = time.perf_counter()
+        try:
+            return sqlite3.Cursor.executemany(self, sql, *args)
+        finally:
+            _record(self.connection, sql, None, t0)
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    def cursor(self, factory=InstrumentedCursor):
+        return sqlite3.Connection.cursor(self, factory)
+
+    def execute(self, sql, *args):
+        return self.cursor().execute(sql, *args)
+
+    def executemany(self, sql, *args):
+        return self.cursor().executemany(sql, *args)
+
+
+def _statement_kind(sql):
+    kind = _kinds.get(sql)
+    if kind is None:
+        word = sql.lstrip()[:8].split(None, 1)
+        kind = word[0].lower() if word else ""
+        kind = kind if kind in STATEMENT_KINDS else "other"
+        if len(_kinds) < MAX_PLANS:
+            _kinds[sql] = kind
+    return kind
+
+
+def _record(conn, sql, params, t0):
+    elapsed = time.perf_counter() - t0
+    kind = _statement_kind(sql)
+    metrics.observe("sql_query_duration_seconds", elapsed, statement=kind)
+
+    if elapsed * 1000 < SLOW_QUERY_MS:
+        return
+
+    metrics.inc("sql_slow_queries_total", statement=kind)
+    plan = _query_plan(conn, sql, params) if kind in ("select", "with", "update", "delete") else []
+
+    for table in plan_full_scans(plan):
+        metrics.inc("sql_full_scans_total", table=table)
+
+    log.warning(
+        "slow query %.1f ms: %s | plan: %s",
+        elapsed * 1000, " ".join(sql.split()), "; ".join(plan) or "-"
+    )
+
+
+def _query_plan(conn, sql, params):
+    """
+    EXPLAIN QUERY PLAN details, looked up once per SQL text per process.
+    None params (executemany) are not explained.
+    """
+    if params is None:
+        return []
+    if sql in _plans:
+        return _plans[sql]
+
+    try:
+        rows = sqlite3.Connection.execute(conn, "EXPLAIN QUERY PLAN " + sql, params).fetchall()
+        plan = [r[-1] for r in rows]
+    except sqlite3.Error:
+        plan = []
+
+    if len(_plans) >= MAX_PLANS:
+        _plans.clear()
+    _plans[sql] = plan
+    return plan
+
+
+def plan_full_scans(plan):
+    """
+    Tables (or aliases) a query plan reads in full, without an index.
+    """
+    return [m.group(1) for m in map(FULL_SCAN.match, plan) if m]
+
+
+def _pooled_connection():
+    conn = getattr(_local, "conn", None)
+
+    # never reuse a handle inherited across a fork or for another file
+    if conn is not None and _local.pid == os.getpid() and _local.path == DB_PATH:
+        return conn
+
+    conn = connect()
+    _local.conn = conn
+    _local.pid = os.getpid()
+    _local.path = DB_PATH
+    return conn
+
+
+def get_db():
+    """
+    Connection for the current request / app context.
+    """
+    if "db" not in g:
+        if POOL_CONNECTIONS:
+            g.db = _pooled_connection()
+        else:
+            g.db = sqlite3.connect(DB_PATH, factory=InstrumentedConnection if INSTRUMENT_SQL else sqlite3.Connection)
+    return g.db
+
+
+def close_db(exc=None):
+    """
+    Teardown: hand the pooled connection back (or close an unpooled one).
+    """
+    conn = g.pop("db", None)
+    if conn is None:
+        return
+
+    if POOL_CONNECTIONS:
+        # don't leak a half finished transaction into the next request
+        if conn.in_transaction:
+            conn.rollback()
+    else:
+        conn.close()
+
+
+def init_app(app):
+    app.teardown_appcontext(close_db)
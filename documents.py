@@ -0,0 +1,265 @@
+import hashlib
+import os
+import shutil
+import time
+
+from text_cache import CHUNK_SIZE, save_and_hash
+
+
+# =========================================================
+#             CONTENT ADDRESSED DOCUMENT STORE
+# =========================================================
+# Uploaded files are stored once per content, as blobs/<ab>/<sha256>,
+# whatever they were called. The documents table lists every file
+# attached to a case under its original name, so two different orders
+# both named display_pdf.php.pdf no longer overwrite each other, and the
+# same order uploaded to ten cases takes the disk space of one.
+#
+# cases.document keeps the name of the latest file for display.
+
+STORE_DIR = os.path.join("uploads", "blobs")
+
+# a blob saved this recently may be about to be attached: never removed
+REMOVE_GRACE_SECONDS = 3600
+
+
+def init_documents_table(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS documents (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            case_id INTEGER NOT NULL,
+            sha256 TEXT NOT NULL,
+            filename TEXT NOT NULL,
+            size INTEGER,
+            uploaded_at REAL
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_documents_case ON documents (case_id, id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_documents_sha256 ON documents (sha256)")
+
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS cases_documents_ad AFTER DELETE ON cases BEGIN
+            DELETE FROM documents WHERE case_id = old.id;
+        END
+    """)
+
+
+def init_filename_index(cursor):
+    # /download/<filename> serves the latest document of that name
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_documents_filename ON documents (filename, id)")
+
+
+def blob_path(sha256):
+    return os.path.abspath(os.path.join(STORE_DIR, sha256[:2], sha256))
+
+
+def save(stream):
+    """
+    Stores the contents of a binary stream. Returns (sha256, size).
+
+    A seekable stream (Flask uploads, open files) is hashed first and
+    only written if the blob is new, so a re-upload costs no disk
+    writes. Anything else is copied to a temp file while hashing.
+    """
+    os.makedirs(STORE_DIR, exist_ok=True)
+
+    if _seekable(stream):
+        start = stream.tell()
+        h = hashlib.sha256()
+        size = 0
+        while True:
+            chunk = stream.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            h.update(chunk)
+            size += len(chunk)
+        sha256 = h.hexdigest()
+
+        if os.path.exists(blob_path(sha256)):
+            _touch(sha256)
+        else:
+            stream.seek(start)
+            _write_blob(sha256, stream)
+        return sha256, size
+
+    tmp = os.path.join(STORE_DIR, f"upload.{os.getpid()}.{time.monotonic_ns()}.tmp")
+    sha256 = save_and_hash(stream, tmp)
+    size = os.path.getsize(tmp)
+
+    if os.path.exists(blob_path(sha256)):
+        os.remove(tmp)
+        _touch(sha256)
+    else:
+        os.makedirs(os.path.dirname(blob_path(sha256)), exist_ok=True)
+        os.replace(tmp, blob_path(sha256))
+    return sha256, size
+
+
+def save_file(path):
+    with open(path, "rb") as f:
+        return save(f)
+
+
+def _seekable(stream):
+    try:
+        return stream.seekable()
+    except (AttributeError, ValueError):
+        return False
+
+
+def _touch(sha256):
+    try:
+        os.utime(blob_path(sha256))
+    except OSError:
+        pass
+
+
+def _write_blob(sha256, stream):
+    # written under a temp name so a half written blob is never served
+    path = blob_path(sha256)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        shutil.copyfileobj(stream, f, CHUNK_SIZE)
+    os.replace(tmp, path)
+
+
+def attach(cursor, case_id, sha256, filename, size=None):
+    """
+    Lists a stored blob as one of the case's documents and makes it the
+    case's current document. Returns the document id, or None when there
+    is no such case (nothing is listed). The caller commits.
+    """
+    cursor.execute("UPDATE cases SET document=? WHERE id=?", (filename, case_id))
+    if not cursor.rowcount:
+        return None
+
+    if size is None:
+        size = os.path.getsize(blob_path(sha256))
+
+    cursor.execute("""
+        INSERT INTO documents (case_id, sha256, filename, size, uploaded_at)
+        VALUES (?, ?, ?, ?, ?)
+    """, (case_id, sha256, filename, size, time.time()))
+    return cursor.lastrowid
+
+
+def attach_many(cursor, rows):
+    """
+    rows: (case_id, sha256, filename, size) for new cases whose document
+    column is already set.
+    """
+    now = time.time()
+    cursor.executemany("""
+        INSERT INTO documents (case_id, sha256, filename, size, uploaded_at)
+        VALUES (?, ?, ?, ?, ?)
+    """, [(case_id, sha256, filename, size, now) for case_id, sha256, filename, size in rows])
+
+
+def get(cursor, document_id):
+    cursor.execute(
+        "SELECT id, case_id, sha256, filename, size, uploaded_at FROM documents WHERE id=?",
+        (document_id,)
+    )
+    r = cursor.fetchone()
+    return _document(r) if r else None
+
+
+def latest(cursor, case_id):
+    cursor.execute("""
+        SELECT id, case_id, sha256, filename, size, uploaded_at
+        FROM documents
+        WHERE case_id=?
+        ORDER BY id DESC
+        LIMIT 1
+    """, (case_id,))
+    r = cursor.fetchone()
+    return _document(r) if r else None
+
+
+def latest_named(cursor, filename):
+    cursor.execute("""
+        SELECT id, case_id, sha256, filename, size, uploaded_at
+        FROM documents
+        WHERE filename=?
+        ORDER BY id DESC
+        LIMIT 1
+    """, (filename,))
+    r = cursor.fetchone()
+    return _document(r) if r else None
+
+
+def for_case(cursor, case_id):
+    cursor.execute("""
+        SELECT id, case_id, sha256, filename, size, uploaded_at
+        FROM documents
+        WHERE case_id=?
+        ORDER BY id DESC
+    """, (case_id,))
+    return [_document(r) for r in cursor.fetchall()]
+
+
+def _document(r):
+    return {
+        "id": r[0],
+        "case_id": r[1],
+        "sha256": r[2],
+        "filename": r[3],
+        "size": r[4],
+        "uploaded_at": r[5]
+    }
+
+
+def case_hashes(cursor, case_id):
+    cursor.execute("SELECT DISTINCT sha256 FROM documents WHERE case_id=?", (case_id,))
+    return [r[0] for r in cursor.fetchall()]
+
+
+def remove_unreferenced(cursor, hashes):
+    """
+    Deletes the blobs no document points at any more (unless saved
+    again within REMOVE_GRACE_SECONDS, i.e. an upload in flight).
+    """
+    for sha256 in hashes:
+        cursor.execute("SELECT 1 FROM documents WHERE sha256=? LIMIT 1", (sha256,))
+        if cursor.fetchone():
+            continue
+        try:
+            path = blob_path(sha256)
+            if time.time() - os.path.getmtime(path) > REMOVE_GRACE_SECONDS:
+                os.remove(path)
+        except OSError:
+            pass
+
+
+def import_legacy_uploads(conn, upload_folder="uploads", batch_size=200):
+    """
+    Migration: stores the file named in cases.document (written to
+    uploads/<name> before the store existed) for cases that have no
+    documents yet. Safe to rerun; commits per batch.
+    """
+    cursor = conn.cursor()
+    last_id = 0
+
+    while True:
+        cursor.execute("""
+            SELECT c.id, c.document FROM cases c
+            WHERE c.id > ? AND c.document IS NOT NULL AND c.document != ''
+              AND NOT EXISTS (SELECT 1 FROM documents d WHERE d.case_id = c.id)
+            ORDER BY c.id
+            LIMIT ?
+        """, (last_id, batch_size))
+        rows = cursor.fetchall()
+        if not rows:
+            return
+
+        attached = []
+        for case_id, filename in rows:
+            path = os.path.join(upload_folder, filename)
+            if os.path.isfile(path):
+                sha256, size = save_file(path)
+                attached.append((case_id, sha256, filename, size))
+
+        attach_many(cursor, attached)
+        conn.commit()
+        last_id = rows[-1][0]
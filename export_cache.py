@@ -0,0 +1,84 @@
+import glob
+import hashlib
+import os
+
+import reports
+
+
+# =========================================================
+#             RENDERED SINGLE-CASE PDF CACHE
+# =========================================================
+# case_<id>_<version>.pdf, where version hashes the case row and its
+# notes. A changed case gets a new version (and ETag) automatically; the
+# routes that change a case also drop its files straight away.
+
+CACHE_DIR = os.path.join("cache", "case_pdfs")
+MAX_CACHE_BYTES = 200 * 1024 * 1024
+
+
+def case_version(cursor, row):
+    """
+    Stable hash of the case row plus its notes (count and newest id)
+    and the report layout version.
+    """
+    cursor.execute("SELECT COUNT(*), MAX(id) FROM notes WHERE case_id=?", (row[0],))
+    notes = cursor.fetchone()
+    key = (tuple(row), tuple(notes), reports.LAYOUT_VERSION)
+    return hashlib.sha256(repr(key).encode("utf-8")).hexdigest()[:32]
+
+
+def cached_path(case_id, version):
+    return os.path.abspath(os.path.join(CACHE_DIR, f"case_{case_id}_{version}.pdf"))
+
+
+def get_or_render(case_id, version, render):
+    """
+    Path of the cached PDF, calling render(path) first if it is missing.
+    """
+    path = cached_path(case_id, version)
+    if os.path.exists(path):
+        return path
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    invalidate(case_id)
+
+    # render to a temp name so a half written file is never served
+    tmp = f"{path}.{os.getpid()}.tmp"
+    render(tmp)
+    os.replace(tmp, path)
+
+    _evict()
+    return path
+
+
+def invalidate(case_id):
+    for path in glob.glob(os.path.join(CACHE_DIR, f"case_{case_id}_*.pdf")):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _evict():
+    """
+    Drops the least recently modified files while over MAX_CACHE_BYTES.
+    """
+    files = []
+    total = 0
+    for entry in os.scandir(CACHE_DIR):
+        if entry.name.endswith(".pdf"):
+            st = entry.stat()
+            files.append((st.st_mtime, st.st_size, entry.path))
+            total += st.st_size
+
+    if total <= MAX_CACHE_BYTES:
+        return
+
+    for _, size, path in sorted(files):
+        if total <= MAX_CACHE_BYTES:
+            break
+        try:
+            os.remove(path)
+            total -= size
+        except OSError:
+            pass
@@ -0,0 +1,189 @@
+import time
+
+
+# =========================================================
+#                    HEARING HISTORY
+# =========================================================
+# cases.hearing_date is only the next date. Every date a case is listed
+# on is also kept in hearings, one row per (case, date), so past cause
+# lists, a case's history and adjournment counts are index lookups.
+#
+# When a case gets a new date, its previous hearing is marked 'adjourned'
+# (unless it already has an outcome) if it is already past. Pending rows
+# from today on are dropped, as the new date replaces them: a case moved
+# off a day (or with its date cleared) is no longer listed on it.
+
+ADJOURNED = "adjourned"
+
+
+def init_hearings_table(cursor):
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE name='hearings'")
+    exists = cursor.fetchone()
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS hearings (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            case_id INTEGER NOT NULL,
+            date TEXT NOT NULL,
+            source_document TEXT,
+            outcome TEXT,
+            created_at REAL
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_hearings_date ON hearings (date)")
+    cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_hearings_case_date ON hearings (case_id, date)")
+    cursor.execute(f"""
+        CREATE INDEX IF NOT EXISTS idx_hearings_adjourned ON hearings (case_id)
+        WHERE outcome = '{ADJOURNED}'
+    """)
+
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS cases_hearings_ad AFTER DELETE ON cases BEGIN
+            DELETE FROM hearings WHERE case_id = old.id;
+        END
+    """)
+
+    # first run on an existing database: every case's current date
+    if not exists:
+        cursor.execute("""
+            INSERT INTO hearings (case_id, date, source_document, created_at)
+            SELECT id, hearing_date, NULLIF(document, ''), ?
+            FROM cases
+            WHERE hearing_date IS NOT NULL AND hearing_date != ''
+        """, (time.time(),))
+
+
+def drop_moved_hearings(cursor):
+    """
+    Rows that record() used to leave behind: dates from today on that the
+    case has since moved off (kept pending, or marked adjourned before
+    they came). Deleting them stales their cause lists.
+    """
+    cursor.execute(f"""
+        DELETE FROM hearings
+        WHERE date >= ?
+          AND (outcome IS NULL OR outcome = '{ADJOURNED}')
+          AND date != COALESCE((SELECT hearing_date FROM cases WHERE cases.id = hearings.case_id), '')
+    """, (time.strftime("%Y-%m-%d"),))
+
+
+def record(cursor, case_id, date, source_document=None):
+    """
+    Adds date to the case's history (ISO YYYY-MM-DD). The same date twice
+    keeps one row, updating its source document. '' (date cleared) only
+    drops the pending rows from today on. The caller commits.
+    """
+    today = time.strftime("%Y-%m-%d")
+
+    if not date:
+        cursor.execute(
+            "DELETE FROM hearings WHERE case_id = ? AND date >= ? AND outcome IS NULL",
+            (case_id, today)
+        )
+        return
+
+    cursor.execute("""
+        INSERT INTO hearings (case_id, date, source_document, created_at)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT(case_id, date) DO UPDATE
+        SET source_document = COALESCE(excluded.source_document, source_document)
+    """, (case_id, date, source_document, time.time()))
+
+    cursor.execute("""
+        DELETE FROM hearings
+        WHERE case_id = ? AND date != ? AND (date > ? OR date >= ?) AND outcome IS NULL
+    """, (case_id, date, date, today))
+
+    cursor.execute("""
+        UPDATE hearings SET outcome = ?
+        WHERE id = (
+            SELECT id FROM hearings
+            WHERE case_id = ? AND date < ? AND date < ?
+            ORDER BY date DESC
+            LIMIT 1
+        ) AND outcome IS NULL
+    """, (ADJOURNED, case_id, date, today))
+
+
+def record_many(cursor, rows):
+    """
+    rows: (case_id, date, source_document) for new cases, which have no
+    earlier hearings to mark.
+    """
+    now = time.time()
+    cursor.executemany("""
+        INSERT INTO hearings (case_id, date, source_document, created_at)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT(case_id, date) DO NOTHING
+    """, [(case_id, date, source, now) for case_id, date, source in rows if date])
+
+
+def between(cursor, start, end, limit=None):
+    """
+    Hearings with start <= date <= end, joined to their case, in date
+    then court order.
+    """
+    cursor.execute("""
+        SELECT h.id, h.case_id, h.date, h.source_document, h.outcome,
+               c.client_name, c.case_title, c.case_number, c.case_year, c.court
+        FROM hearings h
+        JOIN cases c ON c.id = h.case_id
+        WHERE h.date BETWEEN ? AND ?
+        ORDER BY h.date, c.court, h.case_id
+        LIMIT ?
+    """, (start, end, -1 if limit is None else limit))
+
+    return [{
+        "id": r[0],
+        "case_id": r[1],
+        "date": r[2],
+        "source_document": r[3],
+        "outcome": r[4],
+        "client_name": r[5],
+        "case_title": r[6],
+        "case_number": r[7],
+        "case_year": r[8],
+        "court": r[9]
+    } for r in cursor.fetchall()]
+
+
+def history(cursor, case_id):
+    """
+    The case's hearings, latest first.
+    """
+    cursor.execute("""
+        SELECT id, date, source_document, outcome
+        FROM hearings
+        WHERE case_id = ?
+        ORDER BY date DESC
+    """, (case_id,))
+
+    return [{
+        "id": r[0],
+        "date": r[1],
+        "source_document": r[2],
+        "outcome": r[3]
+    } for r in cursor.fetchall()]
+
+
+def adjournment_counts(cursor, limit=50):
+    """
+    Cases with the most adjournments, most first. The outcome is
+    inlined so the partial index idx_hearings_adjourned applies.
+    """
+    cursor.execute(f"""
+        SELECT h.case_id, COUNT(*) AS adjournments, c.client_name, c.case_title
+        FROM hearings h
+        JOIN cases c ON c.id = h.case_id
+        WHERE h.outcome = '{ADJOURNED}'
+        GROUP BY h.case_id
+        ORDER BY adjournments DESC, h.case_id
+        LIMIT ?
+    """, (limit,))
+
+    return [{
+        "case_id": r[0],
+        "adjournments": r[1],
+        "client_name": r[2],
+        "case_title": r[3]
+    } for r in cursor.fetchall()]
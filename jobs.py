@@ -0,0 +1,693 @@
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import clients
+import courts
+import db
+import documents
+import export_cache
+import hearings
+import metrics
+import ocr
+import text_cache
+from pdf_helpers import analyse_pdf, extract_text_from_pdf, needs_ocr
+
+
+# =========================================================
+#                 PDF INGEST JOB QUEUE
+# =========================================================
+# Uploads are saved to the document store by the request and queued in
+# pdf_jobs. A dispatcher thread in each gunicorn worker claims queued
+# jobs, runs text extraction + detection in a process pool and writes
+# the result back to the case. Scanned orders then go through OCR in a
+# second, smaller pool (ocr.OCR_WORKERS), so they never hold up the
+# PDF_WORKERS that text uploads use.
+#
+# Analysis only reads the pages the detectors need. When that was not
+# the whole document a "text" job follows, at lower priority, and puts
+# the full text into case_text for search.
+#
+# JOB_TIMEOUT runs from when a worker starts the job. A job that runs
+# over it fails for good and its pool is killed and rebuilt: a running
+# future cannot be cancelled, and the hung process would keep its slot.
+
+# per gunicorn worker, like ocr.OCR_WORKERS: each one that gets an upload
+# runs its own dispatcher and pools, so up to WEB_CONCURRENCY x PDF_WORKERS
+PDF_WORKERS = int(os.environ.get("PDF_WORKERS", min(4, os.cpu_count() or 1)))
+MAX_ATTEMPTS = 3
+JOB_TIMEOUT = 120      # seconds per attempt
+POLL_INTERVAL = 1.0    # seconds, picks up jobs queued by other workers
+HEARTBEAT = JOB_TIMEOUT / 4    # seconds between started_at refreshes of waiting scans
+
+log = logging.getLogger(__name__)
+
+
+class JobError(Exception):
+    """
+    A job failure that retrying will not fix (bad PDF, missing date...)
+    """
+
+
+def init_jobs_table(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS pdf_jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind TEXT NOT NULL,
+            case_id INTEGER,
+            filename TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'queued',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            error TEXT,
+            result TEXT,
+            created_at REAL,
+            started_at REAL,
+            finished_at REAL,
+            extract_ms REAL,
+            detect_ms REAL
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_pdf_jobs_status ON pdf_jobs (status, id)")
+
+    cursor.execute("PRAGMA table_info(pdf_jobs)")
+    cols = [c[1] for c in cursor.fetchall()]
+
+    if "sha256" not in cols:
+        cursor.execute("ALTER TABLE pdf_jobs ADD COLUMN sha256 TEXT")
+    if "cache_hit" not in cols:
+        cursor.execute("ALTER TABLE pdf_jobs ADD COLUMN cache_hit INTEGER DEFAULT 0")
+
+    text_cache.init_cache_table(cursor)
+
+
+def enqueue(conn, kind, filename, case_id=None, sha256=None):
+    """
+    Queues a job and wakes the local dispatcher. Returns the job id.
+    kind is "create" (new case from PDF), "update" (existing case),
+    "import" (bulk import: create unless the case is already on file)
+    or "text" (full text of a case's PDF, see queue_full_text).
+    sha256 of the file lets the job reuse a cached extraction.
+    """
+    cursor = conn.cursor()
+    cursor.execute("""
+        INSERT INTO pdf_jobs (kind, case_id, filename, sha256, created_at)
+        VALUES (?, ?, ?, ?, ?)
+    """, (kind, case_id, filename, sha256, time.time()))
+    job_id = cursor.lastrowid
+    conn.commit()
+
+    _wake.set()
+    return job_id
+
+
+def enqueue_many(conn, kind, files, batch_id=None):
+    """
+    Queues one job per (filename, sha256) in a single transaction.
+    """
+    now = time.time()
+    conn.executemany("""
+        INSERT INTO pdf_jobs (kind, filename, sha256, batch_id, created_at)
+        VALUES (?, ?, ?, ?, ?)
+    """, [(kind, filename, sha256, batch_id, now) for filename, sha256 in files])
+    conn.commit()
+
+    _wake.set()
+
+
+def get_job(conn, job_id):
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT id, kind, case_id, filename, status, attempts, error, result,
+               created_at, started_at, finished_at, extract_ms, detect_ms,
+               cache_hit
+        FROM pdf_jobs
+        WHERE id=?
+    """, (job_id,))
+    r = cursor.fetchone()
+    if not r:
+        return None
+
+    job = {
+        "id": r[0],
+        "kind": r[1],
+        "case_id": r[2],
+        "filename": r[3],
+        "status": r[4],
+        "attempts": r[5],
+        "error": r[6],
+        "result": json.loads(r[7]) if r[7] else None,
+        "cache_hit": bool(r[13]),
+        "timing": {
+            "extract_ms": r[11],
+            "detect_ms": r[12],
+        }
+    }
+
+    if r[9]:
+        job["timing"]["wait_ms"] = round((r[9] - r[8]) * 1000, 1)
+    if r[10]:
+        job["timing"]["total_ms"] = round((r[10] - r[8]) * 1000, 1)
+
+    return job
+
+
+def backlog_stats(conn):
+    """
+    Queue depth per status, age of the oldest queued job and average
+    timings over the last 100 finished jobs.
+    """
+    cursor = conn.cursor()
+
+    cursor.execute("SELECT status, COUNT(*) FROM pdf_jobs GROUP BY status")
+    counts = {r[0]: r[1] for r in cursor.fetchall()}
+
+    cursor.execute("SELECT MIN(created_at) FROM pdf_jobs WHERE status='queued'")
+    oldest = cursor.fetchone()[0]
+
+    cursor.execute("""
+        SELECT AVG(started_at - created_at), AVG(extract_ms), AVG(detect_ms),
+               AVG(finished_at - created_at)
+        FROM (
+            SELECT created_at, started_at, finished_at, extract_ms, detect_ms
+            FROM pdf_jobs
+            WHERE status='done' AND kind != 'text'
+            ORDER BY id DESC
+            LIMIT 100
+        )
+    """)
+    avg = cursor.fetchone()
+
+    def ms(seconds):
+        return round(seconds * 1000, 1) if seconds is not None else None
+
+    return {
+        "queued": counts.get("queued", 0),
+        "running": counts.get("running", 0),
+        "done": counts.get("done", 0),
+        "failed": counts.get("failed", 0),
+        "oldest_queued_seconds": round(time.time() - oldest, 1) if oldest else 0,
+        "avg_wait_ms": ms(avg[0]),
+        "avg_extract_ms": round(avg[1], 1) if avg[1] is not None else None,
+        "avg_detect_ms": round(avg[2], 1) if avg[2] is not None else None,
+        "avg_total_ms": ms(avg[3]),
+        "workers": PDF_WORKERS,
+        "ocr_workers": ocr.OCR_WORKERS if ocr.available() else 0,
+        "cache": text_cache.stats(cursor)
+    }
+
+
+# ---------------- APPLYING RESULTS ----------------
+def create_case_from_pdf(cursor, filename, found, sha256=None):
+    client_name = found["client_name"] or "PDF Client"
+    case_title = found["case_title"] or "Case From PDF"
+
+    cursor.execute("""
+        INSERT INTO cases (
+            client_name, case_title, case_number, case_year,
+            case_type, court, hearing_date, status, document, client_id
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, (
+        client_name,
+        case_title,
+        found["case_number"],
+        found["case_year"],
+        found["case_type"],
+        found["court"],
+        found["next_date"],
+        "Pending",
+        filename,
+        clients.ensure(cursor, client_name)
+    ))
+
+    case_id = cursor.lastrowid
+    hearings.record(cursor, case_id, found["next_date"], filename)
+    if sha256:
+        documents.attach(cursor, case_id, sha256, filename)
+
+    cursor.execute(
+        "INSERT OR REPLACE INTO case_text (case_id, text) VALUES (?, ?)",
+        (case_id, found["text"])
+    )
+
+    return {
+        "message": "PDF uploaded and case created successfully!",
+        "case_id": case_id,
+        "next_date_detected": found["next_date"],
+        "case_number_detected": found["case_full"],
+        "court_detected": found["court"],
+        "case_type_detected": found["case_type"],
+        "confidence": found.get("confidence"),
+        "ocr_pages": found.get("ocr_pages", [])
+    }
+
+
+def import_case_from_pdf(cursor, filename, found, sha256=None):
+    """
+    One file of a bulk import: a case already on file (same case number
+    + year) is left alone.
+    """
+    if found["case_number"] and found["case_year"]:
+        cursor.execute(
+            "SELECT id FROM cases WHERE case_number=? AND case_year=? LIMIT 1",
+            (found["case_number"], found["case_year"])
+        )
+        row = cursor.fetchone()
+        if row:
+            return {
+                "status": "duplicate",
+                "case_id": row[0],
+                "next_date_detected": found["next_date"],
+                "case_number_detected": found["case_full"],
+                "court_detected": found["court"],
+                "case_type_detected": found["case_type"]
+            }
+
+    result = create_case_from_pdf(cursor, filename, found, sha256)
+    result["status"] = "created"
+    return result
+
+
+def update_case_from_pdf(cursor, case_id, filename, found, sha256=None):
+    if found["next_date"] == "":
+        raise JobError("Next hearing date not found in PDF!")
+
+    # update hearing_date + document + optional court + case_type
+    cursor.execute("""
+        UPDATE cases
+        SET hearing_date=?,
+            document=?,
+            court=COALESCE(NULLIF(?,''), court),
+            case_type=COALESCE(NULLIF(?,''), case_type)
+        WHERE id=?
+    """, (found["next_date"], filename, found["court"], found["case_type"], case_id))
+
+    if not cursor.rowcount:
+        raise JobError("Case not found")
+
+    hearings.record(cursor, case_id, found["next_date"], filename)
+    if sha256:
+        documents.attach(cursor, case_id, sha256, filename)
+
+    cursor.execute(
+        "INSERT OR REPLACE INTO case_text (case_id, text) VALUES (?, ?)",
+        (case_id, found["text"])
+    )
+
+    return {
+        "message": "PDF uploaded! Hearing date updated successfully.",
+        "case_id": case_id,
+        "next_date_detected": found["next_date"],
+        "court_detected": found["court"],
+        "case_type_detected": found["case_type"],
+        "confidence": found.get("confidence"),
+        "ocr_pages": found.get("ocr_pages", [])
+    }
+
+
+# ---------------- DISPATCHER ----------------
+_wake = threading.Event()
+_lock = threading.Lock()
+_dispatcher = {"pid": None, "thread": None}
+
+
+def start_worker(upload_folder):
+    """
+    Starts this process's dispatcher thread (once per gunicorn worker).
+    """
+    with _lock:
+        if _dispatcher["pid"] == os.getpid() and _dispatcher["thread"].is_alive():
+            return
+
+        thread = threading.Thread(
+            target=_run, args=(upload_folder,), name="pdf-jobs", daemon=True
+        )
+        _dispatcher["pid"] = os.getpid()
+        _dispatcher["thread"] = thread
+        thread.start()
+
+
+def pool_context():
+    # workers only import pdf_helpers, never the Flask app
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return multiprocessing.get_context(method)
+
+
+_started = None    # in pool workers: where they report the jobs they pick up
+
+
+def _init_worker(started, low_priority=False, profiles=()):
+    global _started
+    _started = started
+    if low_priority:
+        ocr.init_worker()
+    # courts registered in code after import (COURT_PROFILES is read anyway)
+    if profiles:
+        courts.register_all(profiles)
+
+
+def _analyse(job_id, kind, path, use_ocr=False):
+    # a job's timeout runs from here, not from when it was claimed
+    _started.put((job_id, time.time()))
+
+    if kind == "text":
+        t0 = time.perf_counter()
+        text = extract_text_from_pdf(path)
+        return {"text": text, "extract_ms": round((time.perf_counter() - t0) * 1000, 1)}
+    return analyse_pdf(path, use_ocr)
+
+
+def make_pool(workers=None, low_priority=False):
+    """
+    A process pool whose workers report each job they start on
+    pool.started.
+    """
+    workers = workers or PDF_WORKERS
+    ctx = pool_context()
+    started = ctx.SimpleQueue()
+    pool = ProcessPoolExecutor(
+        workers, mp_context=ctx,
+        initializer=_init_worker, initargs=(started, low_priority, courts.registered())
+    )
+    # what _timed_out needs to build a replacement
+    pool.started = started
+    pool.workers = workers
+    pool.low_priority = low_priority
+    return pool
+
+
+def make_ocr_pool():
+    return make_pool(ocr.OCR_WORKERS, low_priority=True)
+
+
+def _kill(pool):
+    """
+    Shuts a pool down and kills its processes: cancel() cannot stop a
+    job that is already running, and a hung one would keep its slot.
+    """
+    processes = list((pool._processes or {}).values())
+    pool.shutdown(wait=False, cancel_futures=True)
+    for p in processes:
+        p.terminate()
+
+
+def _requeue_stale(conn):
+    """
+    Jobs left 'running' by a worker that died go back to the queue.
+    A live dispatcher keeps started_at of its jobs recent: running
+    ones are bounded by JOB_TIMEOUT, waiting scans get _heartbeat().
+    """
+    conn.execute("""
+        UPDATE pdf_jobs SET status='queued'
+        WHERE status='running' AND started_at < ?
+    """, (time.time() - 2 * JOB_TIMEOUT,))
+    conn.commit()
+
+
+def _claim(conn):
+    # the status check in the UPDATE makes the claim atomic across workers
+    cursor = conn.execute("""
+        UPDATE pdf_jobs
+        SET status='running', attempts=attempts+1, started_at=?
+        WHERE id = (
+            SELECT id FROM pdf_jobs WHERE status='queued' ORDER BY kind = 'text', id LIMIT 1
+        )
+          AND status='queued'
+        RETURNING id, kind, case_id, filename, attempts, sha256
+    """, (time.time(),))
+    row = cursor.fetchone()
+    conn.commit()
+
+    if not row:
+        return None
+
+    return {
+        "id": row[0],
+        "kind": row[1],
+        "case_id": row[2],
+        "filename": row[3],
+        "attempts": row[4],
+        "sha256": row[5]
+    }
+
+
+def _fail(conn, job, error, retry=True):
+    if retry and job["attempts"] < MAX_ATTEMPTS:
+        status = "queued"
+    else:
+        status = "failed"
+
+    conn.execute("""
+        UPDATE pdf_jobs SET status=?, error=?, finished_at=?
+        WHERE id=?
+    """, (status, error, time.time() if status == "failed" else None, job["id"]))
+    conn.commit()
+
+
+def _finish(conn, job, future, scans):
+    try:
+        found = future.result()
+    except Exception as e:
+        _fail(conn, job, f"Extraction failed: {e}")
+        return
+
+    if job["kind"] == "text":
+        _apply_text(conn, job, found)
+        return
+
+    # no text layer on the pages that matter: wait for an OCR worker
+    if needs_ocr(found):
+        job["ocr"] = True
+        scans.append(job)
+        return
+
+    text_cache.store(conn.cursor(), job["sha256"], found)
+    conn.commit()
+    _apply(conn, job, found)
+
+
+def observe_analysis(found):
+    """
+    Adds one analysis (fresh or from the text cache) to the metrics.
+    """
+    if found.get("cache_hit"):
+        metrics.inc("pdf_text_cache_hits_total")
+        return
+    metrics.observe("pdf_stage_duration_seconds", found["extract_ms"] / 1000, stage="extract")
+    metrics.observe("pdf_stage_duration_seconds", found["detect_ms"] / 1000, stage="detect")
+    if found.get("ocr_pages"):
+        metrics.observe("pdf_stage_duration_seconds", found["ocr_ms"] / 1000, stage="ocr")
+
+
+def _apply(conn, job, found):
+    observe_analysis(found)
+    cursor = conn.cursor()
+    try:
+        if job["kind"] == "create":
+            result = create_case_from_pdf(cursor, job["filename"], found, job["sha256"])
+        elif job["kind"] == "import":
+            result = import_case_from_pdf(cursor, job["filename"], found, job["sha256"])
+        else:
+            result = update_case_from_pdf(cursor, job["case_id"], job["filename"], found, job["sha256"])
+    except JobError as e:
+        conn.rollback()
+        _fail(conn, job, str(e), retry=False)
+        return
+
+    if job["kind"] == "update":
+        export_cache.invalidate(job["case_id"])
+    if result.get("status") != "duplicate":
+        queue_full_text(cursor, result["case_id"], job["filename"], job["sha256"], found)
+
+    cursor.execute("""
+        UPDATE pdf_jobs
+        SET status='done', error=NULL, result=?, finished_at=?,
+            extract_ms=?, detect_ms=?, cache_hit=?
+        WHERE id=?
+    """, (
+        json.dumps(result), time.time(), found["extract_ms"], found["detect_ms"],
+        int(found.get("cache_hit", False)), job["id"]
+    ))
+    conn.commit()
+    metrics.flush()
+
+
+def queue_full_text(cursor, case_id, filename, sha256, found):
+    """
+    Queues a "text" job when the analysis did not read every page (in
+    the caller's transaction). Scans are left out: their other pages
+    would need OCR.
+    """
+    if not case_id or found["pages_read"] >= found["page_count"] or found.get("scanned_pages"):
+        return
+    cursor.execute("""
+        INSERT INTO pdf_jobs (kind, case_id, filename, sha256, created_at)
+        VALUES ('text', ?, ?, ?, ?)
+    """, (case_id, filename, sha256, time.time()))
+
+
+def _apply_text(conn, job, found):
+    metrics.observe("pdf_stage_duration_seconds", found["extract_ms"] / 1000, stage="full_text")
+
+    # the case may have been deleted meanwhile
+    cursor = conn.cursor()
+    cursor.execute(
+        "INSERT OR REPLACE INTO case_text (case_id, text) SELECT id, ? FROM cases WHERE id=?",
+        (found["text"], job["case_id"])
+    )
+    # the next upload of the same bytes gets it from the cache
+    text_cache.store_full_text(cursor, job["sha256"], found["text"])
+    cursor.execute("""
+        UPDATE pdf_jobs
+        SET status='done', error=NULL, result=?, finished_at=?, extract_ms=?
+        WHERE id=?
+    """, (
+        json.dumps({"case_id": job["case_id"], "chars": len(found["text"])}),
+        time.time(), found["extract_ms"], job["id"]
+    ))
+    conn.commit()
+    metrics.flush()
+
+
+def _heartbeat(conn, scans):
+    """
+    Scans waiting for an OCR worker are still this dispatcher's: a fresh
+    started_at keeps another worker's _requeue_stale from running them
+    a second time.
+    """
+    now = time.time()
+    conn.executemany("UPDATE pdf_jobs SET started_at=? WHERE id=?", [(now, job["id"]) for job in scans])
+    conn.commit()
+
+
+def _ocr_running(running):
+    return sum(1 for job in running.values() if job.get("ocr"))
+
+
+def _submit(running, pool, job):
+    job["pool"] = pool
+    job.pop("started", None)
+    running[pool.submit(_analyse, job["id"], job["kind"], job["path"], job.get("ocr", False))] = job
+
+
+def _picked_up(conn, pool, running):
+    """
+    Starts the timeout of every job a worker of pool has begun on.
+    """
+    by_id = {job["id"]: job for job in running.values() if job["pool"] is pool}
+    while not pool.started.empty():
+        job_id, started_at = pool.started.get()
+        job = by_id.get(job_id)
+        if job:
+            job["started"] = time.monotonic()
+            conn.execute("UPDATE pdf_jobs SET started_at=? WHERE id=?", (started_at, job_id))
+    conn.commit()
+
+
+def _timed_out(conn, pool, running):
+    """
+    Fails the jobs of pool that ran over JOB_TIMEOUT. Their processes
+    are killed with the pool; the other jobs it was running go to the
+    new pool returned.
+    """
+    now = time.monotonic()
+    hung = [
+        future for future, job in running.items()
+        if job["pool"] is pool and "started" in job and now - job["started"] > JOB_TIMEOUT
+    ]
+    if not hung:
+        return pool
+
+    # the same PDF would only hang again
+    for future in hung:
+        _fail(conn, running.pop(future), "Timed out", retry=False)
+
+    log.warning("killing a pool with %d hung job(s)", len(hung))
+    _kill(pool)
+    new = make_pool(pool.workers, pool.low_priority)
+
+    for future, job in list(running.items()):
+        if job["pool"] is pool:
+            running.pop(future)
+            _submit(running, new, job)
+    return new
+
+
+def _run(upload_folder):
+    conn = db.connect()
+    pool = make_pool()
+    ocr_pool = make_ocr_pool()
+    running = {}
+    scans = deque()    # jobs waiting for an OCR worker
+    last_heartbeat = time.monotonic()
+
+    _requeue_stale(conn)
+
+    while True:
+        try:
+            while len(running) - _ocr_running(running) < PDF_WORKERS:
+                job = _claim(conn)
+                if not job:
+                    break
+
+                # same bytes seen before: skip PyPDF2 entirely
+                if job["kind"] != "text":
+                    found = text_cache.lookup(conn.cursor(), job["sha256"])
+                    conn.commit()
+                    if found:
+                        _apply(conn, job, found)
+                        continue
+
+                # jobs queued before the document store name a file in uploads/
+                path = documents.blob_path(job["sha256"]) if job["sha256"] else ""
+                if not os.path.exists(path):
+                    path = os.path.join(upload_folder, job["filename"])
+                job["path"] = path
+                try:
+                    _submit(running, pool, job)
+                except Exception as e:
+                    _fail(conn, job, f"Worker error: {e}")
+                    raise
+
+            # one scan per free OCR worker
+            while scans and _ocr_running(running) < ocr.OCR_WORKERS:
+                _submit(running, ocr_pool, scans.popleft())
+
+            if time.monotonic() - last_heartbeat > HEARTBEAT:
+                if scans:
+                    _heartbeat(conn, scans)
+                last_heartbeat = time.monotonic()
+
+            if not running:
+                _wake.wait(POLL_INTERVAL)
+                _wake.clear()
+                continue
+
+            done, _ = wait(running, timeout=POLL_INTERVAL, return_when=FIRST_COMPLETED)
+            for future in done:
+                _finish(conn, running.pop(future), future, scans)
+
+            _picked_up(conn, pool, running)
+            _picked_up(conn, ocr_pool, running)
+            pool = _timed_out(conn, pool, running)
+            ocr_pool = _timed_out(conn, ocr_pool, running)
+
+        except Exception as e:
+            # keep the dispatcher alive, a broken pool is rebuilt
+            log.exception("pdf job dispatcher error")
+            if conn.in_transaction:
+                conn.rollback()
+            for job in list(running.values()) + list(scans):
+                _fail(conn, job, f"Worker error: {e}")
+            running = {}
+            scans.clear()
+            _kill(pool)
+            _kill(ocr_pool)
+            pool = make_pool()
+            ocr_pool = make_ocr_pool()
+            time.sleep(POLL_INTERVAL)
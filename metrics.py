@@ -0,0 +1,218 @@
+import atexit
+import bisect
+import glob
+import json
+import os
+import threading
+import time
+
+
+# =========================================================
+#               METRICS (PROMETHEUS TEXT FORMAT)
+# =========================================================
+# Counters and latency histograms live in process memory and are written
+# to METRICS_DIR/<pid>.json at most every FLUSH_INTERVAL seconds. /metrics
+# adds up every file, so a scrape sees all gunicorn workers rather than
+# whichever one answered it.
+#
+# Labels must stay low-cardinality: route rules, not URLs; statement
+# kinds and table names, not SQL text.
+
+METRICS_DIR = os.environ.get("METRICS_DIR", os.path.join("cache", "metrics"))
+FLUSH_INTERVAL = 5.0   # seconds
+PREFIX = "lawery_"
+
+# seconds, from an indexed lookup up to a slow PDF build
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# name: (type, help)
+METRICS = {
+    "http_request_duration_seconds": ("histogram", "Request latency by route rule, method and status."),
+    "sql_query_duration_seconds": ("histogram", "Time in sqlite execute() by statement kind (fetches excluded)."),
+    "sql_slow_queries_total": ("counter", "Statements slower than SLOW_QUERY_MS."),
+    "sql_full_scans_total": ("counter", "Slow statements whose plan scans a whole table, by table."),
+    "pdf_stage_duration_seconds": ("histogram", "PDF analysis time by stage (extract, detect, ocr, full_text)."),
+    "pdf_text_cache_hits_total": ("counter", "PDF analyses answered from the text cache."),
+    "report_render_duration_seconds": ("histogram", "reportlab build time by report."),
+}
+
+_lock = threading.Lock()
+_state = {"hist": {}, "counters": {}, "flushed": 0.0}
+
+
+def _key(name, labels):
+    # cheap in memory; made into a "name|labels json" string on flush
+    return (name, tuple(sorted(labels.items())))
+
+
+def _file_key(key):
+    return key[0] + "|" + json.dumps(key[1])
+
+
+def _reset_state():
+    _state.update(hist={}, counters={}, flushed=0.0)
+
+
+# a forked worker starts from zero, not from the master's numbers
+os.register_at_fork(after_in_child=_reset_state)
+
+
+def observe(name, seconds, **labels):
+    with _lock:
+        hist = _state["hist"]
+        key = _key(name, labels)
+        h = hist.get(key)
+        if h is None:
+            # bucket counts, then sum, then count
+            h = hist[key] = [0] * len(BUCKETS) + [0.0, 0]
+        i = bisect.bisect_left(BUCKETS, seconds)
+        if i < len(BUCKETS):
+            h[i] += 1
+        h[-2] += seconds
+        h[-1] += 1
+
+
+def inc(name, value=1, **labels):
+    with _lock:
+        counters = _state["counters"]
+        key = _key(name, labels)
+        counters[key] = counters.get(key, 0) + value
+
+
+class timer:
+    """
+    with metrics.timer("pdf_stage_duration_seconds", stage="extract"): ...
+    """
+    def __init__(self, name, **labels):
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.name, time.perf_counter() - self.t0, **self.labels)
+
+
+# ---------------- PER-PROCESS FILES ----------------
+def prune():
+    """
+    Drops the files of processes that have exited (a previous run, a
+    recycled worker). Live workers' files are left alone.
+    """
+    for path in glob.glob(os.path.join(METRICS_DIR, "*.json")):
+        try:
+            os.kill(int(os.path.basename(path)[:-len(".json")]), 0)
+        except ValueError:
+            continue
+        except ProcessLookupError:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        except PermissionError:
+            # exists, owned by someone else
+            pass
+
+
+def flush(force=False):
+    with _lock:
+        state = _state
+        now = time.monotonic()
+        if not force and now - state["flushed"] < FLUSH_INTERVAL:
+            return
+        if not state["hist"] and not state["counters"]:
+            return
+        state["flushed"] = now
+        data = json.dumps({
+            "hist": {_file_key(k): v for k, v in state["hist"].items()},
+            "counters": {_file_key(k): v for k, v in state["counters"].items()}
+        })
+
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    path = os.path.join(METRICS_DIR, f"{os.getpid()}.json")
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+@atexit.register
+def _flush_at_exit():
+    try:
+        flush(force=True)
+    except OSError:
+        # the working directory may be gone by now (benchmarks, tests)
+        pass
+
+
+def collect():
+    """
+    Every process file added together: (histograms, counters).
+    """
+    flush(force=True)
+
+    hist = {}
+    counters = {}
+    for path in glob.glob(os.path.join(METRICS_DIR, "*.json")):
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            continue
+
+        for key, h in data["hist"].items():
+            total = hist.setdefault(key, [0] * len(h))
+            for i, v in enumerate(h):
+                total[i] += v
+        for key, v in data["counters"].items():
+            counters[key] = counters.get(key, 0) + v
+
+    return hist, counters
+
+
+# ---------------- EXPOSITION ----------------
+def _labels(pairs, extra=()):
+    pairs = list(pairs) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (
+        '%s="%s"' % (k, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for k, v in pairs
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+def render():
+    """
+    Prometheus text exposition (version 0.0.4) of every worker's metrics.
+    """
+    hist, counters = collect()
+
+    series = {}
+    for key, value in list(hist.items()) + list(counters.items()):
+        name, labels = key.split("|", 1)
+        series.setdefault(name, []).append((json.loads(labels), value))
+
+    lines = []
+    for name in sorted(series):
+        kind, help_text = METRICS.get(name, ("untyped", ""))
+        full = PREFIX + name
+        lines.append(f"# HELP {full} {help_text}")
+        lines.append(f"# TYPE {full} {kind}")
+
+        for labels, value in sorted(series[name], key=lambda s: s[0]):
+            if kind != "histogram":
+                lines.append(f"{full}{_labels(labels)} {value}")
+                continue
+
+            cumulative = 0
+            for bound, n in zip(BUCKETS, value):
+                cumulative += n
+                lines.append(f"{full}_bucket{_labels(labels, [('le', repr(bound))])} {cumulative}")
+            lines.append(f"{full}_bucket{_labels(labels, [('le', '+Inf')])} {value[-1]}")
+            lines.append(f"{full}_sum{_labels(labels)} {value[-2]:.6f}")
+            lines.append(f"{full}_count{_labels(labels)} {value[-1]}")
+
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,340 @@
+import time
+
+from werkzeug.security import generate_password_hash
+
+import bulk_import
+import cause_lists
+import clients
+import documents
+import hearings
+import jobs
+from pdf_helpers import to_iso_date
+
+
+# =========================================================
+#                  SCHEMA MIGRATIONS
+# =========================================================
+# Numbered steps, each applied once and recorded in schema_version.
+# migrate() runs from "flask --app app migrate" or once at import (the
+# gunicorn --preload master); when the schema is current it costs one
+# SELECT. Each step runs inside BEGIN IMMEDIATE, so two processes never
+# apply the same step and a failed step leaves nothing behind.
+#
+# Steps use IF NOT EXISTS / column checks, so databases created before
+# schema_version existed migrate cleanly from version 0.
+
+DEFAULT_USERNAME = "lawyer"
+DEFAULT_PASSWORD = "1234"
+
+
+# ---------------- 1: BASE TABLES ----------------
+def create_base_tables(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS cases (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            client_name TEXT,
+            case_title TEXT,
+            case_number TEXT,
+            case_year TEXT,
+            case_type TEXT,
+            court TEXT,
+            hearing_date TEXT,
+            status TEXT,
+            document TEXT
+        )
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS lawyer (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE,
+            password TEXT
+        )
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS notes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            case_id INTEGER,
+            note TEXT,
+            created_at TEXT
+        )
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS clients (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT UNIQUE,
+            phone TEXT,
+            email TEXT,
+            address TEXT,
+            created_at TEXT
+        )
+    """)
+
+    cursor.execute("PRAGMA table_info(cases)")
+    cols = [c[1] for c in cursor.fetchall()]
+
+    if "case_type" not in cols:
+        cursor.execute("ALTER TABLE cases ADD COLUMN case_type TEXT DEFAULT ''")
+
+    # the password KDF is slow on purpose: only hash when seeding
+    cursor.execute("SELECT 1 FROM lawyer WHERE username=?", (DEFAULT_USERNAME,))
+    if not cursor.fetchone():
+        cursor.execute(
+            "INSERT INTO lawyer (username, password) VALUES (?, ?)",
+            (DEFAULT_USERNAME, generate_password_hash(DEFAULT_PASSWORD))
+        )
+
+
+# ---------------- 2: HOT QUERY INDEXES ----------------
+def create_indexes(cursor):
+    # /get_cases filters and keyset ordering, duplicate checks on import
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_cases_hearing_date ON cases (hearing_date, id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_cases_status ON cases (status, id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_cases_court ON cases (court, id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_cases_type_year ON cases (case_type, case_year, id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_cases_number_year ON cases (case_number, case_year)")
+
+    # a case's notes, newest first
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_notes_case ON notes (case_id, id)")
+
+
+# ---------------- 3: ISO HEARING DATES ----------------
+# hearing_date is always stored as ISO YYYY-MM-DD (or ''), so date ranges
+# compare as text and run straight off idx_cases_hearing_date.
+
+def normalize_hearing_dates(cursor):
+    """
+    Rewrites any hearing_date not already in ISO form (old rows).
+    """
+    cursor.execute("""
+        SELECT id, hearing_date FROM cases
+        WHERE hearing_date != ''
+          AND hearing_date NOT GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]'
+    """)
+    rows = cursor.fetchall()
+
+    cursor.executemany(
+        "UPDATE cases SET hearing_date=? WHERE id=?",
+        [(to_iso_date(value), case_id) for case_id, value in rows]
+    )
+
+
+# ---------------- 4: FULL TEXT SEARCH ----------------
+# case_search is an FTS5 index with one row per case (rowid = cases.id)
+# holding the case fields, all of its notes and the text of its last PDF.
+# Triggers rebuild a case's row whenever any of those change.
+
+SEARCH_ROW_SQL = """
+    DELETE FROM case_search WHERE rowid = {id};
+    INSERT INTO case_search (
+        rowid, client_name, case_title, case_number, case_year,
+        case_type, court, notes, document_text
+    )
+    SELECT c.id, c.client_name, c.case_title, c.case_number, c.case_year,
+           c.case_type, c.court,
+           (SELECT group_concat(note, ' ') FROM notes WHERE case_id = c.id),
+           (SELECT text FROM case_text WHERE case_id = c.id)
+    FROM cases c
+    WHERE c.id = {id};
+"""
+
+SEARCH_TRIGGERS = {
+    "cases_search_ai": "AFTER INSERT ON cases",
+    "cases_search_au": "AFTER UPDATE OF client_name, case_title, case_number, case_year, case_type, court ON cases",
+    "notes_search_ai": "AFTER INSERT ON notes",
+    "notes_search_au": "AFTER UPDATE ON notes",
+    "case_text_search_ai": "AFTER INSERT ON case_text",
+    "case_text_search_au": "AFTER UPDATE ON case_text",
+}
+
+
+def init_search_index(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS case_text (
+            case_id INTEGER PRIMARY KEY,
+            text TEXT
+        )
+    """)
+
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE name='case_search'")
+    exists = cursor.fetchone()
+
+    cursor.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS case_search USING fts5(
+            client_name, case_title, case_number, case_year,
+            case_type, court, notes, document_text,
+            tokenize = 'unicode61 remove_diacritics 2',
+            prefix = '2 3'
+        )
+    """)
+
+    for name, event in SEARCH_TRIGGERS.items():
+        key = "new.id" if name.startswith("cases") else "new.case_id"
+        cursor.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {name} {event} BEGIN"
+            + SEARCH_ROW_SQL.format(id=key)
+            + "END"
+        )
+
+    cursor.execute(
+        "CREATE TRIGGER IF NOT EXISTS notes_search_ad AFTER DELETE ON notes BEGIN"
+        + SEARCH_ROW_SQL.format(id="old.case_id")
+        + "END"
+    )
+
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS cases_search_ad AFTER DELETE ON cases BEGIN
+            DELETE FROM case_search WHERE rowid = old.id;
+            DELETE FROM case_text WHERE case_id = old.id;
+        END
+    """)
+
+    # first run on an existing database: index what is already there
+    if not exists:
+        cursor.execute("""
+            INSERT INTO case_search (
+                rowid, client_name, case_title, case_number, case_year,
+                case_type, court, notes, document_text
+            )
+            SELECT c.id, c.client_name, c.case_title, c.case_number, c.case_year,
+                   c.case_type, c.court,
+                   (SELECT group_concat(note, ' ') FROM notes WHERE case_id = c.id),
+                   (SELECT text FROM case_text WHERE case_id = c.id)
+            FROM cases c
+        """)
+
+
+# ---------------- 5: DASHBOARD COUNTERS ----------------
+# case_status_counts keeps one row per status with the number of cases,
+# maintained by triggers so the dashboard never has to count the table.
+
+def init_case_stats(cursor):
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE name='case_status_counts'")
+    exists = cursor.fetchone()
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS case_status_counts (
+            status TEXT PRIMARY KEY,
+            total INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS cases_stats_ai AFTER INSERT ON cases BEGIN
+            INSERT INTO case_status_counts (status, total)
+            VALUES (COALESCE(new.status, ''), 1)
+            ON CONFLICT(status) DO UPDATE SET total = total + 1;
+        END
+    """)
+
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS cases_stats_ad AFTER DELETE ON cases BEGIN
+            UPDATE case_status_counts SET total = total - 1
+            WHERE status = COALESCE(old.status, '');
+        END
+    """)
+
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS cases_stats_au AFTER UPDATE OF status ON cases
+        WHEN COALESCE(old.status, '') != COALESCE(new.status, '') BEGIN
+            UPDATE case_status_counts SET total = total - 1
+            WHERE status = COALESCE(old.status, '');
+            INSERT INTO case_status_counts (status, total)
+            VALUES (COALESCE(new.status, ''), 1)
+            ON CONFLICT(status) DO UPDATE SET total = total + 1;
+        END
+    """)
+
+    if not exists:
+        cursor.execute("""
+            INSERT INTO case_status_counts (status, total)
+            SELECT COALESCE(status, ''), COUNT(*) FROM cases GROUP BY COALESCE(status, '')
+        """)
+
+
+# ---------------- RUNNER ----------------
+# (version, name, step, transactional). A non-transactional step gets
+# the connection and commits in batches itself; it must be safe to rerun.
+MIGRATIONS = [
+    (1, "base tables", create_base_tables, True),
+    (2, "hot query indexes", create_indexes, True),
+    (3, "iso hearing dates", normalize_hearing_dates, True),
+    (4, "full text search", init_search_index, True),
+    (5, "dashboard counters", init_case_stats, True),
+    (6, "pdf jobs and text cache", jobs.init_jobs_table, True),
+    (7, "hearing history", hearings.init_hearings_table, True),
+    (8, "cause list snapshots", cause_lists.init_cause_list_table, True),
+    (9, "clients link", clients.init_clients_table, True),
+    (10, "clients backfill", clients.backfill, False),
+    (11, "document store", documents.init_documents_table, True),
+    (12, "legacy uploads into the store", documents.import_legacy_uploads, False),
+    (13, "document filename index", documents.init_filename_index, True),
+    (14, "bulk import batches", bulk_import.init_batch_table, True),
+    (15, "drop moved hearings", hearings.drop_moved_hearings, True),
+    (16, "cause lists check hearing dates", cause_lists.check_hearing_dates, True),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def current_version(conn):
+    cursor = conn.cursor()
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='schema_version'")
+    if not cursor.fetchone():
+        return 0
+    cursor.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+    return cursor.fetchone()[0]
+
+
+def migrate(conn, log=None):
+    """
+    Applies every pending step in order. Returns the versions applied.
+    """
+    if current_version(conn) >= LATEST_VERSION:
+        return []
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at REAL NOT NULL,
+            duration_ms REAL
+        )
+    """)
+    conn.commit()
+
+    applied = []
+    for version, name, step, transactional in MIGRATIONS:
+        started = time.perf_counter()
+
+        # the write lock is taken before re-checking, so only one
+        # process runs a step
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if conn.execute("SELECT 1 FROM schema_version WHERE version=?", (version,)).fetchone():
+                conn.rollback()
+                continue
+
+            if transactional:
+                step(conn.cursor())
+            else:
+                conn.rollback()
+                step(conn)
+                conn.execute("BEGIN IMMEDIATE")
+
+            conn.execute(
+                "INSERT OR IGNORE INTO schema_version (version, name, applied_at, duration_ms) VALUES (?, ?, ?, ?)",
+                (version, name, time.time(), round((time.perf_counter() - started) * 1000, 1))
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+        applied.append(version)
+        if log:
+            log(f"applied {version}: {name}")
+
+    return applied
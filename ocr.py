@@ -0,0 +1,234 @@
+import hashlib
+import io
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+
+from PIL import Image
+
+
+# =========================================================
+#             OCR FOR SCANNED ORDERS (TESSERACT)
+# =========================================================
+# Pages with no text layer are image-only scans. analyse_pdf(use_ocr=True)
+# reads the first / last ones through the tesseract binary; jobs.py runs
+# that in its own small process pool, so scans queue behind each other
+# instead of taking the PDF workers normal uploads need.
+#
+# A scanned page is one page-sized embedded image, which is OCR'd as it
+# is: nothing has to be rasterized. The text is cached under the sha256
+# of the image bytes, so the same scan in another upload (or a retry) is
+# never OCR'd twice. Without tesseract on the PATH scans simply come
+# back without text, as before.
+
+TESSERACT = os.environ.get("TESSERACT", "tesseract")
+OCR_LANG = os.environ.get("OCR_LANG", "eng")
+# per gunicorn worker: each one that gets an upload runs its own
+# dispatcher and pools, so up to WEB_CONCURRENCY x OCR_WORKERS at once
+OCR_WORKERS = int(os.environ.get("OCR_WORKERS", 1))
+PAGE_TIMEOUT = int(os.environ.get("OCR_PAGE_TIMEOUT", 20))   # seconds per page
+
+# smaller images are logos and stamps, not a scanned page
+MIN_SCAN_PIXELS = 600 * 600
+
+CACHE_DIR = os.path.join("cache", "ocr")
+MAX_CACHE_BYTES = 50 * 1024 * 1024
+
+log = logging.getLogger(__name__)
+
+
+def available():
+    return shutil.which(TESSERACT) is not None
+
+
+def init_worker():
+    """
+    OCR pool initializer: tesseract runs below the web workers' priority.
+    """
+    try:
+        os.nice(10)
+    except OSError:
+        pass
+
+
+# raw pixel layouts PIL can take as they are
+_MODES = {
+    ("/DeviceGray", 1): "1",
+    ("/DeviceGray", 8): "L",
+    ("/DeviceRGB", 8): "RGB",
+    ("/DeviceCMYK", 8): "CMYK",
+}
+
+# image file type of data PyPDF2 leaves encoded
+_ENCODED = {"/DCTDecode": ".jpg", "/JPXDecode": ".jp2", "/CCITTFaxDecode": ".tiff"}
+
+
+def _largest_image(page):
+    """
+    The page's largest image XObject if it is big enough to be a scan,
+    from the image dictionaries alone (nothing is decoded).
+    """
+    best = None
+    best_pixels = MIN_SCAN_PIXELS - 1
+    try:
+        xobjects = page["/Resources"]["/XObject"]
+        for name in xobjects:
+            obj = xobjects[name]
+            if obj.get("/Subtype") != "/Image":
+                continue
+            pixels = obj.get("/Width", 0) * obj.get("/Height", 0)
+            if pixels > best_pixels:
+                best, best_pixels = obj, pixels
+    except (KeyError, TypeError, AttributeError):
+        return None
+    return best
+
+
+def has_scan(page):
+    """
+    Whether a PyPDF2 page carries a page-sized image.
+    """
+    return _largest_image(page) is not None
+
+
+def page_scan(page):
+    """
+    The scanned image of a PyPDF2 page as (file suffix, bytes), or None
+    when there is none or it is in a format we cannot hand to tesseract.
+    """
+    obj = _largest_image(page)
+    if obj is None:
+        return None
+
+    try:
+        filters = obj.get("/Filter") or []
+        if not isinstance(filters, list):
+            filters = [filters]
+        data = obj.get_data()    # every filter but the image codecs undone
+
+        last = filters[-1] if filters else None
+        if last in _ENCODED:
+            return _ENCODED[last], data
+
+        mode = _MODES.get((obj.get("/ColorSpace"), obj.get("/BitsPerComponent")))
+        if not mode:
+            log.warning("unsupported scan colour space %s", obj.get("/ColorSpace"))
+            return None
+        img = Image.frombytes(mode, (obj["/Width"], obj["/Height"]), data)
+        out = io.BytesIO()
+        img.save(out, "PNG")
+        return ".png", out.getvalue()
+    except Exception as e:
+        log.warning("unreadable page image: %s", e)
+        return None
+
+
+def page_text(page):
+    """
+    OCR text of an image-only page, "" when there is no scan on it, no
+    tesseract, or it ran over PAGE_TIMEOUT.
+    """
+    scan = page_scan(page)
+    if not scan:
+        return ""
+
+    suffix, data = scan
+    key = hashlib.sha256(data).hexdigest()
+    text = _cached(key)
+    if text is not None:
+        return text
+
+    text = _tesseract(suffix, data)
+    if text is not None:
+        _store(key, text)
+    return text or ""
+
+
+def _tesseract(suffix, data):
+    """
+    Runs tesseract on one image. None when it failed or timed out (not
+    cached, a later attempt may do better).
+    """
+    with tempfile.NamedTemporaryFile(suffix=suffix) as f:
+        f.write(data)
+        f.flush()
+
+        # one thread per page: the pool size is the CPU budget for OCR
+        env = dict(os.environ, OMP_THREAD_LIMIT="1")
+        t0 = time.perf_counter()
+        try:
+            done = subprocess.run(
+                [TESSERACT, f.name, "stdout", "-l", OCR_LANG],
+                capture_output=True, timeout=PAGE_TIMEOUT, env=env
+            )
+        except subprocess.TimeoutExpired:
+            log.warning("OCR timed out after %ss", PAGE_TIMEOUT)
+            return None
+        except OSError as e:
+            log.warning("OCR could not start: %s", e)
+            return None
+
+    if done.returncode != 0:
+        log.warning("OCR failed: %s", done.stderr.decode("utf-8", "replace")[-500:])
+        return None
+
+    log.info("OCR'd a %d byte scan in %.1fs", len(data), time.perf_counter() - t0)
+    return done.stdout.decode("utf-8", "replace")
+
+
+# ---------------- PAGE CACHE ----------------
+def _cache_path(key):
+    return os.path.join(CACHE_DIR, key[:2], key + ".txt")
+
+
+def _cached(key):
+    path = _cache_path(key)
+    try:
+        with open(path, encoding="utf-8") as f:
+            text = f.read()
+        os.utime(path)    # recently used, evicted last
+    except OSError:
+        return None
+    return text
+
+
+def _store(key, text):
+    path = _cache_path(key)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp, path)
+        _evict()
+    except OSError as e:
+        log.warning("could not cache OCR text: %s", e)
+
+
+def _evict():
+    """
+    Drops the least recently used pages while over MAX_CACHE_BYTES.
+    """
+    files = []
+    total = 0
+    for root, _, names in os.walk(CACHE_DIR):
+        for name in names:
+            if name.endswith(".txt"):
+                st = os.stat(os.path.join(root, name))
+                files.append((st.st_mtime, st.st_size, os.path.join(root, name)))
+                total += st.st_size
+
+    if total <= MAX_CACHE_BYTES:
+        return
+
+    for _, size, path in sorted(files):
+        if total <= MAX_CACHE_BYTES:
+            break
+        try:
+            os.remove(path)
+            total -= size
+        except OSError:
+            pass
@@ -0,0 +1,457 @@
+import logging
+import os
+import re
+import time
+from datetime import date, datetime
+
+# PDF Text Extraction
+import PyPDF2
+
+import courts
+import ocr
+
+# Bump whenever extraction or detection output changes, so cached
+# results from the old code are not reused (see text_cache.py).
+EXTRACTOR_VERSION = 6
+
+# Court, case number and parties are on the first page(s), "List on
+# dd.mm.yyyy" is on the last one (see PAGE_NEEDS). The ceilings protect
+# workers from pathological uploads.
+FIRST_PAGES = int(os.environ.get("PDF_FIRST_PAGES", 2))
+LAST_PAGES = int(os.environ.get("PDF_LAST_PAGES", 2))
+MAX_PAGES = int(os.environ.get("PDF_MAX_PAGES", 300))
+MAX_PDF_BYTES = int(os.environ.get("PDF_MAX_BYTES", 50 * 1024 * 1024))
+
+log = logging.getLogger(__name__)
+
+
+# =========================================================
+#                    PDF HELPERS (PHASE 6)
+# =========================================================
+
+class PdfPages:
+    """
+    Lazy, memoized page text for one PDF. Pages are only parsed when
+    asked for, and never beyond MAX_PAGES / MAX_PDF_BYTES.
+    Pages in ocr_pages that have no text layer are OCR'd (see ocr.py).
+    """
+
+    def __init__(self, pdf_path, max_pages=MAX_PAGES):
+        self.reader = None
+        self.count = 0
+        self.texts = {}
+        self.ocr_pages = set()
+        self.no_text = set()    # pages without a text layer
+        self.ocr_read = []
+        self.ocr_s = 0.0
+
+        try:
+            if os.path.getsize(pdf_path) > MAX_PDF_BYTES:
+                return
+            self.reader = PyPDF2.PdfReader(pdf_path)
+            self.count = min(len(self.reader.pages), max_pages)
+        except Exception as e:
+            log.warning("unreadable PDF %s: %s", pdf_path, e)
+            self.reader = None
+            self.count = 0
+
+    def page(self, i):
+        if i not in self.texts:
+            t = ""
+            try:
+                t = self.reader.pages[i].extract_text() or ""
+            except Exception as e:
+                log.warning("no text from page %d: %s", i + 1, e)
+
+            if not t.strip():
+                self.no_text.add(i)
+            if i in self.no_text and i in self.ocr_pages:
+                t0 = time.perf_counter()
+                t = ocr.page_text(self.reader.pages[i])
+                self.ocr_s += time.perf_counter() - t0
+                self.ocr_read.append(i)
+
+            self.texts[i] = t
+        return self.texts[i]
+
+    def iter_pages(self, indexes):
+        for i in indexes:
+            yield i, self.page(i)
+
+    def text(self):
+        """
+        Text of every page read so far, in page order.
+        """
+        return "".join("\n" + self.texts[i] for i in sorted(self.texts) if self.texts[i])
+
+
+def extract_text_from_pdf(pdf_path):
+    pages = PdfPages(pdf_path)
+    parts = []
+    for _, t in pages.iter_pages(range(pages.count)):
+        if t:
+            parts.append("\n" + t)
+    return "".join(parts)
+
+
+def normalize_date_to_html(date_str):
+    """
+    Converts:
+    20.01.2026  -> 2026-01-20
+    20/01/2026  -> 2026-01-20
+    20-01-2026  -> 2026-01-20
+    """
+    if not date_str:
+        return ""
+
+    date_str = date_str.strip()
+    date_str = date_str.replace("/", ".").replace("-", ".")
+
+    try:
+        dt = datetime.strptime(date_str, "%d.%m.%Y")
+        return dt.strftime("%Y-%m-%d")
+    except Exception:
+        return ""
+
+
+def to_iso_date(value):
+    """
+    YYYY-MM-DD as is, DD.MM.YYYY / DD/MM/YYYY / DD-MM-YYYY converted,
+    anything else becomes ''.
+    """
+    value = (value or "").strip()
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").strftime("%Y-%m-%d")
+    except ValueError:
+        return normalize_date_to_html(value)
+
+
+# =========================================================
+#          FIELD EXTRACTION (COMPILED ONCE, READ ONCE)
+# =========================================================
+# Every pattern is compiled at import and runs at most once per text;
+# the ones that only need the first hit stop there, and the weaker date
+# patterns only run when the stronger ones found nothing. The text is
+# upper-cased once. What is court specific (markers, case types,
+# keywords, date phrases) comes from courts.RULES, compiled from the
+# court profiles in courts.py.
+# FieldScan keeps what one chunk of text had; fields() turns it into
+# the values stored on a case.
+
+# "\nRAM KUMAR .....Petitioner"
+PARTY_RE = re.compile(r"\n([A-Z0-9 &.,\-()\/]+)\s+\.{2,}(Petitioner|Respondent)")
+
+PLAIN_NUMBER_RE = re.compile(r"([0-9]+)\s*\/\s*([0-9]{4})")
+
+# how sure each field is, by how it was found
+CONFIDENCE = {
+    "court": 1.0,
+    "reference": 1.0,
+    "plain_number": 0.4,
+    "bare_type": 0.6,
+    "keyword": 0.5,
+    "both_parties": 1.0,
+    "petitioner_only": 0.5,
+    "list_on": 1.0,
+    "fixed_for": 0.8,
+    "date": 0.3,
+}
+
+
+def _iso_date(day, month, year):
+    """
+    normalize_date_to_html() for an already matched DATE, without strptime.
+    """
+    try:
+        return date(int(year), int(month), int(day)).isoformat()
+    except ValueError:
+        return ""
+
+
+class FieldScan:
+    """
+    Everything one scan of a chunk of text found. The first match of
+    each kind is kept, except dates, where the last one is.
+    """
+
+    def __init__(self, text=""):
+        rules = courts.RULES
+        upper = text.upper()
+
+        self.court_names, self.keywords = rules.terms_in(upper)
+
+        # per court: first reference, first bare type
+        self.references, self.reference, self.bare_types = rules.references(upper, self.court_names)
+
+        self.plain_number = None   # (matched text, number, year)
+        if not self.reference:
+            m = PLAIN_NUMBER_RE.search(text)
+            self.plain_number = (m.group(0), m.group(1), m.group(2)) if m else None
+
+        self.parties = {}
+        for m in PARTY_RE.finditer(text):
+            self.parties.setdefault(m.group(2).upper(), m.group(1).strip())
+            if len(self.parties) == 2:
+                break
+
+        # a weaker kind never wins over a stronger one, even merged
+        self.dates = {}
+        for source, pattern in rules.date_patterns:
+            found = pattern.findall(upper)
+            if found:
+                self.dates[source] = found[-1]
+                break
+
+    def merge(self, later):
+        """
+        Adds a later chunk: it fills fields this one is missing and its
+        dates win, as if the two texts had been scanned together.
+        """
+        self.court_names |= later.court_names
+        self.keywords |= later.keywords
+        for court, reference in later.references.items():
+            self.references.setdefault(court, reference)
+        self.reference = self.reference or later.reference
+        for court, case_type in later.bare_types.items():
+            self.bare_types.setdefault(court, case_type)
+        self.plain_number = self.plain_number or later.plain_number
+        for role, name in later.parties.items():
+            self.parties.setdefault(role, name)
+        self.dates.update(later.dates)
+        return self
+
+    # ---------------- FIELDS ----------------
+    def court(self):
+        return courts.RULES.first_court(self.court_names)
+
+    def case_reference(self, court=None):
+        """
+        (case_full, number, year, how it was found). A reference in the
+        court's own case types wins over the first one of any court.
+        """
+        reference = self.references.get(court) or self.reference
+        if reference:
+            ct, number, year = reference
+            return (f"{ct} {number}/{year}", number, year, "reference")
+        if self.plain_number:
+            return self.plain_number + ("plain_number",)
+        return ("", "", "", None)
+
+    def case_type(self, court):
+        """
+        (dropdown case type, how it was found) for the given court.
+        """
+        if court in self.references:
+            return (self.references[court][0], "reference")
+        if court in self.bare_types:
+            return (self.bare_types[court], "bare_type")
+
+        guess = courts.RULES.keyword_type(court, self.keywords)
+        if guess:
+            return (guess, "keyword")
+
+        return ("", None)
+
+    def next_date(self):
+        """
+        (YYYY-MM-DD, how it was found), "" when there is no usable date.
+        """
+        for source in courts.DATE_SOURCES:
+            if source in self.dates:
+                return (_iso_date(*self.dates[source]), source)
+        return ("", None)
+
+    def fields(self, court=None):
+        """
+        The structured result stored on a case. court overrides the one
+        found in this text (the first pages decide it).
+        """
+        court = self.court() if court is None else court
+        case_full, number, year, reference_source = self.case_reference(court)
+        case_type, type_source = self.case_type(court)
+        next_date, date_source = self.next_date()
+
+        petitioner = self.parties.get("PETITIONER", "")
+        respondent = self.parties.get("RESPONDENT", "")
+        if petitioner and respondent:
+            parties_source = "both_parties"
+        elif petitioner:
+            parties_source = "petitioner_only"
+        else:
+            parties_source = None
+
+        return {
+            "court": court,
+            "case_full": case_full,
+            "case_number": number,
+            "case_year": year,
+            "case_type": case_type,
+            "case_title": f"{petitioner} vs {respondent}" if petitioner and respondent else "",
+            "client_name": petitioner,
+            "petitioner": petitioner,
+            "respondent": respondent,
+            "next_date": next_date,
+            "confidence": {
+                "court": CONFIDENCE["court"] if court else 0.0,
+                "case_number": CONFIDENCE.get(reference_source, 0.0),
+                "case_type": CONFIDENCE.get(type_source, 0.0),
+                "parties": CONFIDENCE.get(parties_source, 0.0),
+                "next_date": CONFIDENCE.get(date_source, 0.0) if next_date else 0.0,
+            },
+        }
+
+
+def extract_fields(text):
+    """
+    Every field of one text in one pass. See FieldScan.fields().
+    """
+    return FieldScan(text or "").fields()
+
+
+def detect_case_type_from_pdf(text, court):
+    """
+    Case type exactly like the dropdown values: the type of the court's
+    first "TYPE NUMBER/YEAR" (or a bare type), else a keyword guess.
+    """
+    return FieldScan(text or "").case_type(court)[0]
+
+
+# =========================================================
+#           FULL ANALYSIS (USED BY THE INGEST WORKERS)
+# =========================================================
+class PageNeed:
+    """
+    Where one detector's fields are: the first (or, from_end, the last)
+    pages pages of the document are read, then while done(scan) is false
+    it walks further in one page at a time, up to the pages another
+    detector starts from. fields are the keys of FieldScan.fields() it
+    decides.
+    """
+
+    def __init__(self, name, pages, from_end, done, fields):
+        self.name = name
+        self.pages = pages
+        self.from_end = from_end
+        self.done = done
+        self.fields = fields
+
+    def window(self, n):
+        if self.from_end:
+            return range(max(n - self.pages, 0), n)
+        return range(0, min(self.pages, n))
+
+    def walk(self, n, window):
+        """
+        Pages past the window, nearest first.
+        """
+        if self.from_end:
+            return range(window.start - 1, -1, -1)
+        return range(window.stop, n)
+
+
+def _has_reference(scan):
+    court = scan.court()
+    return bool(court and scan.case_reference(court)[0])
+
+
+def _has_date(scan):
+    return bool(scan.next_date()[0])
+
+
+# in order: the first one decides the court, the others fill in what it
+# is missing (a case type on a later page...)
+PAGE_NEEDS = (
+    PageNeed("header", FIRST_PAGES, False, _has_reference,
+             ("court", "case_full", "case_number", "case_year", "case_type",
+              "case_title", "client_name", "petitioner", "respondent")),
+    PageNeed("next_date", LAST_PAGES, True, _has_date, ("next_date",)),
+)
+
+
+def analyse_pdf(pdf_path, use_ocr=False):
+    """
+    Extracts the text and runs the field extraction over it.
+    Runs inside a worker process, so it only returns plain data.
+
+    Only the pages PAGE_NEEDS ask for are read. "text" holds those
+    pages; "pages_read" < "page_count" tells the caller the full text
+    still has to be extracted (extract_text_from_pdf) for search.
+
+    "scanned_pages" lists the pages the detectors start from that are an
+    image with no text layer. With use_ocr those are OCR'd (only them);
+    "ocr_pages" lists the pages that went to OCR.
+    """
+    extract_s = 0.0
+    detect_s = 0.0
+
+    pages = PdfPages(pdf_path)
+    n = pages.count
+    windows = [need.window(n) for need in PAGE_NEEDS]
+    starts = set().union(*windows)
+    if use_ocr:
+        pages.ocr_pages = starts
+
+    scans = {}
+
+    def scan(i):
+        nonlocal extract_s, detect_s
+        if i not in scans:
+            t0 = time.perf_counter()
+            text = pages.page(i)
+            t1 = time.perf_counter()
+            scans[i] = FieldScan("\n" + text if text else "")
+            extract_s += t1 - t0
+            detect_s += time.perf_counter() - t1
+        return scans[i]
+
+    results = []
+    for need, window in zip(PAGE_NEEDS, windows):
+        found = FieldScan()
+        for i in window:
+            found.merge(scan(i))
+
+        # still missing: walk in, a page at a time
+        for i in need.walk(n, window):
+            if need.done(found) or i in starts:
+                break
+            if need.from_end:
+                found = FieldScan().merge(scan(i)).merge(found)
+            else:
+                found.merge(scan(i))
+
+        results.append(found)
+
+    t0 = time.perf_counter()
+    court = results[0].court()
+    merged = FieldScan()
+    for found in results:
+        merged.merge(found)
+    fields = merged.fields(court)
+    for need, found in zip(PAGE_NEEDS[1:], results[1:]):
+        own = found.fields(court)
+        for key in need.fields:
+            fields[key] = own[key]
+            if key in own["confidence"]:
+                fields["confidence"][key] = own["confidence"][key]
+    detect_s += time.perf_counter() - t0
+
+    fields["text"] = pages.text()
+    fields["page_count"] = n
+    fields["pages_read"] = len(pages.texts)
+    fields["scanned_pages"] = [
+        i for i in sorted(pages.no_text & starts) if ocr.has_scan(pages.reader.pages[i])
+    ]
+    fields["ocr"] = use_ocr
+    fields["ocr_pages"] = sorted(pages.ocr_read)
+    fields["extract_ms"] = round((extract_s - pages.ocr_s) * 1000, 1)
+    fields["ocr_ms"] = round(pages.ocr_s * 1000, 1)
+    fields["detect_ms"] = round(detect_s * 1000, 1)
+    return fields
+
+
+def needs_ocr(found):
+    """
+    True for a text-layer analysis with scanned first / last pages,
+    when OCR can be run on them.
+    """
+    return bool(found.get("scanned_pages")) and not found.get("ocr") and ocr.available()
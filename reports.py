@@ -0,0 +1,393 @@
+import os
+import threading
+import time
+from datetime import datetime
+from itertools import groupby
+from xml.sax.saxutils import escape
+
+from PIL import Image as PILImage
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import inch
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Flowable
+
+import metrics
+
+
+# =========================================================
+#                 SHARED REPORT ASSETS
+# =========================================================
+# Stylesheet, table styles and the decoded logo are built once per
+# process. app.py calls preload() at import time, so under
+# gunicorn --preload the workers inherit them copy-on-write instead of
+# rebuilding them on every export.
+
+STYLES = getSampleStyleSheet()
+
+# bump when a report's layout changes, cached PDFs are rendered again
+LAYOUT_VERSION = 2
+
+# table cells too long for their column wrap in a Paragraph of this style
+CELL_STYLE = ParagraphStyle("Cell", parent=STYLES["Normal"], fontSize=8, leading=10)
+CASE_DETAIL_CELL_STYLE = ParagraphStyle("CaseDetailCell", parent=STYLES["Normal"], fontSize=10, leading=12)
+CELL_PADDING = 12    # Table's default left + right padding
+
+LOGO_SIZE = 1.2 * inch
+LOGO_DPI = 200    # the logo is downsampled to this once, not embedded full size
+
+_logo = {"path": None, "reader": None}
+
+
+def preload(logo_path):
+    """
+    Decodes the logo once and scales it down to what LOGO_SIZE needs at
+    LOGO_DPI, so every PDF embeds (and compresses) a small image.
+    Reports render without it if the file is missing.
+    """
+    if not os.path.exists(logo_path):
+        _logo.update(path=logo_path, reader=None)
+        return
+
+    pixels = int(LOGO_SIZE / inch * LOGO_DPI)
+    with PILImage.open(logo_path) as img:
+        img.load()
+        img.thumbnail((pixels, pixels))
+
+    reader = ImageReader(img)
+    reader.getRGBData()    # decode now, not on the first export
+
+    _logo.update(path=logo_path, reader=reader)
+
+
+class Logo(Flowable):
+    """
+    Draws the preloaded logo. A new (tiny) flowable per report, the
+    decoded image behind it is shared.
+    """
+
+    def __init__(self, reader, width=LOGO_SIZE, height=LOGO_SIZE):
+        super().__init__()
+        self.reader = reader
+        self.width = width
+        self.height = height
+        self.hAlign = "CENTER"
+
+    def wrap(self, available_width, available_height):
+        return self.width, self.height
+
+    def draw(self):
+        self.canv.drawImage(self.reader, 0, 0, self.width, self.height, mask="auto")
+
+
+def table_style(header_size, body_size):
+    return TableStyle([
+        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#0b3a78")),
+        ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
+        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+        ("FONTSIZE", (0, 0), (-1, 0), header_size),
+        ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
+        ("FONTSIZE", (0, 1), (-1, -1), body_size),
+        ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+        ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.whitesmoke, colors.lightgrey]),
+    ])
+
+
+# =========================================================
+#                 STREAMING HELPERS
+# =========================================================
+# Rows are read from the cursor in batches and laid out as one small
+# table per page, handed to reportlab lazily, so neither the row set nor
+# one giant Table ever has to sit in memory.
+
+ROWS_PER_TABLE = 30
+FETCH_SIZE = 500
+
+
+class LazyFlowables(list):
+    """
+    A list that refills itself from a generator as reportlab consumes
+    it, so only a few flowables exist at any time.
+    """
+
+    def __init__(self, source, lookahead=3):
+        super().__init__()
+        self.source = iter(source)
+        self.lookahead = lookahead
+
+    def _fill(self):
+        while list.__len__(self) < self.lookahead:
+            try:
+                self.append(next(self.source))
+            except StopIteration:
+                self.source = iter(())
+                break
+
+    def __len__(self):
+        self._fill()
+        return list.__len__(self)
+
+    def __getitem__(self, i):
+        self._fill()
+        return list.__getitem__(self, i)
+
+
+def iter_rows(cursor, size=FETCH_SIZE):
+    while True:
+        rows = cursor.fetchmany(size)
+        if not rows:
+            return
+        yield from rows
+
+
+def wrap_cells(cells, widths, columns, style=CELL_STYLE):
+    """
+    Turns the values in columns that are wider than their column into
+    Paragraphs, which wrap. Short values stay plain strings (cheaper).
+    """
+    for i in columns:
+        value = cells[i]
+        if value and stringWidth(value, style.fontName, style.fontSize) > widths[i] - CELL_PADDING:
+            cells[i] = Paragraph(escape(value), style)
+    return cells
+
+
+def chunked_tables(rows, header, widths, style, wrap=()):
+    """
+    Yields one Table per ROWS_PER_TABLE rows, all with the same columns.
+    rows must already be lists of cell values; the wrap columns are
+    wrapped to their width.
+    """
+    chunk = []
+    for r in rows:
+        chunk.append(wrap_cells(r, widths, wrap))
+        if len(chunk) == ROWS_PER_TABLE:
+            yield _table(header, chunk, widths, style)
+            chunk = []
+    if chunk:
+        yield _table(header, chunk, widths, style)
+
+
+def _table(header, chunk, widths, style):
+    table = Table([header] + chunk, colWidths=widths, repeatRows=1)
+    table.setStyle(style)
+    return table
+
+
+def _cells(row):
+    return [str(row[0])] + [v or "" for v in row[1:]]
+
+
+# =========================================================
+#                 REPORT TEMPLATES
+# =========================================================
+# Every report is logo + heading + generated time followed by a body
+# the template streams. render() times each build so /report_stats
+# shows where export latency goes.
+
+_timings = {}
+_timings_lock = threading.Lock()
+
+
+class ReportTemplate:
+    name = None
+    heading = None
+    pagesize = A4
+
+    def title(self, *args):
+        return self.heading
+
+    def body(self, *args):
+        raise NotImplementedError
+
+    def flowables(self, *args):
+        if _logo["reader"] is not None:
+            yield Logo(_logo["reader"])
+
+        yield Paragraph("<b>%s</b>" % escape(self.title(*args)), STYLES["Title"])
+        yield Paragraph("Generated: " + datetime.now().strftime("%d-%m-%Y %I:%M %p"), STYLES["Normal"])
+        yield Spacer(1, 12)
+
+        yield from self.body(*args)
+
+    def render(self, out, *args):
+        """
+        Builds the report into out (a path or file object).
+        Returns the render time in ms.
+        """
+        t0 = time.perf_counter()
+        doc = SimpleDocTemplate(out, pagesize=self.pagesize)
+        doc.build(LazyFlowables(self.flowables(*args)))
+        ms = (time.perf_counter() - t0) * 1000
+
+        _record(self.name, ms)
+        metrics.observe("report_render_duration_seconds", ms / 1000, report=self.name)
+        return ms
+
+
+def _record(name, ms):
+    with _timings_lock:
+        t = _timings.setdefault(name, {"count": 0, "total_ms": 0.0, "max_ms": 0.0, "last_ms": 0.0})
+        t["count"] += 1
+        t["total_ms"] += ms
+        t["max_ms"] = max(t["max_ms"], ms)
+        t["last_ms"] = ms
+
+
+def render_stats():
+    """
+    Render count and timings per report in this process.
+    """
+    with _timings_lock:
+        return {
+            name: {
+                "count": t["count"],
+                "avg_ms": round(t["total_ms"] / t["count"], 1),
+                "max_ms": round(t["max_ms"], 1),
+                "last_ms": round(t["last_ms"], 1)
+            }
+            for name, t in _timings.items()
+        }
+
+
+# ---------------- ALL CASES ----------------
+CASE_LIST_HEADER = ["ID", "Client", "Case Title", "Case No", "Year", "Case Type", "Court", "Hearing", "Status"]
+CASE_LIST_WIDTHS = [30, 100, 150, 90, 36, 70, 110, 60, 50]    # fits landscape A4
+CASE_LIST_WRAP = (1, 2, 3, 5, 6)
+CASE_LIST_STYLE = table_style(9, 8)
+
+
+class CaseListReport(ReportTemplate):
+    """
+    body(cursor): cursor has executed the case list query
+    (CASE_LIST_HEADER columns).
+    """
+    name = "case_list"
+    heading = "VIPUL KUMAR - Lawyer Case Report"
+    pagesize = landscape(A4)
+
+    def body(self, cursor):
+        rows = (_cells(r) for r in iter_rows(cursor))
+        yield from chunked_tables(rows, CASE_LIST_HEADER, CASE_LIST_WIDTHS, CASE_LIST_STYLE, CASE_LIST_WRAP)
+
+
+# ---------------- SINGLE CASE ----------------
+CASE_DETAIL_STYLE = table_style(12, 10)
+CASE_DETAIL_WIDTHS = [120, 330]    # fits portrait A4
+
+
+class CaseReport(ReportTemplate):
+    """
+    body(row): a SELECT * FROM cases row.
+    """
+    name = "case"
+    heading = "VIPUL KUMAR - Case Details"
+
+    def body(self, row):
+        data = [
+            ["Field", "Details"],
+            ["Case ID", str(row[0])],
+            ["Client Name", row[1]],
+            ["Case Title", row[2]],
+            ["Case Number", row[3] or ""],
+            ["Case Year", row[4] or ""],
+            ["Case Type", row[5] or ""],
+            ["Court", row[6] or ""],
+            ["Hearing Date", row[7] or ""],
+            ["Status", row[8] or ""],
+            ["Document", row[9] or "Not Uploaded"]
+        ]
+        for r in data[1:]:
+            wrap_cells(r, CASE_DETAIL_WIDTHS, (1,), CASE_DETAIL_CELL_STYLE)
+
+        table = Table(data, colWidths=CASE_DETAIL_WIDTHS)
+        table.setStyle(CASE_DETAIL_STYLE)
+        yield table
+
+
+# ---------------- CAUSE LIST ----------------
+CAUSE_LIST_HEADER = ["#", "Case No", "Year", "Case Type", "Case Title", "Client", "Status"]
+CAUSE_LIST_WIDTHS = [20, 58, 32, 58, 132, 101, 50]    # fits portrait A4
+CAUSE_LIST_WRAP = (1, 3, 4, 5)
+CAUSE_LIST_STYLE = table_style(9, 8)
+
+
+class CauseListReport(ReportTemplate):
+    """
+    body(rows, day): rows are (court, case_number, case_year, case_type,
+    case_title, client_name, status) ordered by court. One numbered list
+    per court.
+    """
+    name = "cause_list"
+    heading = "VIPUL KUMAR - Cause List"
+
+    def title(self, rows, day):
+        return "%s - %s" % (self.heading, day.strftime("%d-%m-%Y"))
+
+    def body(self, rows, day):
+        empty = True
+
+        for court, court_rows in groupby(rows, key=lambda r: r[0]):
+            empty = False
+            yield Paragraph("<b>%s</b>" % escape(court or "Court not set"), STYLES["Heading3"])
+
+            numbered = ([str(i)] + [v or "" for v in r[1:]] for i, r in enumerate(court_rows, 1))
+            yield from chunked_tables(numbered, CAUSE_LIST_HEADER, CAUSE_LIST_WIDTHS,
+                                      CAUSE_LIST_STYLE, CAUSE_LIST_WRAP)
+            yield Spacer(1, 10)
+
+        if empty:
+            yield Paragraph("No hearings listed.", STYLES["Normal"])
+
+
+# ---------------- CLIENT STATEMENT ----------------
+CLIENT_STATEMENT_HEADER = ["ID", "Case Title", "Case No", "Year", "Court", "Next Hearing", "Status"]
+CLIENT_STATEMENT_WIDTHS = [28, 132, 56, 32, 85, 68, 50]    # fits portrait A4
+CLIENT_STATEMENT_WRAP = (1, 2, 4)
+CLIENT_STATEMENT_STYLE = table_style(9, 8)
+
+
+class ClientStatementReport(ReportTemplate):
+    """
+    body(cursor, client_name): cursor has executed the client's cases
+    (CLIENT_STATEMENT_HEADER columns).
+    """
+    name = "client_statement"
+    heading = "Client Statement"
+
+    def title(self, cursor, client_name):
+        return "%s - %s" % (self.heading, client_name)
+
+    def body(self, cursor, client_name):
+        counts = {}
+
+        def rows():
+            for r in iter_rows(cursor):
+                status = r[6] or "Unknown"
+                counts[status] = counts.get(status, 0) + 1
+                yield _cells(r)
+
+        yield from chunked_tables(rows(), CLIENT_STATEMENT_HEADER, CLIENT_STATEMENT_WIDTHS,
+                                  CLIENT_STATEMENT_STYLE, CLIENT_STATEMENT_WRAP)
+
+        # the totals are only known once every row has been laid out
+        total = sum(counts.values())
+        summary = ", ".join("%s: %d" % (k, v) for k, v in sorted(counts.items()))
+        yield Spacer(1, 10)
+        yield Paragraph(
+            "<b>Total cases: %d</b>%s" % (total, " (" + escape(summary) + ")" if summary else ""),
+            STYLES["Normal"]
+        )
+
+
+# ---------------- REGISTRY ----------------
+REPORTS = {r.name: r for r in (CaseListReport(), CaseReport(), CauseListReport(), ClientStatementReport())}
+
+
+def render(name, out, *args):
+    """
+    Renders report name into out. Returns the render time in ms.
+    """
+    return REPORTS[name].render(out, *args)
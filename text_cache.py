@@ -0,0 +1,193 @@
+import hashlib
+import json
+import time
+
+from pdf_helpers import EXTRACTOR_VERSION
+
+
+# =========================================================
+#          EXTRACTED TEXT CACHE (BY FILE CONTENT HASH)
+# =========================================================
+# The same order is often uploaded several times. Extracted text and the
+# detection results are stored under sha256(file bytes) + extractor
+# version, so a re-upload never goes through PyPDF2 again. When analysis
+# read only some pages, the full text of the "text" job that follows
+# replaces them (store_full_text), so a re-upload needs no follow-up.
+
+MAX_CACHE_BYTES = 256 * 1024 * 1024
+CHUNK_SIZE = 1024 * 1024
+
+# analysis keys that describe one run, not the document
+_RUN_KEYS = ("extract_ms", "detect_ms", "ocr_ms")
+
+
+def init_cache_table(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS pdf_cache (
+            sha256 TEXT NOT NULL,
+            version INTEGER NOT NULL,
+            text TEXT,
+            analysis TEXT,
+            size INTEGER NOT NULL,
+            last_used REAL,
+            PRIMARY KEY (sha256, version)
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_pdf_cache_last_used ON pdf_cache (last_used)")
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS pdf_cache_counters (
+            name TEXT PRIMARY KEY,
+            value INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+
+
+def save_and_hash(stream, path):
+    """
+    Copies an upload stream to path in chunks, hashing as it goes.
+    Returns the sha256 hex digest.
+    """
+    h = hashlib.sha256()
+    with open(path, "wb") as f:
+        while True:
+            chunk = stream.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            h.update(chunk)
+            f.write(chunk)
+    return h.hexdigest()
+
+
+def _count(cursor, name, n=1):
+    cursor.execute("""
+        INSERT INTO pdf_cache_counters (name, value) VALUES (?, ?)
+        ON CONFLICT(name) DO UPDATE SET value = value + excluded.value
+    """, (name, n))
+
+
+def lookup(cursor, sha256):
+    """
+    Cached analysis (same shape as pdf_helpers.analyse_pdf) or None.
+    Counts the hit / miss; the caller commits.
+    """
+    if not sha256:
+        return None
+
+    cursor.execute(
+        "SELECT text, analysis FROM pdf_cache WHERE sha256=? AND version=?",
+        (sha256, EXTRACTOR_VERSION)
+    )
+    row = cursor.fetchone()
+
+    if not row:
+        _count(cursor, "misses")
+        return None
+
+    cursor.execute(
+        "UPDATE pdf_cache SET last_used=? WHERE sha256=? AND version=?",
+        (time.time(), sha256, EXTRACTOR_VERSION)
+    )
+    _count(cursor, "hits")
+
+    found = json.loads(row[1])
+    found["text"] = row[0]
+    found["extract_ms"] = 0.0
+    found["detect_ms"] = 0.0
+    found["ocr_ms"] = 0.0
+    found["cache_hit"] = True
+    return found
+
+
+def store(cursor, sha256, found):
+    """
+    Saves an analysis and evicts least recently used entries over
+    MAX_CACHE_BYTES. The caller commits.
+
+    A scan that was not OCR'd (no tesseract) is not saved, so it is
+    OCR'd on its next upload once OCR is available.
+    """
+    if not sha256:
+        return
+    if found.get("scanned_pages") and not found.get("ocr"):
+        return
+
+    text = found.get("text") or ""
+    analysis = {k: v for k, v in found.items() if k != "text" and k not in _RUN_KEYS}
+    analysis = json.dumps(analysis)
+
+    cursor.execute("""
+        INSERT OR REPLACE INTO pdf_cache (sha256, version, text, analysis, size, last_used)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, (sha256, EXTRACTOR_VERSION, text, analysis, len(text) + len(analysis), time.time()))
+
+    _evict(cursor)
+
+
+def store_full_text(cursor, sha256, text):
+    """
+    Puts a document's full text (a "text" job's result) in place of the
+    pages analyse_pdf read, so a later hit has it all and queues no
+    follow-up. Nothing happens without a cached analysis to complete.
+    The caller commits.
+    """
+    if not sha256 or not text:
+        return
+
+    cursor.execute(
+        "SELECT analysis FROM pdf_cache WHERE sha256=? AND version=?",
+        (sha256, EXTRACTOR_VERSION)
+    )
+    row = cursor.fetchone()
+    if not row:
+        return
+
+    analysis = json.loads(row[0])
+    analysis["pages_read"] = analysis.get("page_count", analysis.get("pages_read"))
+    analysis = json.dumps(analysis)
+
+    cursor.execute("""
+        UPDATE pdf_cache SET text=?, analysis=?, size=?, last_used=?
+        WHERE sha256=? AND version=?
+    """, (text, analysis, len(text) + len(analysis), time.time(), sha256, EXTRACTOR_VERSION))
+
+    _evict(cursor)
+
+
+def _evict(cursor):
+    cursor.execute("SELECT COALESCE(SUM(size), 0) FROM pdf_cache")
+    total = cursor.fetchone()[0]
+    if total <= MAX_CACHE_BYTES:
+        return
+
+    cursor.execute("SELECT sha256, version, size FROM pdf_cache ORDER BY last_used")
+    victims = []
+    for sha256, version, size in cursor.fetchall():
+        if total <= MAX_CACHE_BYTES:
+            break
+        victims.append((sha256, version))
+        total -= size
+
+    cursor.executemany("DELETE FROM pdf_cache WHERE sha256=? AND version=?", victims)
+    _count(cursor, "evictions", len(victims))
+
+
+def stats(cursor):
+    cursor.execute("SELECT name, value FROM pdf_cache_counters")
+    counters = dict(cursor.fetchall())
+
+    cursor.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM pdf_cache")
+    entries, size = cursor.fetchone()
+
+    hits = counters.get("hits", 0)
+    misses = counters.get("misses", 0)
+
+    return {
+        "entries": entries,
+        "bytes": size,
+        "max_bytes": MAX_CACHE_BYTES,
+        "hits": hits,
+        "misses": misses,
+        "evictions": counters.get("evictions", 0),
+        "hit_rate": round(hits / (hits + misses), 3) if hits + misses else None
+    }